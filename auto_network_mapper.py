@@ -5,16 +5,14 @@ import os
 from pathlib import Path
 
 def check_dependencies():
-    """Verifica e instala dependencias en el entorno virtual"""
-    try:
-        import nmap
-        import networkx as nx
-        import matplotlib.pyplot as plt
-        print("✅ Dependencias ya instaladas")
-        return True
-    except ImportError as e:
-        print(f"📦 Instalando dependencias faltantes: {e}")
+    """Verifica que las dependencias estén instaladas en el entorno virtual, sin importarlas"""
+    from dependencies import missing_dependencies
+    missing = missing_dependencies()
+    if missing:
+        print(f"📦 Dependencias faltantes: {', '.join(missing)}")
         return False
+    print("✅ Dependencias ya instaladas")
+    return True
 
 def get_network_range():
     """Obtiene el rango de red automáticamente en macOS"""
@@ -53,14 +51,13 @@ def main():
     
     if not check_dependencies():
         print("❌ Error: Dependencias faltantes. Ejecuta:")
-        print("   pip install python-nmap networkx matplotlib")
+        print("   pip install python-nmap networkx numpy")
         return
     
     # Obtener rango de red
     network_range = get_network_range()
     
     # Importar después de verificar dependencias
-    from network_scanner import NetworkMapper
     from svg_generator import SVGGenerator
     
     # Generar diagrama
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Coordinador con 1..N workers locales sobre una red simulada de varias sedes"""
+import argparse
+import functools
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from instrumentation import configure_logging
+from distributed import Coordinator, spawn_local_workers
+from host_store import HostGraph
+from network_scanner import NetworkMapper
+
+
+class SimulatedNmap:
+    """Imita NmapStreamScanner para -sn (coste por bloque) y -sT -F -O (coste por host)"""
+
+    def __init__(self, hosts_per_block=50, sweep_cost=0.2, scan_cost=0.01):
+        self.hosts_per_block = hosts_per_block
+        self.sweep_cost = sweep_cost
+        self.scan_cost = scan_cost
+
+    def scan(self, hosts, arguments='', stage='scan'):
+        if '-sn' in arguments:
+            time.sleep(self.sweep_cost)
+            prefix = hosts.rsplit('.', 1)[0]
+            for octet in range(1, self.hosts_per_block + 1):
+                yield {'ip': f"{prefix}.{octet}", 'state': 'up', 'mac': f"00:11:22:{octet:02x}:00:01",
+                       'vendor': 'Cisco', 'hostname': 'router' if octet == 1 else f"host-{octet}",
+                       'srtt': None, 'ports': [], 'os': 'Unknown', 'scanned': False}
+        else:
+            targets = hosts.split()
+            time.sleep(self.scan_cost * len(targets))
+            for ip in targets:
+                yield {'ip': ip, 'state': 'up', 'os': 'Linux 5.X (96%)', 'scanned': True,
+                       'ports': [{'port': 22, 'service': 'ssh', 'protocol': 'tcp'}]}
+
+
+def simulated_mapper():
+    # Sin llamar a __init__: nmap.PortScanner() necesita el binario de nmap
+    mapper = NetworkMapper.__new__(NetworkMapper)
+    mapper.network_graph = HostGraph()
+    mapper.host_rtts = {}
+    mapper.port_backend = 'nmap'
+    return mapper
+
+
+def run_case(targets, worker_count, scanner_factory, scan_ports):
+    mapper = simulated_mapper()
+    coordinator = Coordinator(mapper, targets)
+    spawn_local_workers(coordinator, worker_count, scan_ports=scan_ports, quiet=True,
+                        mapper_factory=simulated_mapper, scanner_factory=scanner_factory)
+    start = time.perf_counter()
+    coordinator.start()
+    hosts = list(coordinator.iter_hosts())
+    elapsed = time.perf_counter() - start
+    coordinator.close()
+    for process in coordinator.local_processes:
+        process.join()
+    return hosts, mapper.network_graph, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark: modo distribuido con workers locales')
+    parser.add_argument('--sites', type=int, default=4, help='Sedes (una /22 cada una)')
+    parser.add_argument('--hosts', type=int, default=50, help='Hosts activos por /24')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--sweep-cost', type=float, default=0.2, help='Segundos simulados por barrido -sn')
+    parser.add_argument('--scan-cost', type=float, default=0.01, help='Segundos simulados por host escaneado')
+    parser.add_argument('--scan-ports', action='store_true')
+    args = parser.parse_args()
+    configure_logging(quiet=True)
+
+    targets = [f"10.{site}.0.0/22" for site in range(args.sites)]
+    expected = args.sites * 4 * args.hosts
+    scanner_factory = functools.partial(SimulatedNmap, args.hosts, args.sweep_cost, args.scan_cost)
+
+    print(f"📊 {len(targets)} sedes, {args.sites * 4} bloques /24, {expected} hosts simulados")
+    print(f"{'workers':>8} {'hosts':>7} {'tiempo (s)':>11} {'ok':>4}")
+    for worker_count in args.workers:
+        hosts, graph, elapsed = run_case(targets, worker_count, scanner_factory, args.scan_ports)
+        ok = len(hosts) == expected == graph.number_of_nodes()
+        if args.scan_ports:
+            ok = ok and all(host['ports'] for host in hosts)
+        print(f"{worker_count:>8} {len(hosts):>7} {elapsed:>11.2f} {'✅' if ok else '❌':>4}")
+
+
+if __name__ == '__main__':
+    main()
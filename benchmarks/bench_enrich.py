@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Enriquecimiento sin red: índice OUI con mmap vs. lista de texto y DNS inverso en bloque con caché
+
+La lista de prefijos es sintética (del tamaño de nmap-mac-prefixes) y el DNS
+un resolvedor simulado con latencia fija en el que parte de las IPs no
+tienen PTR, que es donde la caché negativa ahorra consultas.
+"""
+import argparse
+import os
+import random
+import socket
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from instrumentation import configure_logging
+from enrichment import HostEnricher, OUIIndex, ReverseResolver, _PREFIX_LINE, build_oui_index
+
+
+class StubResolver:
+    """resolve(ip) con `latency` segundos por consulta; sin nombre -> socket.herror, como gethostbyaddr"""
+
+    def __init__(self, names, latency):
+        self.names = names
+        self.latency = latency
+        self.queries = 0
+
+    def __call__(self, ip):
+        self.queries += 1
+        time.sleep(self.latency)
+        if ip not in self.names:
+            raise socket.herror(1, 'Unknown host')
+        return self.names[ip]
+
+
+def write_prefixes(path, count, rng):
+    prefixes = rng.sample(range(1 << 24), count)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("# Lista sintética con el formato de nmap-mac-prefixes\n")
+        for prefix in prefixes:
+            f.write(f"{prefix:06X} Fabricante {prefix % 5000}\n")
+    return prefixes
+
+
+def text_index(path):
+    # Lo que haría cada proceso sin índice: leer y parsear la lista entera a un dict
+    prefixes = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            match = _PREFIX_LINE.match(line)
+            if match:
+                prefixes[match.group(1).upper()] = match.group(2)
+    return prefixes
+
+
+def measure(func, *args):
+    """(resultado, segundos, MB pico)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 2**20
+
+
+def hosts_for(ips, macs):
+    return [{'ip': ip, 'mac': mac, 'vendor': 'Unknown', 'hostname': ip} for ip, mac in zip(ips, macs)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark: índice OUI y DNS inverso en bloque')
+    parser.add_argument('--prefixes', type=int, default=50000, help='Prefijos OUI en la lista (nmap trae ~50k)')
+    parser.add_argument('--hosts', type=int, default=4096)
+    parser.add_argument('--latency', type=float, default=0.02, help='Segundos por consulta DNS simulada')
+    parser.add_argument('--named', type=float, default=0.6, help='Fracción de IPs con PTR')
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--block', type=int, default=256, help='Hosts por bloque barrido')
+    args = parser.parse_args()
+    configure_logging(quiet=True)
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        source = os.path.join(workdir, 'nmap-mac-prefixes')
+        index_path = os.path.join(workdir, 'network_oui.idx')
+        prefixes = write_prefixes(source, args.prefixes, rng)
+        macs = [f"{rng.choice(prefixes):06X}{rng.randrange(1 << 24):06X}" for _ in range(args.hosts)]
+        macs = [':'.join(mac[i:i + 2] for i in range(0, 12, 2)) for mac in macs]
+
+        _, build_time, _ = measure(build_oui_index, source, index_path)
+        table, text_time, text_peak = measure(text_index, source)
+        oui, mmap_time, mmap_peak = measure(OUIIndex, index_path)
+        start = time.perf_counter()
+        found = sum(1 for mac in macs if oui.lookup(mac) == table.get(mac.replace(':', '')[:6]))
+        lookup_us = (time.perf_counter() - start) / len(macs) * 1e6
+
+        print(f"🏷️  OUI: {args.prefixes} prefijos, índice de {os.path.getsize(index_path) / 2**20:.1f} MB "
+              f"construido en {build_time:.2f} s (solo la primera vez)")
+        print(f"{'carga':<18} {'tiempo (ms)':>12} {'pico (MB)':>10}")
+        print(f"{'texto -> dict':<18} {text_time * 1000:>12.1f} {text_peak:>10.1f}")
+        print(f"{'índice mmap':<18} {mmap_time * 1000:>12.3f} {mmap_peak:>10.3f}")
+        print(f"   {lookup_us:.1f} µs por búsqueda, {found}/{len(macs)} iguales que el dict")
+        oui.close()
+
+    ips = [f"10.0.{i >> 8 & 255}.{i & 255}" for i in range(args.hosts)]
+    names = {ip: f"host-{i}.example" for i, ip in enumerate(ips) if rng.random() < args.named}
+    blocks = [ips[i:i + args.block] for i in range(0, len(ips), args.block)]
+
+    print(f"\n🔎 DNS inverso: {args.hosts} hosts, {args.latency * 1000:.0f} ms por consulta, "
+          f"{len(names) / len(ips):.0%} con PTR")
+    print(f"{'modo':<26} {'consultas':>10} {'tiempo (s)':>11} {'nombres':>8}")
+
+    stub = StubResolver(names, args.latency)
+    start = time.perf_counter()
+    resolved = 0
+    for ip in ips[:args.block]:
+        try:
+            stub(ip)
+            resolved += 1
+        except OSError:
+            pass
+    sequential = (time.perf_counter() - start) * len(ips) / args.block
+    print(f"{'secuencial (estimado)':<26} {len(ips):>10} {sequential:>11.2f} {'':>8}")
+
+    stub = StubResolver(names, args.latency)
+    enricher = HostEnricher(resolver=ReverseResolver(stub, workers=args.workers))
+    for label in ('bloque, caché vacía', 'bloque, caché llena'):
+        queries = stub.queries
+        start = time.perf_counter()
+        completed = sum(enricher.enrich(hosts_for(block, ['Unknown'] * len(block))) for block in blocks)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<26} {stub.queries - queries:>10} {elapsed:>11.2f} {completed:>8}")
+    enricher.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Memoria por host: dicts duplicados en el grafo vs. HostRecord compartido"""
+import argparse
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import networkx as nx
+
+from host_store import HostGraph
+
+SERVICES = [(22, 'ssh (OpenSSH 8.9)', 'tcp'), (80, 'http (nginx 1.24)', 'tcp'), (443, 'https', 'tcp'),
+            (445, 'microsoft-ds', 'tcp'), (3389, 'ms-wbt-server', 'tcp'), (8080, 'http-proxy', 'tcp'),
+            (53, 'domain', 'tcp'), (631, 'ipp', 'tcp')]
+VENDORS = ['Apple', 'Dell', 'Cisco Systems', 'Hewlett Packard', 'Raspberry Pi Foundation']
+
+
+def discovered(i):
+    """Lo que devuelve el barrido -sn para el host i (strings nuevos, como al parsear XML)"""
+    ip = f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"
+    mac = f"00:1A:2B:{i >> 16 & 255:02X}:{i >> 8 & 255:02X}:{i & 255:02X}"
+    return {'ip': ip, 'mac': mac, 'vendor': ''.join(VENDORS[i % len(VENDORS)]),
+            'hostname': f"host-{i}.lan", 'os': 'Unknown', 'ports': [], 'services': []}
+
+
+def scanned(i, ports_per_host):
+    """Lo que devuelve scan_ports para el host i"""
+    ports = [{'port': port, 'service': ''.join(service), 'protocol': ''.join(proto)}
+             for port, service, proto in (SERVICES[(i + k) % len(SERVICES)] for k in range(ports_per_host))]
+    return {'ports': ports, 'os': ''.join(['Linux 5.X', ' (96%)'])}
+
+
+def build_dicts(n, ports_per_host):
+    """Representación anterior: dict por host + copia en los atributos del nodo"""
+    graph = nx.Graph()
+    hosts = []
+    for i in range(n):
+        host = discovered(i)
+        graph.add_node(host['ip'], **host)
+        result = scanned(i, ports_per_host)
+        host['ports'] = result['ports']
+        host['os'] = result['os']
+        host['services'] = result['ports']
+        graph.nodes[host['ip']].update(ports=host['ports'], os=host['os'], services=host['services'])
+        hosts.append(host)
+    return graph, hosts
+
+
+def build_records(n, ports_per_host):
+    """Representación actual: el nodo del grafo es el HostRecord"""
+    graph = HostGraph()
+    hosts = []
+    for i in range(n):
+        host = discovered(i)
+        graph.add_node(host['ip'], **host)
+        record = graph.nodes[host['ip']]
+        result = scanned(i, ports_per_host)
+        record['ports'] = result['ports']
+        record['os'] = result['os']
+        record['services'] = record['ports']
+        hosts.append(record)
+    return graph, hosts
+
+
+def measure(builder, n, ports_per_host):
+    gc.collect()
+    tracemalloc.start()
+    data = builder(n, ports_per_host)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark: memoria por host')
+    parser.add_argument('--hosts', type=int, default=65536)
+    parser.add_argument('--ports', type=int, default=5, help='Puertos abiertos por host')
+    args = parser.parse_args()
+
+    print(f"📊 {args.hosts} hosts, {args.ports} puertos por host")
+    before = measure(build_dicts, args.hosts, args.ports)
+    after = measure(build_records, args.hosts, args.ports)
+    print(f"{'representación':<20} {'total (MB)':>11} {'bytes/host':>11}")
+    print(f"{'dicts + copia':<20} {before / 2**20:>11.1f} {before / args.hosts:>11.0f}")
+    print(f"{'HostRecord':<20} {after / 2**20:>11.1f} {after / args.hosts:>11.0f}")
+    print(f"   reducción: {100 * (1 - after / before):.0f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Modo daemon: ciclo con el grafo en memoria vs. ejecución completa (cron) sobre una red simulada"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from instrumentation import configure_logging
+from monitor import EventLog, NetworkMonitor
+from bench_suite import simulated_generator
+from simulated_network import SimulatedNetwork, SimulatedPortScanner
+
+
+class CostlyPortScanner(SimulatedPortScanner):
+    """SimulatedPortScanner con un coste fijo por host escaneado (-O tarda segundos por host)"""
+
+    scan_cost = 0.0
+
+    def _open(self, hosts, arguments):
+        if '-sn' not in arguments:
+            time.sleep(self.scan_cost * len(hosts.split()))
+        return super()._open(hosts, arguments)
+
+
+def mutate(network, changes, rng):
+    """Cambia la MAC de `changes` hosts; el XML se regenera al escanear"""
+    for ip in rng.sample(sorted(network.hosts), changes):
+        network.hosts[ip]['mac'] = f"02:00:00:{rng.randrange(256):02X}:{rng.randrange(256):02X}:00"
+    network.sweeps.clear()
+    network.port_scans.clear()
+
+
+def timed_cycle(monitor):
+    before = dict(monitor.events.counts)
+    start = time.perf_counter()
+    monitor.cycle()
+    elapsed = time.perf_counter() - start
+    return elapsed, {event: count - before.get(event, 0) for event, count in monitor.events.counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark: ciclo del daemon vs. ejecución completa')
+    parser.add_argument('--hosts', type=int, default=1000)
+    parser.add_argument('--changes', type=int, nargs='+', default=[0, 10, 100], help='Hosts con MAC cambiada por ciclo')
+    parser.add_argument('--scan-cost', type=float, default=0.01, help='Segundos simulados por host escaneado')
+    args = parser.parse_args()
+    configure_logging(quiet=True)
+
+    CostlyPortScanner.scan_cost = args.scan_cost
+    network = SimulatedNetwork(args.hosts, ports=3)
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as workdir:
+        output_file = os.path.join(workdir, 'monitor.svg')
+        events = EventLog(os.path.join(workdir, 'events.jsonl'))
+        # Primer ciclo sin estado previo: lo mismo que una ejecución completa desde cron
+        monitor = NetworkMonitor(simulated_generator(), network.network_range, output_file, events,
+                                 interval=0, scan_ports=True, workers=8, batch_size=16,
+                                 scanner_factory=lambda: CostlyPortScanner(network))
+        full, _ = timed_cycle(monitor)
+
+        print(f"📊 {args.hosts} hosts, {args.scan_cost * 1000:.0f} ms simulados por host escaneado")
+        print(f"{'cambios':>8} {'completo (s)':>13} {'daemon (s)':>11} {'eventos':>8}")
+        for changes in args.changes:
+            mutate(network, changes, rng)
+            cycle, counts = timed_cycle(monitor)
+            print(f"{changes:>8} {full:>13.2f} {cycle:>11.2f} {sum(counts.values()):>8}")
+        events.close()
+
+
+if __name__ == '__main__':
+    main()
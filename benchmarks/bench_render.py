@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Compara tiempo y memoria pico del renderizado SVG nativo vs. matplotlib"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import networkx as nx
+
+from diagram_style import diagram_title
+from svg_generator import render_matplotlib
+from svg_writer import write_network_svg
+
+RENDERERS = {
+    'svg': write_network_svg,
+    'matplotlib': render_matplotlib,
+}
+
+HOSTNAMES = ['router', 'fileserver', 'switch-core', 'laptop', 'printer', 'phone']
+
+
+def build_graph(size, seed=0):
+    """Estrella alrededor del gateway, como la que produce discover_connections"""
+    rng = random.Random(seed)
+    graph = nx.Graph()
+    for i in range(size):
+        ip = f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}"
+        graph.add_node(ip, ip=ip, mac=f"00:11:22:{i >> 16 & 255:02X}:{i >> 8 & 255:02X}:{i & 255:02X}",
+                       vendor='Acme', hostname=f"{rng.choice(HOSTNAMES)}-{i}", os='Linux 5.X (96%)',
+                       ports=[{'port': p, 'service': 'svc', 'protocol': 'tcp'} for p in (22, 80, 443)])
+    nodes = list(graph.nodes())
+    for node in nodes[1:]:
+        graph.add_edge(nodes[0], node, connection='network', weight=1)
+    pos = {node: (rng.uniform(-1, 1), rng.uniform(-1, 1)) for node in nodes}
+    return graph, pos
+
+
+def run_case(renderer, graph, pos):
+    output_file = tempfile.NamedTemporaryFile(suffix='.svg', delete=False).name
+    title = diagram_title('10.0.0.0/8', graph.number_of_nodes(), graph.number_of_edges(), True)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    RENDERERS[renderer](graph, pos, output_file, title, True)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    file_size = os.path.getsize(output_file)
+    os.unlink(output_file)
+    return elapsed, peak, file_size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark: renderizado SVG nativo vs. matplotlib')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--renderers', nargs='+', choices=list(RENDERERS), default=list(RENDERERS))
+    args = parser.parse_args()
+
+    # El coste de importar matplotlib se mide aparte para no cargarlo al primer caso
+    if 'matplotlib' in args.renderers:
+        start = time.perf_counter()
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot  # noqa: F401
+        print(f"📦 import matplotlib.pyplot: {time.perf_counter() - start:.2f} s")
+
+    print(f"{'renderer':<12} {'nodos':>7} {'tiempo (s)':>11} {'pico (MB)':>10} {'SVG (KB)':>10}")
+    for size in args.sizes:
+        graph, pos = build_graph(size)
+        for renderer in args.renderers:
+            elapsed, peak, file_size = run_case(renderer, graph, pos)
+            print(f"{renderer:<12} {size:>7} {elapsed:>11.2f} {peak / 2**20:>10.1f} {file_size / 1024:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Tiempo de arranque: imports y sonda de nmap al inicio vs. cargados en la etapa que los usa"""
+import argparse
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Cada caso se ejecuta en un intérprete nuevo: (nombre, antes, ahora)
+CASES = [
+    ('dependencias',
+     'import nmap, networkx, matplotlib.pyplot',
+     'from dependencies import missing_dependencies; missing_dependencies()'),
+    ('SVGGenerator()',
+     'import nmap, networkx, matplotlib.pyplot, svg_generator, layouts, tcp_scanner',
+     'from svg_generator import SVGGenerator; SVGGenerator()'),
+]
+# Solo con nmap instalado: el PortScanner inicial y uno por hilo de escaneo
+PROBE_CASE = ('{n} PortScanner',
+              'import nmap\nfor _ in range({n}): nmap.PortScanner()',
+              'from dependencies import port_scanner\nfor _ in range({n}): port_scanner()')
+
+
+def run_python(args, repeat):
+    """Mediana de `repeat` ejecuciones de python con esos argumentos, en segundos"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=ROOT, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark: tiempo de arranque de run.py y SVGGenerator')
+    parser.add_argument('--repeat', type=int, default=5, help='Ejecuciones por caso (se usa la mediana)')
+    parser.add_argument('--scanners', type=int, default=9,
+                        help='PortScanner creados: el del mapper y uno por worker (default: 9)')
+    args = parser.parse_args()
+
+    cases = list(CASES)
+    if shutil.which('nmap'):
+        name, before, after = PROBE_CASE
+        cases.append((name.format(n=args.scanners), before.format(n=args.scanners), after.format(n=args.scanners)))
+    else:
+        print("⚠️  nmap no está instalado: se omite la sonda de PortScanner")
+
+    baseline = run_python(['-c', 'pass'], args.repeat)
+    print(f"🐍 Intérprete vacío: {baseline * 1000:.0f} ms")
+    print(f"{'caso':<16} {'antes (ms)':>11} {'ahora (ms)':>11} {'ganancia':>9}")
+    for name, before, after in cases:
+        eager = run_python(['-c', before], args.repeat)
+        lazy = run_python(['-c', after], args.repeat)
+        print(f"{name:<16} {eager * 1000:>11.0f} {lazy * 1000:>11.0f} {eager / lazy:>8.1f}x")
+
+    help_time = run_python(['run.py', '--help'], args.repeat)
+    print(f"{'run.py --help':<16} {'':>11} {help_time * 1000:>11.0f}")
+
+
+if __name__ == '__main__':
+    main()
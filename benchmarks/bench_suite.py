@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""Benchmark de todas las etapas sobre redes sintéticas, con resultados guardados por commit
+
+Cada tamaño recorre el flujo de generate_network_svg con XML de nmap simulado
+(simulated_network.py): descubrimiento (parseo del -sn), parseo del
+escaneo de puertos/OS, discover_connections, layout, render SVG y
+generate_text_report. De cada etapa se guarda el tiempo y la memoria pico
+(tracemalloc) en benchmarks/results/<commit>.json; --compare <commit>
+muestra la diferencia con otra ejecución y sale con código 1 si alguna
+etapa empeora más que --threshold.
+
+benchmarks/results/ es local (está en .gitignore): los tiempos solo se
+pueden comparar en la misma máquina. Para CI o para compartirlos, --output
+escribe el JSON donde se indique y --compare acepta esa ruta, p. ej. un
+artefacto medido en el commit base en el mismo runner.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from instrumentation import configure_logging
+from diagram_style import diagram_title
+from host_store import HostGraph
+from layouts import LAYOUTS, compute_layout
+from network_scanner import NetworkMapper
+from simulated_network import SimulatedNetwork, SimulatedPortScanner
+from svg_generator import SVGGenerator
+from svg_writer import write_network_svg
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+STAGES = ('discovery', 'port_parse', 'connections', 'layout', 'render', 'report')
+
+
+def git_commit():
+    """Commit actual (con -dirty si hay cambios sin confirmar), o 'local' fuera de git"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, check=True,
+                                capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               check=True, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'local'
+    return f"{commit}-dirty" if dirty else commit
+
+
+def simulated_generator():
+    # Sin llamar a __init__: nmap.PortScanner() necesita el binario de nmap
+    mapper = NetworkMapper.__new__(NetworkMapper)
+    mapper.network_graph = HostGraph()
+    mapper.host_rtts = {}
+    mapper.port_backend = 'nmap'
+    generator = SVGGenerator.__new__(SVGGenerator)
+    generator.mapper = mapper
+    generator.hosts = []
+    return generator
+
+
+class StageTimer:
+    """Tiempo y memoria pico de cada etapa (la memoria solo si track_memory)"""
+
+    def __init__(self, track_memory=True):
+        self.track_memory = track_memory
+        self.results = {}
+
+    def run(self, stage, func, *args):
+        if self.track_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        value = func(*args)
+        elapsed = time.perf_counter() - start
+        result = {'seconds': round(elapsed, 4)}
+        if self.track_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            result['peak_mb'] = round(peak / 2**20, 2)
+        self.results[stage] = result
+        return value
+
+
+def run_size(size, ports, layout, track_memory, workdir):
+    network = SimulatedNetwork(size, ports)
+    generator = simulated_generator()
+    mapper = generator.mapper
+    timer = StageTimer(track_memory)
+
+    def discovery():
+        hosts = mapper.iter_discover_network(network.network_range, workers=1,
+                                             scanner_factory=lambda: SimulatedPortScanner(network))
+        generator.hosts = list(hosts)
+        return generator.hosts
+
+    def port_parse():
+        # Un lote por /24, como ScanPipeline con --batch-size 256
+        scanner = SimulatedPortScanner(network)
+        hosts_by_ip = {host['ip']: host for host in generator.hosts}
+        for ips in network.blocks.values():
+            if ips:
+                for ip, result in mapper.scan_ports_batch(ips, scanner).items():
+                    mapper.update_host(hosts_by_ip[ip], result)
+
+    output_file = os.path.join(workdir, f"bench_{size}.svg")
+    timer.run('discovery', discovery)
+    timer.run('port_parse', port_parse)
+    connections = timer.run('connections', mapper.discover_connections, generator.hosts)
+    pos = timer.run('layout', compute_layout, mapper.network_graph, layout)
+    title = diagram_title(network.network_range, len(generator.hosts), connections, True)
+    timer.run('render', write_network_svg, mapper.network_graph, pos, output_file, title, True)
+    timer.run('report', generator.generate_text_report, network.network_range, True,
+              output_file.replace('.svg', '_report.txt'))
+
+    # Comprobación mínima de que el flujo simulado ha funcionado
+    scanned = sum(1 for host in generator.hosts if len(host['ports']) == min(ports, 10))
+    timer.results['hosts'] = len(generator.hosts)
+    timer.results['ok'] = len(generator.hosts) == size == scanned and connections == size - 1
+    return timer.results
+
+
+def load_results(reference):
+    """Resultados de un commit (o prefijo) guardados en RESULTS_DIR, o de una ruta"""
+    path = Path(reference)
+    if not path.is_file():
+        matches = sorted(RESULTS_DIR.glob(f"{reference}*.json"))
+        if not matches:
+            raise SystemExit(f"❌ No hay resultados guardados para {reference} en {RESULTS_DIR}")
+        path = matches[-1]
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(current, previous, threshold):
+    """Tabla de diferencias por etapa; devuelve las etapas que empeoran más del umbral"""
+    regressions = []
+    print(f"\n📈 Comparado con {previous['commit']} (umbral {threshold:.0%})")
+    print(f"{'hosts':>7} {'etapa':<12} {'antes (s)':>10} {'ahora (s)':>10} {'Δ tiempo':>9} {'Δ pico':>8}")
+    for size, stages in current['results'].items():
+        before = previous['results'].get(size)
+        if before is None:
+            continue
+        for stage in STAGES:
+            now, old = stages[stage], before.get(stage)
+            if old is None:
+                continue
+            # Etapas de milisegundos o de menos de 1 MB: el ruido no cuenta como regresión
+            time_change = (now['seconds'] - old['seconds']) / max(old['seconds'], 1e-9)
+            changes = [time_change] if old['seconds'] >= 0.01 else []
+            peak_delta = ''
+            if 'peak_mb' in now and old.get('peak_mb'):
+                peak_change = (now['peak_mb'] - old['peak_mb']) / old['peak_mb']
+                peak_delta = f"{peak_change:+.0%}"
+                if old['peak_mb'] >= 1:
+                    changes.append(peak_change)
+            regressed = any(change > threshold for change in changes)
+            if regressed:
+                regressions.append((size, stage))
+            print(f"{size:>7} {stage:<12} {old['seconds']:>10.3f} {now['seconds']:>10.3f} "
+                  f"{time_change:>+9.0%} {peak_delta:>8} {'⚠️' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark: todas las etapas sobre redes sintéticas')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 10000, 65536])
+    parser.add_argument('--ports', type=int, default=3, help='Puertos abiertos por host')
+    parser.add_argument('--layout', choices=list(LAYOUTS), default='auto')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='Sin tracemalloc: tiempos más fieles pero sin memoria pico')
+    parser.add_argument('--label', help='Nombre de los resultados (por defecto, el commit actual)')
+    parser.add_argument('--compare', metavar='COMMIT', help='Commit (o archivo JSON) con el que comparar')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Empeoramiento tolerado (0.25 = 25%%)')
+    parser.add_argument('--output', metavar='ARCHIVO',
+                        help='Guardar los resultados en ARCHIVO (default: benchmarks/results/<commit>.json)')
+    parser.add_argument('--no-save', action='store_true', help='No guardar los resultados')
+    args = parser.parse_args()
+    configure_logging(quiet=True)
+
+    previous = load_results(args.compare) if args.compare else None
+    label = args.label or git_commit()
+    report = {
+        'commit': label,
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'ports': args.ports,
+        'layout': args.layout,
+        'memory': not args.no_memory,
+        'results': {},
+    }
+
+    print(f"📊 {label}: {args.ports} puertos por host, layout {args.layout}")
+    header = f"{'hosts':>7} " + ' '.join(f"{stage:>11}" for stage in STAGES) + f" {'ok':>4}"
+    print(header)
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            results = run_size(size, args.ports, args.layout, not args.no_memory, workdir)
+            report['results'][str(size)] = results
+            print(f"{size:>7} " + ' '.join(f"{results[stage]['seconds']:>11.3f}" for stage in STAGES)
+                  + f" {'✅' if results['ok'] else '❌':>4}")
+            if not args.no_memory:
+                print(f"{'MB':>7} " + ' '.join(f"{results[stage]['peak_mb']:>11.1f}" for stage in STAGES))
+
+    if not args.no_save:
+        output_file = Path(args.output) if args.output else RESULTS_DIR / f"{label}.json"
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Resultados guardados en {output_file}")
+
+    if previous is not None:
+        regressions = compare(report, previous, args.threshold)
+        if regressions:
+            print(f"⚠️  {len(regressions)} etapas empeoran más del {args.threshold:.0%}")
+            sys.exit(1)
+        print("✅ Sin regresiones")
+
+
+if __name__ == '__main__':
+    main()
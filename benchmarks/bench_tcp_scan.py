@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Compara el backend tcp (connect asyncio) con nmap -sT sobre sockets locales
+
+Abre --open sockets a la escucha en cada dirección 127.0.0.X (en Linux todo
+127.0.0.0/8 es loopback; en otros sistemas se usa solo 127.0.0.1) y escanea
+--ports puertos por host, el resto cerrados.
+"""
+import argparse
+import contextlib
+import selectors
+import shutil
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+import networkx as nx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from instrumentation import configure_logging
+from network_scanner import NetworkMapper
+from scan_engine import ConcurrentScanner
+from tcp_scanner import AsyncTCPScanner
+
+
+class LoopbackListeners:
+    """Sockets a la escucha que aceptan y cierran en un hilo (para no llenar el backlog)"""
+
+    def __init__(self, hosts, open_count):
+        self.selector = selectors.DefaultSelector()
+        self.sockets = []
+        self.ports = []
+        for ip in hosts:
+            for i in range(open_count):
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                # Mismos puertos en todos los hosts: el primero los elige el sistema
+                sock.bind((ip, self.ports[i] if len(self.ports) == open_count else 0))
+                sock.listen(socket.SOMAXCONN)
+                sock.setblocking(False)
+                if len(self.ports) < open_count:
+                    self.ports.append(sock.getsockname()[1])
+                self.selector.register(sock, selectors.EVENT_READ)
+                self.sockets.append(sock)
+        self.running = True
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def _serve(self):
+        while self.running:
+            for key, _ in self.selector.select(timeout=0.1):
+                with contextlib.suppress(OSError):
+                    conn, _ = key.fileobj.accept()
+                    conn.close()
+
+    def close(self):
+        self.running = False
+        self.thread.join()
+        for sock in self.sockets:
+            self.selector.unregister(sock)
+            sock.close()
+
+
+def closed_ports(count, exclude):
+    """Puertos libres en este momento: se reservan y se sueltan enseguida"""
+    ports = []
+    while len(ports) < count:
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        if port not in exclude and port not in ports:
+            ports.append(port)
+    return ports
+
+
+def loopback_hosts(count):
+    hosts = [f"127.0.0.{i}" for i in range(1, count + 1)]
+    try:
+        with socket.socket() as sock:
+            sock.bind((hosts[-1], 0))
+    except OSError:
+        print("⚠️  Solo 127.0.0.1 es loopback en este sistema: se usa un único host")
+        return hosts[:1]
+    return hosts
+
+
+def run_tcp(hosts, ports, workers, batch_size, concurrency, timeout):
+    # Sin llamar a __init__: nmap.PortScanner() necesita el binario de nmap
+    mapper = NetworkMapper.__new__(NetworkMapper)
+    mapper.network_graph = nx.Graph()
+    mapper.set_port_backend('tcp', AsyncTCPScanner(ports=ports, concurrency=concurrency, timeout=timeout))
+
+    engine = ConcurrentScanner(mapper, workers=workers, batch_size=batch_size)
+    host_dicts = [{'ip': ip} for ip in hosts]
+
+    start = time.perf_counter()
+    engine.scan_hosts(host_dicts)
+    return host_dicts, time.perf_counter() - start
+
+
+def run_nmap(hosts, ports, batch_size):
+    import nmap
+
+    port_list = ','.join(str(p) for p in ports)
+    invocations = 0
+    open_counts = {}
+    start = time.perf_counter()
+    for i in range(0, len(hosts), batch_size):
+        batch = hosts[i:i + batch_size]
+        nm = nmap.PortScanner()
+        nm.scan(hosts=' '.join(batch), arguments=f'-sT -T4 -Pn -p {port_list}')
+        invocations += 1
+        for ip in batch:
+            tcp = nm[ip].get('tcp', {}) if ip in nm.all_hosts() else {}
+            open_counts[ip] = sum(1 for info in tcp.values() if info['state'] == 'open')
+    return open_counts, invocations, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark: backend tcp asyncio vs. nmap -sT')
+    parser.add_argument('--hosts', type=int, default=32, help='Direcciones 127.0.0.X a escanear')
+    parser.add_argument('--ports', type=int, default=100, help='Puertos escaneados por host')
+    parser.add_argument('--open', type=int, default=10, help='Puertos a la escucha por host')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--concurrency', type=int, default=256)
+    parser.add_argument('--timeout', type=float, default=1.0)
+    args = parser.parse_args()
+    configure_logging(quiet=True)
+
+    hosts = loopback_hosts(args.hosts)
+    listeners = LoopbackListeners(hosts, args.open)
+    try:
+        ports = sorted(listeners.ports + closed_ports(args.ports - args.open, listeners.ports))
+        expected = min(args.open, 10)  # scan_ports se queda con 10 puertos como mucho
+
+        print(f"📊 {len(hosts)} hosts x {len(ports)} puertos ({args.open} abiertos por host)")
+        print(f"{'modo':<34} {'procesos':>9} {'tiempo (s)':>11} {'ok':>4}")
+
+        cases = [
+            ('tcp, por host, 1 worker', 1, 1),
+            (f'tcp, por host, {args.workers} workers', args.workers, 1),
+            (f'tcp, un lote de {len(hosts)}', 1, len(hosts)),
+        ]
+        for name, workers, batch_size in cases:
+            results, elapsed = run_tcp(hosts, ports, workers, batch_size, args.concurrency, args.timeout)
+            ok = all(len(h['ports']) == expected for h in results)
+            print(f"{name:<34} {0:>9} {elapsed:>11.2f} {'✅' if ok else '❌':>4}")
+
+        if shutil.which('nmap') is None:
+            print("⚠️  nmap no está instalado: se omite la comparación con nmap -sT")
+            return
+
+        for name, batch_size in (('nmap -sT, por host', 1), (f'nmap -sT, un lote de {len(hosts)}', len(hosts))):
+            open_counts, invocations, elapsed = run_nmap(hosts, ports, batch_size)
+            ok = all(open_counts.get(ip) == args.open for ip in hosts)
+            print(f"{name:<34} {invocations:>9} {elapsed:>11.2f} {'✅' if ok else '❌':>4}")
+    finally:
+        listeners.close()
+
+
+if __name__ == '__main__':
+    main()
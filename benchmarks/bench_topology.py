@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Descubrimiento de topología contra una red simulada de varios routers y subredes"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import networkx as nx
+
+from instrumentation import configure_logging
+from topology import SimulatedTraceroute, TopologyDiscovery
+
+
+def build_topology(sites, subnets_per_site, hosts_per_subnet):
+    """scanner -> gateway 10.0.0.1 -> core -> router de sede -> router de subred -> hosts"""
+    topology = nx.Graph()
+    topology.add_edge('scanner', '10.0.0.1')
+    topology.add_edge('10.0.0.1', '10.255.0.1')
+    hosts = []
+    for site in range(sites):
+        site_router = f"10.255.{site + 1}.1"
+        topology.add_edge('10.255.0.1', site_router)
+        for subnet in range(subnets_per_site):
+            subnet_router = f"10.{site + 1}.{subnet}.1"
+            topology.add_edge(site_router, subnet_router)
+            for host in range(2, hosts_per_subnet + 2):
+                ip = f"10.{site + 1}.{subnet}.{host}"
+                topology.add_edge(subnet_router, ip)
+                hosts.append({'ip': ip})
+    return topology, hosts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark: traceroute deduplicado por subred')
+    parser.add_argument('--sites', type=int, default=8)
+    parser.add_argument('--subnets', type=int, default=16)
+    parser.add_argument('--hosts', type=int, default=50, help='Hosts por subred')
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+    configure_logging(quiet=True)
+
+    topology, hosts = build_topology(args.sites, args.subnets, args.hosts)
+    probe = SimulatedTraceroute(topology, 'scanner', silent_hops={'10.255.0.1'})
+    graph = nx.Graph()
+    for host in hosts:
+        graph.add_node(host['ip'], **host)
+
+    discovery = TopologyDiscovery(graph, probe, workers=args.workers)
+    start = time.perf_counter()
+    discovery.discover(hosts)
+    elapsed = time.perf_counter() - start
+
+    # Con el core silencioso, sus dos enlaces se ven como uno solo de 2 saltos
+    expected = topology.copy()
+    expected.remove_node('scanner')
+    expected.remove_node('10.255.0.1')
+    missing = [(u, v) for u, v in expected.edges() if not graph.has_edge(u, v) and '10.0.0.1' not in (u, v)]
+
+    naive_probes = sum(len(nx.shortest_path(topology, 'scanner', h['ip'])) - 1 for h in hosts)
+    print(f"📊 {len(hosts)} hosts, {args.sites * args.subnets} subredes")
+    print(f"   traceroutes: {probe.traced_targets} (uno por host: {len(hosts)})")
+    print(f"   sondas:      {probe.probes} (uno por host: {naive_probes})")
+    print(f"   conexiones:  {graph.number_of_edges()}, enlaces no recuperados: {len(missing)}")
+    print(f"   tiempo:      {elapsed:.2f} s")
+
+
+if __name__ == '__main__':
+    main()
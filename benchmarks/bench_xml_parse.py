@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Parseo del XML de nmap: python-nmap (árbol completo) vs. nmap_xml (un <host> cada vez)
+
+Cada caso es una única invocación con todos los hosts, como un -sn de una
+/16 o un escaneo de puertos por lotes grandes. Se mide el tiempo, la
+memoria pico (tracemalloc) y la que sigue ocupada al terminar: python-nmap
+guarda la salida y el resultado en el PortScanner hasta el siguiente escaneo.
+"""
+import argparse
+import gc
+import io
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import nmap
+
+from instrumentation import configure_logging
+from nmap_xml import HostStream
+from simulated_network import SimulatedNetwork
+
+
+def python_nmap(xml):
+    # Lo que hacía sweep_block: analyse_nmap_xml_scan y copiar cada host a un dict
+    nm = nmap.PortScanner.__new__(nmap.PortScanner)
+    nm._nmap_last_output = xml
+    nm.analyse_nmap_xml_scan(xml)
+    hosts = []
+    for host in nm.all_hosts():
+        addresses = nm[host].get('addresses', {})
+        mac = addresses.get('mac', 'Unknown')
+        hosts.append({'ip': host, 'mac': mac, 'vendor': nm[host].get('vendor', {}).get(mac, 'Unknown'),
+                      'hostname': nm[host].hostname() or host,
+                      'ports': [{'port': port, 'protocol': proto, 'service': info.get('name', 'unknown')}
+                                for proto in nm[host].all_protocols() for port, info in nm[host][proto].items()]})
+    return hosts, nm
+
+
+def streaming(xml):
+    return list(HostStream(io.BytesIO(xml))), None
+
+
+def measure(parse, xml):
+    """(segundos, MB pico, MB que siguen ocupados mientras se conserva el resultado)"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = parse(xml)
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, peak / 2**20, retained / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark: parseo del XML de nmap')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 65536])
+    parser.add_argument('--ports', type=int, default=10, help='Puertos abiertos por host en el escaneo de puertos')
+    args = parser.parse_args()
+    configure_logging(quiet=True)
+
+    print(f"{'hosts':>7} {'escaneo':<8} {'XML (MB)':>9} {'parser':<11} {'tiempo (s)':>10} "
+          f"{'pico (MB)':>10} {'retenido (MB)':>14}")
+    for size in args.sizes:
+        network = SimulatedNetwork(size, args.ports)
+        ips = list(network.hosts)
+        cases = [('-sn', network.sweep_xml(network.network_range, ips)),
+                 ('puertos', network.port_scan_xml(ips))]
+        del network
+        for scan, xml in cases:
+            # python-nmap recibe la salida decodificada; nmap_xml lee los bytes de la tubería
+            for name, parse, data in (('python-nmap', python_nmap, xml), ('streaming', streaming, xml.encode())):
+                elapsed, peak, retained = measure(parse, data)
+                print(f"{size:>7} {scan:<8} {len(xml) / 2**20:>9.1f} {name:<11} {elapsed:>10.2f} "
+                      f"{peak:>10.1f} {retained:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
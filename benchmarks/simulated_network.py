@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Red sintética que responde con XML de nmap real, parseado en streaming por nmap_xml
+
+SimulatedNetwork genera el XML de cada barrido -sn (por /24) y de cada
+escaneo -sT -F -O antes de medir nada; SimulatedPortScanner es un
+NmapStreamScanner sin binario que lee ese XML en lugar de la salida de
+nmap, así el parseo medido es el mismo que con nmap de verdad.
+"""
+import io
+import ipaddress
+import random
+from xml.sax.saxutils import quoteattr
+
+from nmap_xml import NmapStreamScanner
+
+SERVICES = [(22, 'ssh', 'OpenSSH', '8.9p1'), (80, 'http', 'nginx', '1.24.0'), (443, 'https', 'nginx', '1.24.0'),
+            (445, 'microsoft-ds', '', ''), (3389, 'ms-wbt-server', '', ''), (8080, 'http-proxy', '', ''),
+            (53, 'domain', 'dnsmasq', '2.89'), (139, 'netbios-ssn', '', ''), (631, 'ipp', 'CUPS', '2.4'),
+            (9100, 'jetdirect', '', ''), (3306, 'mysql', 'MySQL', '8.0.36'), (5432, 'postgresql', '', '')]
+HOSTNAMES = ['router', 'fileserver', 'switch-core', 'laptop', 'printer', 'phone']
+VENDORS = ['Cisco Systems', 'Dell', 'Hewlett Packard', 'Apple', 'Raspberry Pi Trading', 'Ubiquiti']
+OS_MATCHES = [('Linux 5.0 - 5.14', 96), ('Microsoft Windows 10', 93), ('Cisco IOS 15', 98)]
+
+_HEADER = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+           '<nmaprun scanner="nmap" args={args} start="0" version="7.94" xmloutputversion="1.05">\n')
+_FOOTER = ('<runstats><finished time="0" timestr="simulated" elapsed="0.00" exit="success"/>'
+           '<hosts up="{up}" down="{down}" total="{total}"/></runstats>\n</nmaprun>\n')
+
+
+def _services(rng, count):
+    if count <= len(SERVICES):
+        return sorted(rng.sample(SERVICES, count))
+    # Más puertos que servicios conocidos: el resto como 'unknown'
+    return SERVICES + [(10000 + n, 'unknown', '', '') for n in range(count - len(SERVICES))]
+
+
+class SimulatedNetwork:
+    """`size` hosts activos desde 10.0.0.1, cada uno con `ports` puertos abiertos
+
+    network_range es el CIDR más pequeño que los contiene; los bloques /24
+    sin hosts devuelven un barrido vacío, como en una red real.
+    """
+
+    def __init__(self, size, ports=3, seed=0, block_prefix=24):
+        rng = random.Random(seed)
+        first = ipaddress.ip_address('10.0.0.0')
+        self.size = size
+        self.ports = ports
+        self.network_range = f"10.0.0.0/{32 - size.bit_length()}"
+        self.hosts = {}
+        for i in range(1, size + 1):
+            ip = str(first + i)
+            name = 'router' if i == 1 else f"{rng.choice(HOSTNAMES)}-{i}"
+            self.hosts[ip] = {
+                'name': name,
+                'mac': f"00:11:22:{i >> 16 & 255:02X}:{i >> 8 & 255:02X}:{i & 255:02X}",
+                'vendor': rng.choice(VENDORS),
+                'srtt': rng.randint(200, 5000),
+                'services': _services(rng, ports),
+                'os': rng.choice(OS_MATCHES),
+            }
+
+        network = ipaddress.ip_network(self.network_range)
+        blocks = ([network] if network.prefixlen >= block_prefix
+                  else list(network.subnets(new_prefix=block_prefix)))
+        self.blocks = {}
+        self.sweeps = {}
+        self.port_scans = {}
+        for block in blocks:
+            ips = [ip for ip in map(str, block) if ip in self.hosts]
+            self.blocks[str(block)] = ips
+            self.sweeps[str(block)] = self.sweep_xml(str(block), ips)
+            if ips:
+                self.port_scans[' '.join(ips)] = self.port_scan_xml(ips)
+
+    def _run(self, args, hosts_xml, up, total):
+        return (_HEADER.format(args=quoteattr(args)) + ''.join(hosts_xml)
+                + _FOOTER.format(up=up, down=total - up, total=total))
+
+    def sweep_xml(self, block, ips):
+        hosts_xml = []
+        for ip in ips:
+            host = self.hosts[ip]
+            hosts_xml.append(
+                f'<host><status state="up" reason="arp-response"/>'
+                f'<address addr="{ip}" addrtype="ipv4"/>'
+                f'<address addr="{host["mac"]}" addrtype="mac" vendor={quoteattr(host["vendor"])}/>'
+                f'<hostnames><hostname name="{host["name"]}" type="PTR"/></hostnames>'
+                f'<times srtt="{host["srtt"]}" rttvar="{host["srtt"] // 2}" to="100000"/></host>\n')
+        total = ipaddress.ip_network(block).num_addresses
+        return self._run(f'nmap -sn -T4 {block}', hosts_xml, len(ips), total)
+
+    def port_scan_xml(self, ips):
+        hosts_xml = []
+        for ip in ips:
+            host = self.hosts[ip]
+            ports_xml = ''.join(
+                f'<port protocol="tcp" portid="{port}"><state state="open" reason="syn-ack"/>'
+                f'<service name="{name}"' + (f' product="{product}" version="{version}"' if product else '')
+                + ' method="probed" conf="10"/></port>'
+                for port, name, product, version in host['services'])
+            os_name, accuracy = host['os']
+            hosts_xml.append(
+                f'<host><status state="up" reason="syn-ack"/>'
+                f'<address addr="{ip}" addrtype="ipv4"/>'
+                f'<hostnames><hostname name="{host["name"]}" type="PTR"/></hostnames>'
+                f'<ports>{ports_xml}</ports>'
+                f'<os><osmatch name="{os_name}" accuracy="{accuracy}" line="1">'
+                f'<osclass type="general purpose" vendor="Simulated" osfamily="{os_name.split()[0]}" '
+                f'accuracy="{accuracy}"/></osmatch></os></host>\n')
+        return self._run(f'nmap -sT -T4 -F -O {" ".join(ips)}', hosts_xml, len(ips), len(ips))
+
+
+class SimulatedPortScanner(NmapStreamScanner):
+    """NmapStreamScanner que no ejecuta nmap: lee el XML pregenerado de la red"""
+
+    def __init__(self, network):
+        super().__init__()
+        self.network = network
+
+    def _open(self, hosts, arguments):
+        if '-sn' in arguments:
+            xml = self.network.sweeps.get(hosts)
+            if xml is None:
+                xml = self.network.sweep_xml(hosts, self.network.blocks.get(hosts, []))
+        else:
+            xml = self.network.port_scans.get(hosts)
+            if xml is None:
+                ips = [ip for ip in hosts.split() if ip in self.network.hosts]
+                xml = self.network.port_scan_xml(ips)
+        return io.BytesIO(xml.encode())
+
+    def _close(self, finished):
+        return ''
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Diagramas agrupados por subred, fabricante o tipo de dispositivo para redes muy grandes"""
+import ipaddress
+import os
+import re
+from collections import Counter
+
+import networkx as nx
+
+from diagram_style import ROLE_STYLES, device_role
+from instrumentation import logger
+from svg_writer import write_cluster_svg, write_network_svg
+
+CLUSTER_MODES = {'subnet': 'subred', 'vendor': 'fabricante', 'role': 'tipo de dispositivo'}
+ROLE_NAMES = {'router': 'routers', 'server': 'servidores', 'switch': 'switches', 'host': 'equipos'}
+# Con más hosts, el detalle de un clúster solo etiqueta routers, servidores y switches
+DETAIL_MAX_LABELS = 300
+
+
+def cluster_key(node, host_data, mode, prefix=24):
+    """Clúster al que pertenece un host según el modo de agrupación"""
+    if mode == 'subnet':
+        try:
+            return str(ipaddress.ip_network(f"{node}/{prefix}", strict=False))
+        except ValueError:
+            return 'otros'
+    if mode == 'vendor':
+        return host_data.get('vendor') or 'Unknown'
+    return device_role(host_data)
+
+
+def cluster_slug(cluster):
+    """Nombre de clúster apto para un archivo: 10.0.1.0/24 -> 10_0_1_0_24"""
+    return re.sub(r'[^0-9a-z]+', '_', cluster.lower()).strip('_') or 'cluster'
+
+
+class ClusteredDiagram:
+    """Vista general con un nodo por clúster y un SVG de detalle por clúster bajo demanda
+
+    La vista general tiene tantos nodos como clústeres, así que su tamaño y
+    su tiempo de render no crecen con el número de hosts. Cada nodo enlaza
+    a <salida>_cluster_<nombre>.svg, que solo se genera al pedirlo con
+    detail()/details() (run.py --cluster-detail, desde el snapshot *_graph.json).
+    """
+
+    def __init__(self, graph, mode='subnet', output_file='network_diagram.svg', prefix=24, scan_ports=False):
+        if mode not in CLUSTER_MODES:
+            raise ValueError(f"Agrupación desconocida: {mode} (opciones: {', '.join(CLUSTER_MODES)})")
+        self.graph = graph
+        self.mode = mode
+        self.output_file = output_file
+        self.scan_ports = scan_ports
+        self.members = {}
+        for node, host_data in graph.nodes(data=True):
+            self.members.setdefault(cluster_key(node, host_data, mode, prefix), []).append(node)
+
+        # "Apple, Inc." y "Apple Inc" darían el mismo archivo: el segundo (en orden
+        # alfabético, estable entre ejecuciones) lleva un sufijo numérico
+        self.slugs = {}
+        used = set()
+        for cluster in sorted(self.members):
+            base = slug = cluster_slug(cluster)
+            suffix = 1
+            while slug in used:
+                suffix += 1
+                slug = f"{base}_{suffix}"
+            used.add(slug)
+            self.slugs[cluster] = slug
+
+    def detail_file(self, cluster):
+        return self.output_file.replace('.svg', f'_cluster_{self.slugs[cluster]}.svg')
+
+    def cluster_graph(self):
+        """Un nodo por clúster con recuentos por tipo; las aristas llevan cuántas conexiones agrupan"""
+        cluster_of = {}
+        clusters = nx.Graph()
+        for cluster, nodes in self.members.items():
+            roles = Counter(device_role(self.graph.nodes[node]) for node in nodes)
+            summary = ', '.join(f"{roles[role]} {ROLE_NAMES[role]}" for role in ROLE_STYLES if roles[role])
+            clusters.add_node(cluster, count=len(nodes), roles=dict(roles),
+                              label=f"{cluster}\n{len(nodes)} hosts\n{summary}",
+                              detail=os.path.basename(self.detail_file(cluster)))
+            cluster_of.update((node, cluster) for node in nodes)
+
+        # Las conexiones dentro de un mismo clúster solo se ven en su detalle
+        for u, v in self.graph.edges():
+            cu, cv = cluster_of[u], cluster_of[v]
+            if cu == cv:
+                continue
+            if clusters.has_edge(cu, cv):
+                clusters[cu][cv]['links'] += 1
+            else:
+                clusters.add_edge(cu, cv, links=1)
+        return clusters
+
+    def overview_title(self, network_range, clusters):
+        return (f"Mapa de Red - {network_range}\n"
+                f"{self.graph.number_of_nodes()} dispositivos en {clusters.number_of_nodes()} "
+                f"clústeres por {CLUSTER_MODES[self.mode]}")
+
+    def write_overview(self, clusters, pos, network_range):
+        write_cluster_svg(clusters, pos, self.output_file, self.overview_title(network_range, clusters))
+        return self.output_file
+
+    def resolve(self, name):
+        """Clúster por nombre ('10.0.1.0/24', 'Cisco Systems') o por el sufijo de su archivo"""
+        if name in self.members:
+            return name
+        by_slug = {slug: cluster for cluster, slug in self.slugs.items()}
+        return by_slug.get(name.lower()) or by_slug.get(cluster_slug(name))
+
+    def detail(self, cluster, layout='auto'):
+        """Genera el SVG de un clúster con todos sus hosts y las conexiones entre ellos"""
+        from layouts import compute_layout
+
+        subgraph = self.graph.subgraph(self.members[cluster])
+        pos = compute_layout(subgraph, layout)
+        title = (f"{cluster} ({CLUSTER_MODES[self.mode]})\n"
+                 f"{subgraph.number_of_nodes()} dispositivos | {subgraph.number_of_edges()} conexiones")
+        output_file = self.detail_file(cluster)
+        write_network_svg(subgraph, pos, output_file, title, self.scan_ports, max_labels=DETAIL_MAX_LABELS)
+        logger.info(f"🔍 Detalle de {cluster} guardado como: {output_file}")
+        return output_file
+
+    def details(self, names, layout='auto'):
+        """detail() de cada clúster pedido ('all' = todos); avisa de los que no existen"""
+        if 'all' in names:
+            names = list(self.members)
+        written = []
+        for name in names:
+            cluster = self.resolve(name)
+            if cluster is None:
+                sample = ', '.join(sorted(self.members)[:5]) + ('...' if len(self.members) > 5 else '')
+                logger.warning(f"⚠️  Clúster desconocido: {name} (hay {len(self.members)}: {sample})")
+                continue
+            written.append(self.detail(cluster, layout))
+        return written
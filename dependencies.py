@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Comprobación de dependencias sin importarlas y sonda única del binario de nmap"""
+import importlib.util
+import threading
+
+# Módulo -> paquete de pip
+REQUIRED = {'nmap': 'python-nmap', 'networkx': 'networkx', 'numpy': 'numpy'}
+OPTIONAL = {'matplotlib': 'matplotlib', 'pyarrow': 'pyarrow'}
+
+
+def missing_dependencies(extra=()):
+    """Paquetes de pip que faltan, sin importar nada (importlib.util.find_spec)
+
+    extra: módulos opcionales que la ejecución actual sí necesita (p. ej. matplotlib).
+    """
+    packages = dict(REQUIRED)
+    packages.update((module, OPTIONAL.get(module, module)) for module in extra)
+    return [package for module, package in packages.items() if importlib.util.find_spec(module) is None]
+
+
+_probe_lock = threading.Lock()
+_probe = None
+
+
+def port_scanner():
+    """Escáner de nmap en streaming (nmap_xml.NmapStreamScanner) que solo busca nmap la primera vez
+
+    La primera llamada de cada proceso localiza el binario con nmap.PortScanner()
+    (que ejecuta `nmap -V`); las siguientes reutilizan la ruta. Si nmap no está
+    instalado se repite el mismo PortScannerError sin volver a buscarlo.
+    """
+    global _probe
+    import nmap
+    from nmap_xml import NmapStreamScanner
+
+    with _probe_lock:
+        if _probe is None:
+            try:
+                _probe = nmap.PortScanner()._nmap_path
+            except nmap.PortScannerError as e:
+                _probe = e
+    if isinstance(_probe, Exception):
+        raise _probe
+    return NmapStreamScanner(_probe)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Reglas de color, tamaño y etiquetas compartidas por todos los renderizadores"""
+
+
+# Color y tamaño (área en puntos², como en matplotlib) de cada tipo de dispositivo
+ROLE_STYLES = {
+    'router': ('red', 1500),
+    'server': ('orange', 1300),
+    'switch': ('green', 1200),
+    'host': ('lightblue', 1000),
+}
+
+
+def device_role(host_data):
+    """Tipo de dispositivo según el hostname: router, server, switch o host"""
+    hostname_lower = host_data.get('hostname', '').lower()
+
+    is_router = host_data.get('device_type') == 'router'
+    if is_router or 'router' in hostname_lower or 'gateway' in hostname_lower:
+        return 'router'
+    elif 'server' in hostname_lower:
+        return 'server'
+    elif 'switch' in hostname_lower or 'ap' in hostname_lower:
+        return 'switch'
+    else:
+        return 'host'
+
+
+def node_style(host_data):
+    """Color y tamaño según el tipo de dispositivo"""
+    return ROLE_STYLES[device_role(host_data)]
+
+
+def node_label(node, host_data, scan_ports):
+    """Etiqueta con toda la información del host"""
+    label = f"{host_data.get('hostname', node)}\n"
+    label += f"IP: {node}\n"
+
+    if host_data.get('mac', 'Unknown') != 'Unknown':
+        label += f"MAC: {host_data['mac'][:8]}...\n"
+
+    if scan_ports and host_data.get('os', 'Unknown') != 'Unknown':
+        label += f"OS: {host_data['os']}\n"
+
+    if scan_ports and host_data.get('ports'):
+        ports_text = ", ".join([str(p['port']) for p in host_data['ports'][:5]])
+        if len(host_data['ports']) > 5:
+            ports_text += f"... (+{len(host_data['ports'])-5})"
+        label += f"Puertos: {ports_text}"
+
+    return label
+
+
+def edge_label(edge_data):
+    return edge_data.get('connection', 'direct')
+
+
+def diagram_title(network_range, host_count, connection_count, scan_ports):
+    title = f"Mapa de Red - {network_range}\n"
+    title += f"{host_count} dispositivos | {connection_count} conexiones"
+    if scan_ports:
+        title += " | Con escaneo de puertos y OS"
+    return title
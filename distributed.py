@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+import ipaddress
+import json
+import multiprocessing
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+
+from host_store import to_plain
+from instrumentation import configure_logging, logger
+
+
+def parse_address(address, default_host='127.0.0.1'):
+    """'host:puerto' o 'puerto' -> (host, puerto)"""
+    host, _, port = str(address).rpartition(':')
+    return host or default_host, int(port)
+
+
+class _WorkerHandler(socketserver.StreamRequestHandler):
+    """Conexión de un worker: pide bloques, envía hosts y avisa al terminar cada bloque"""
+
+    def _send(self, record):
+        self.wfile.write((json.dumps(record) + '\n').encode('utf-8'))
+
+    def handle(self):
+        coordinator = self.server.coordinator
+        block = None
+        worker = f"{self.client_address[0]}:{self.client_address[1]}"
+        with coordinator.lock:
+            coordinator.active_workers += 1
+        try:
+            for line in self.rfile:
+                record = json.loads(line)
+                kind = record.pop('type')
+                if kind == 'ready':
+                    worker = record.get('worker', worker)
+                    block = coordinator.next_block()
+                    if block is None:
+                        self._send({'type': 'stop'})
+                        return
+                    if block == 'wait':
+                        block = None
+                        self._send({'type': 'wait'})
+                    else:
+                        self._send({'type': 'block', 'cidr': block})
+                elif kind == 'host':
+                    coordinator.results.put(('host', record))
+                elif kind == 'done':
+                    coordinator.block_done(block, worker)
+                    block = None
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️  Worker {worker} desconectado: {e}")
+        finally:
+            # Un bloque a medias vuelve a la cola para otro worker
+            if block is not None:
+                coordinator.block_failed(block, worker)
+            with coordinator.lock:
+                coordinator.active_workers -= 1
+
+
+class Coordinator:
+    """Reparte bloques de los CIDR objetivo entre workers y fusiona lo que devuelven
+
+    Los workers (run_worker) se conectan por TCP y hablan JSON Lines: piden un
+    bloque, lo barren y escanean con su propio NetworkMapper, y envían cada
+    host en cuanto está listo. iter_hosts() los añade al network_graph del
+    mapper local y los entrega como iter_discover_network, de modo que el
+    resto del flujo (exportadores, topología, diagrama) no cambia; los
+    workers escanean sin caché de escaneos. Si pasan worker_timeout segundos
+    sin ningún worker conectado y quedan bloques, iter_hosts() se rinde.
+    El protocolo no tiene autenticación ni cifrado: cualquiera que llegue al
+    puerto puede pedir bloques y enviar hosts que acaban en el diagrama, así
+    que fuera de 127.0.0.1 solo debe escuchar en una red de confianza.
+    """
+
+    def __init__(self, mapper, targets, block_prefix=24, address=('127.0.0.1', 0), worker_timeout=300):
+        self.mapper = mapper
+        self.worker_timeout = worker_timeout
+        self.blocks = deque(block for target in targets
+                            for block in mapper.split_network(target, block_prefix))
+        self.total_blocks = len(self.blocks)
+        self.in_progress = set()
+        self.completed = 0
+        self.active_workers = 0
+        self.local_processes = []
+        self.lock = threading.Lock()
+        self.results = queue.Queue()
+
+        self.server = socketserver.ThreadingTCPServer(address, _WorkerHandler)
+        self.server.daemon_threads = True
+        self.server.coordinator = self
+        self.address = self.server.server_address
+
+    def is_loopback(self):
+        host = self.address[0]
+        if host == 'localhost':
+            return True
+        try:
+            return ipaddress.ip_address(host).is_loopback
+        except ValueError:
+            return False
+
+    def start(self):
+        if not self.is_loopback():
+            logger.warning(f"⚠️  El coordinador escucha en {self.address[0]}: acepta hosts de cualquier cliente "
+                           "que se conecte, sin autenticación; úsalo solo en una red de confianza")
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        logger.info(f"🛰️  Coordinador en {self.address[0]}:{self.address[1]}: {self.total_blocks} bloques por repartir")
+        return self
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def next_block(self):
+        """Siguiente bloque, 'wait' si solo quedan bloques en curso, o None si no queda nada"""
+        with self.lock:
+            if self.blocks:
+                block = self.blocks.popleft()
+                self.in_progress.add(block)
+                return block
+            return 'wait' if self.in_progress else None
+
+    def block_done(self, block, worker):
+        with self.lock:
+            self.in_progress.discard(block)
+            self.completed += 1
+            finished = not self.blocks and not self.in_progress
+        self.results.put(('block', (block, worker)))
+        if finished:
+            self.results.put(('finished', None))
+
+    def block_failed(self, block, worker):
+        with self.lock:
+            self.in_progress.discard(block)
+            self.blocks.appendleft(block)
+        logger.warning(f"⚠️  Bloque {block} de {worker} sin terminar: se reasigna")
+
+    def iter_hosts(self):
+        """Hosts de todos los workers, fusionados en el grafo local a medida que llegan"""
+        graph = self.mapper.network_graph
+        if not self.total_blocks:
+            return
+        seen = set()
+        idle_since = time.monotonic()
+        while True:
+            try:
+                kind, payload = self.results.get(timeout=5)
+            except queue.Empty:
+                with self.lock:
+                    active = self.active_workers
+                    pending = len(self.blocks) + len(self.in_progress)
+                if active:
+                    idle_since = time.monotonic()
+                    continue
+                # Con workers locales se sabe si ya no queda nadie para terminar el trabajo
+                if self.local_processes and not any(p.is_alive() for p in self.local_processes):
+                    logger.error(f"❌ Todos los workers locales han terminado con {pending} bloques pendientes")
+                    break
+                # Los remotos pueden tardar en conectarse, pero no indefinidamente
+                if time.monotonic() - idle_since > self.worker_timeout:
+                    logger.error(f"❌ Ningún worker conectado en {self.worker_timeout:.0f}s "
+                                 f"con {pending} bloques pendientes")
+                    break
+                continue
+            idle_since = time.monotonic()
+            if kind == 'finished':
+                break
+            if kind == 'block':
+                block, worker = payload
+                logger.info(f"🛰️  {block} completado por {worker} ({self.completed}/{self.total_blocks})")
+                continue
+            ip = payload['ip']
+            graph.add_node(ip, **payload)
+            # Un bloque reasignado puede repetir hosts: se actualizan, no se duplican
+            if ip not in seen:
+                seen.add(ip)
+                yield graph.nodes[ip]
+
+
+def run_worker(address, scan_ports=False, workers=8, rate=None, batch_size=1, block_prefix=24,
+               discovery_workers=4, port_backend='nmap', tcp_options=None,
+               mapper_factory=None, scanner_factory=None, name=None, quiet=False):
+    """Worker: barre (y escanea) los bloques que le asigna el coordinador y envía los hosts
+
+    mapper_factory y scanner_factory permiten sustituir nmap (p. ej. en benchmarks).
+    quiet deja solo avisos y errores (workers locales, que comparten terminal).
+    """
+    if quiet:
+        configure_logging(quiet=True)
+
+    from dependencies import port_scanner
+    from network_scanner import NetworkMapper
+    from scan_pipeline import ScanPipeline
+
+    mapper = mapper_factory() if mapper_factory else NetworkMapper()
+    if port_backend == 'tcp':
+        from tcp_scanner import AsyncTCPScanner
+        mapper.set_port_backend('tcp', AsyncTCPScanner(**(tcp_options or {})))
+    scanner_factory = scanner_factory or port_scanner
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+
+    with socket.create_connection(parse_address(address)) as sock:
+        rfile = sock.makefile('r', encoding='utf-8')
+        wfile = sock.makefile('w', encoding='utf-8')
+
+        def send(record):
+            wfile.write(json.dumps(record, default=to_plain) + '\n')
+            wfile.flush()
+
+        def send_host(host):
+            record = {'type': 'host'}
+            record.update(host.items())
+            send(record)
+
+        logger.info(f"🛰️  Worker {name} conectado a {address}")
+        while True:
+            send({'type': 'ready', 'worker': name})
+            line = rfile.readline()
+            if not line:
+                break
+            reply = json.loads(line)
+            if reply['type'] == 'stop':
+                break
+            if reply['type'] == 'wait':
+                time.sleep(1)
+                continue
+
+            cidr = reply['cidr']
+            discovered = mapper.iter_discover_network(cidr, block_prefix=block_prefix,
+                                                      workers=discovery_workers,
+                                                      scanner_factory=scanner_factory)
+            pipeline = ScanPipeline(mapper, workers=workers, rate=rate, batch_size=batch_size,
+                                    scanner_factory=scanner_factory)
+            pipeline.run(discovered, on_host=send_host, scan=scan_ports)
+            send({'type': 'done', 'cidr': cidr})
+            # El grafo del worker solo hace falta mientras dura el bloque
+            mapper.network_graph.clear()
+            mapper.host_rtts.clear()
+
+    logger.info(f"🛰️  Worker {name} terminado")
+
+
+def spawn_local_workers(coordinator, count, **options):
+    """Lanza `count` procesos worker en esta máquina (pruebas y redes pequeñas)
+
+    Conviene llamarla antes de Coordinator.start(): los workers esperan en el
+    backlog del socket hasta que el coordinador empieza a aceptar conexiones.
+    """
+    address = f"{coordinator.address[0]}:{coordinator.address[1]}"
+    processes = []
+    for _ in range(count):
+        process = multiprocessing.Process(target=run_worker, args=(address,), kwargs=options, daemon=True)
+        process.start()
+        processes.append(process)
+    coordinator.local_processes.extend(processes)
+    return processes
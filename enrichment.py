@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""Fabricante por prefijo OUI y DNS inverso en bloque, fuera de nmap
+
+Con --dns bulk nmap barre con -n (sin resolver nombres, mucho más rápido en
+redes grandes) y los nombres se resuelven aquí: en paralelo, por bloque, con
+una caché compartida entre hilos que también recuerda los fallos. El
+fabricante de las MAC que nmap no reconoce sale de un índice de prefijos OUI
+que se construye una vez a partir de nmap-mac-prefixes (u oui.txt del IEEE)
+y se consulta con mmap: cargarlo no lee el archivo y cada búsqueda es O(1).
+"""
+import mmap
+import os
+import re
+import shutil
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import logger, metrics
+
+OUI_MAGIC = b'OUI1'
+# magic, bits de la tabla, entradas, máscara de longitudes de prefijo presentes (en nibbles)
+_HEADER = struct.Struct('<4sIII')
+# clave (longitud << 40 | prefijo; 0 = hueco libre), desplazamiento del nombre
+_SLOT = struct.Struct('<QI')
+_HASH = 0x9E3779B97F4A7C15
+
+# nmap-mac-prefixes: "001122 Fabricante"; oui.txt del IEEE: "00-11-22   (hex)  Fabricante"
+_PREFIX_LINE = re.compile(r'^([0-9A-Fa-f]{2}(?:[-:]?[0-9A-Fa-f]{2}){2}[0-9A-Fa-f]{0,3})\s+'
+                          r'(?:\((?:hex|base 16)\)\s+)?(\S.*?)\s*$')
+
+NMAP_DATA_DIRS = ['/usr/share/nmap', '/usr/local/share/nmap', '/opt/homebrew/share/nmap', '/opt/local/share/nmap']
+
+
+def find_oui_source():
+    """nmap-mac-prefixes de la instalación de nmap, o None"""
+    candidates = list(NMAP_DATA_DIRS)
+    nmap_path = shutil.which('nmap')
+    if nmap_path:
+        candidates.insert(0, os.path.join(os.path.dirname(os.path.realpath(nmap_path)), '..', 'share', 'nmap'))
+    for directory in candidates:
+        path = os.path.join(directory, 'nmap-mac-prefixes')
+        if os.path.isfile(path):
+            return os.path.normpath(path)
+    return None
+
+
+def _slot_index(key, bits):
+    return ((key * _HASH) & 0xFFFFFFFFFFFFFFFF) >> (64 - bits)
+
+
+def build_oui_index(source, index_path):
+    """Convierte la lista de prefijos en una tabla hash de direccionamiento abierto en disco
+
+    Devuelve cuántos prefijos contiene. Se escribe en un temporal y se
+    renombra, así un proceso que ya tenga el índice mapeado no lo ve a medias.
+    """
+    prefixes = {}
+    with open(source, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            match = _PREFIX_LINE.match(line)
+            if match:
+                prefix = re.sub(r'[-:]', '', match.group(1)).upper()
+                prefixes[prefix] = match.group(2)
+
+    # Tabla al menos el doble de grande que las entradas: sondas lineales cortas
+    bits = max(4, (2 * len(prefixes)).bit_length())
+    slots = [(0, 0)] * (1 << bits)
+    names = bytearray()
+    offsets = {}
+    lengths = 0
+    for prefix, vendor in prefixes.items():
+        if vendor not in offsets:
+            encoded = vendor.encode('utf-8')[:255]
+            offsets[vendor] = len(names)
+            names += bytes([len(encoded)]) + encoded
+        key = len(prefix) << 40 | int(prefix, 16)
+        lengths |= 1 << len(prefix)
+        index = _slot_index(key, bits)
+        while slots[index][0]:
+            index = (index + 1) & ((1 << bits) - 1)
+        slots[index] = (key, offsets[vendor])
+
+    temp_path = f"{index_path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(_HEADER.pack(OUI_MAGIC, bits, len(prefixes), lengths))
+        for slot in slots:
+            f.write(_SLOT.pack(*slot))
+        f.write(names)
+    os.replace(temp_path, index_path)
+    return len(prefixes)
+
+
+class OUIIndex:
+    """Índice de prefijos OUI mapeado en memoria: fabricante de una MAC en O(1)
+
+    Las páginas del archivo solo se leen al consultarlas y las comparten
+    todos los procesos que lo mapean (p. ej. varios daemons en la misma máquina).
+    """
+
+    def __init__(self, index_path):
+        self.path = index_path
+        with open(index_path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.bits, self.count, lengths = _HEADER.unpack_from(self.data, 0)
+        if magic != OUI_MAGIC:
+            raise ValueError(f"{index_path} no es un índice OUI")
+        self.mask = (1 << self.bits) - 1
+        self.names_offset = _HEADER.size + (_SLOT.size << self.bits)
+        # Primero los prefijos más largos (MA-S, MA-M), que son más específicos
+        self.lengths = [length for length in range(12, 5, -1) if lengths & (1 << length)]
+
+    def _find(self, key):
+        index = _slot_index(key, self.bits)
+        while True:
+            slot_key, offset = _SLOT.unpack_from(self.data, _HEADER.size + index * _SLOT.size)
+            if slot_key == key:
+                start = self.names_offset + offset
+                return self.data[start + 1:start + 1 + self.data[start]].decode('utf-8')
+            if not slot_key:
+                return None
+            index = (index + 1) & self.mask
+
+    def lookup(self, mac):
+        """Fabricante de una MAC ('00:11:22:33:44:55', '00-11-22-...', '0011.2233...'), o None"""
+        digits = re.sub(r'[^0-9A-Fa-f]', '', mac or '').upper()
+        if len(digits) < 6:
+            return None
+        for length in self.lengths:
+            if len(digits) >= length:
+                vendor = self._find(length << 40 | int(digits[:length], 16))
+                if vendor is not None:
+                    return vendor
+        return None
+
+    def close(self):
+        self.data.close()
+
+
+_oui_lock = threading.Lock()
+_oui_indexes = {}
+
+
+def load_oui_index(source=None, index_path='network_oui.idx'):
+    """OUIIndex de `source` (por defecto el de nmap), compartido por todo el proceso
+
+    El índice se reconstruye solo si no existe o si la lista de prefijos es
+    más reciente; devuelve None si no hay lista de prefijos.
+    """
+    source = source or find_oui_source()
+    if source is None or not os.path.isfile(source):
+        logger.warning(f"⚠️  No se encontró la lista de prefijos OUI ({source or 'nmap-mac-prefixes'}); "
+                       "se usan solo los fabricantes de nmap")
+        return None
+
+    with _oui_lock:
+        index = _oui_indexes.get(index_path)
+        if index is None:
+            if not os.path.exists(index_path) or os.path.getmtime(index_path) < os.path.getmtime(source):
+                with metrics.timer('oui_build'):
+                    count = build_oui_index(source, index_path)
+                logger.info(f"🏷️  Índice OUI: {count} prefijos de {source} en {index_path}")
+            index = _oui_indexes[index_path] = OUIIndex(index_path)
+    return index
+
+
+def _gethostbyaddr(ip):
+    return socket.gethostbyaddr(ip)[0]
+
+
+class ReverseResolver:
+    """DNS inverso concurrente con caché compartida entre hilos, también de los fallos
+
+    resolve(ip) devuelve el nombre o lanza OSError (socket.herror, gaierror,
+    timeout) si no hay PTR; se puede sustituir por un resolvedor simulado
+    para usarlo sin red. Los nombres se guardan `ttl` segundos y los fallos
+    `negative_ttl`, así cada barrido del modo daemon no repite las consultas
+    que ya fallaron. Dos bloques que piden la misma IP a la vez comparten
+    la consulta en curso.
+    """
+
+    def __init__(self, resolve=None, workers=32, ttl=3600, negative_ttl=300):
+        self.resolve = resolve or _gethostbyaddr
+        self.workers = max(1, workers)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.lock = threading.Lock()
+        self.cache = {}    # ip -> (nombre o None, caduca)
+        self.pending = {}  # ip -> Future de la consulta en curso
+        self.pool = None
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, ip):
+        try:
+            name = self.resolve(ip) or None
+        except (OSError, UnicodeError):
+            name = None
+        expires = time.monotonic() + (self.ttl if name else self.negative_ttl)
+        with self.lock:
+            self.cache[ip] = (name, expires)
+            del self.pending[ip]
+        return name
+
+    def resolve_many(self, ips):
+        """Nombre de cada IP (None sin PTR); las que no están en caché se consultan en paralelo"""
+        names = {}
+        futures = {}
+        now = time.monotonic()
+        with self.lock:
+            if self.pool is None:
+                self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='dns')
+            for ip in ips:
+                cached = self.cache.get(ip)
+                if cached is not None and cached[1] > now:
+                    names[ip] = cached[0]
+                    self.hits += 1
+                    continue
+                future = self.pending.get(ip)
+                if future is None:
+                    future = self.pending[ip] = self.pool.submit(self._lookup, ip)
+                    self.misses += 1
+                futures[ip] = future
+        metrics.increment('dns_cache_hits', len(names))
+        metrics.increment('dns_lookups', len(futures))
+        for ip, future in futures.items():
+            names[ip] = future.result()
+        return names
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+
+class HostEnricher:
+    """Completa el fabricante (índice OUI) y el nombre (DNS inverso) de los hosts descubiertos
+
+    NetworkMapper lo aplica a cada bloque barrido, en el hilo del barrido,
+    antes de entregar sus hosts; solo rellena lo que nmap dejó sin valor.
+    """
+
+    def __init__(self, oui_index=None, resolver=None):
+        self.oui_index = oui_index
+        self.resolver = resolver
+
+    def enrich(self, hosts):
+        """Modifica los hosts (dicts de sweep_block) y devuelve cuántos campos se completaron"""
+        completed = 0
+        with metrics.timer('enrich'):
+            if self.oui_index is not None:
+                for host in hosts:
+                    if host['vendor'] == 'Unknown' and host['mac'] != 'Unknown':
+                        vendor = self.oui_index.lookup(host['mac'])
+                        if vendor is not None:
+                            host['vendor'] = vendor
+                            completed += 1
+
+            if self.resolver is not None:
+                unnamed = [host for host in hosts if host['hostname'] == host['ip']]
+                names = self.resolver.resolve_many([host['ip'] for host in unnamed])
+                for host in unnamed:
+                    if names.get(host['ip']):
+                        host['hostname'] = names[host['ip']]
+                        completed += 1
+        return completed
+
+    def close(self):
+        if self.resolver is not None:
+            self.resolver.close()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+import json
+import os
+from xml.sax.saxutils import escape, quoteattr
+
+from host_store import to_plain
+from instrumentation import logger
+
+
+class ServiceSummary:
+    """Resumen de servicios en una sola pasada: recuento y primeras IPs por servicio
+
+    Sustituye al dict de listas con todas las IPs de cada servicio: solo se
+    guardan `sample_size` IPs por servicio, el resto se cuenta.
+    """
+
+    def __init__(self, sample_size=3):
+        self.sample_size = sample_size
+        self.services = {}  # "puerto/servicio" -> [recuento, [primeras IPs]]
+
+    def add_host(self, host):
+        for port in host['ports']:
+            service_key = f"{port['port']}/{port['service']}"
+            entry = self.services.get(service_key)
+            if entry is None:
+                entry = self.services[service_key] = [0, []]
+            entry[0] += 1
+            if len(entry[1]) < self.sample_size:
+                entry[1].append(host['ip'])
+
+    def items(self):
+        """(servicio, número de hosts, primeras IPs) en orden de aparición"""
+        for service, (count, sample) in self.services.items():
+            yield service, count, sample
+
+
+class Exporter:
+    """Escribe hosts, puertos y conexiones en streaming, a medida que se producen
+
+    Cada formato sobrescribe lo que necesita; por defecto solo se acumula el
+    resumen de servicios.
+    """
+
+    extension = ''
+
+    def __init__(self, output_file):
+        self.output_file = output_file
+        self.summary = ServiceSummary()
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def open(self):
+        pass
+
+    def write_host(self, host):
+        self.summary.add_host(host)
+
+    def write_edge(self, source, target, edge_data):
+        pass
+
+    def close(self):
+        pass
+
+
+class JSONLinesExporter(Exporter):
+    """Un objeto JSON por línea: hosts (con sus puertos), conexiones y resumen de servicios"""
+
+    extension = '.jsonl'
+
+    def open(self):
+        self.f = open(self.output_file, 'w', encoding='utf-8')
+
+    def write_host(self, host):
+        super().write_host(host)
+        record = {'type': 'host'}
+        record.update(host.items())
+        self.f.write(json.dumps(record, default=to_plain) + '\n')
+
+    def write_edge(self, source, target, edge_data):
+        record = {'type': 'edge', 'source': source, 'target': target}
+        record.update(edge_data)
+        self.f.write(json.dumps(record, default=to_plain) + '\n')
+
+    def close(self):
+        for service, count, sample in self.summary.items():
+            record = {'type': 'service', 'service': service, 'hosts': count, 'sample': sample}
+            self.f.write(json.dumps(record) + '\n')
+        self.f.close()
+
+
+class GraphMLExporter(Exporter):
+    """GraphML escrito nodo a nodo; los puertos van como texto "22/tcp ssh; 80/tcp http" """
+
+    extension = '.graphml'
+
+    NODE_KEYS = ('ip', 'mac', 'vendor', 'hostname', 'os', 'ports', 'device_type')
+    EDGE_KEYS = (('connection', 'string'), ('weight', 'int'))
+
+    def open(self):
+        self.f = open(self.output_file, 'w', encoding='utf-8')
+        self.f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        self.f.write('<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n')
+        for key in self.NODE_KEYS:
+            self.f.write(f'  <key id="{key}" for="node" attr.name="{key}" attr.type="string"/>\n')
+        for key, attr_type in self.EDGE_KEYS:
+            self.f.write(f'  <key id="{key}" for="edge" attr.name="{key}" attr.type="{attr_type}"/>\n')
+        self.f.write('  <graph edgedefault="undirected">\n')
+
+    def write_host(self, host):
+        super().write_host(host)
+        self.f.write(f'    <node id={quoteattr(host["ip"])}>\n')
+        for key in self.NODE_KEYS:
+            value = host.get(key)
+            if value is None:
+                continue
+            if key == 'ports':
+                value = '; '.join(f"{p['port']}/{p['protocol']} {p['service']}" for p in value)
+            self.f.write(f'      <data key="{key}">{escape(str(value))}</data>\n')
+        self.f.write('    </node>\n')
+
+    def write_edge(self, source, target, edge_data):
+        self.f.write(f'    <edge source={quoteattr(source)} target={quoteattr(target)}>\n')
+        for key, _ in self.EDGE_KEYS:
+            if key in edge_data:
+                self.f.write(f'      <data key="{key}">{escape(str(edge_data[key]))}</data>\n')
+        self.f.write('    </edge>\n')
+
+    def close(self):
+        self.f.write('  </graph>\n</graphml>\n')
+        self.f.close()
+
+
+class ParquetExporter(Exporter):
+    """Tres tablas columnares (_hosts, _ports, _edges) escritas por grupos de filas
+
+    Requiere pyarrow (opcional): pip install pyarrow
+    """
+
+    extension = '.parquet'
+
+    def __init__(self, output_file, row_group_size=10000):
+        super().__init__(output_file)
+        self.row_group_size = row_group_size
+
+    def open(self):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("El formato parquet requiere pyarrow: pip install pyarrow") from None
+
+        self.pa = pa
+        self.pq = pq
+        base = self.output_file[:-len(self.extension)] if self.output_file.endswith(self.extension) else self.output_file
+        self.schemas = {
+            'hosts': pa.schema([(name, pa.string()) for name in
+                                ('ip', 'mac', 'vendor', 'hostname', 'os', 'device_type')]),
+            'ports': pa.schema([('ip', pa.string()), ('port', pa.int32()),
+                                ('protocol', pa.string()), ('service', pa.string())]),
+            'edges': pa.schema([('source', pa.string()), ('target', pa.string()),
+                                ('connection', pa.string()), ('weight', pa.int32())]),
+        }
+        self.writers = {table: pq.ParquetWriter(f"{base}_{table}.parquet", schema)
+                        for table, schema in self.schemas.items()}
+        self.buffers = {table: {name: [] for name in schema.names} for table, schema in self.schemas.items()}
+
+    def _append(self, table, row):
+        columns = self.buffers[table]
+        for name, values in columns.items():
+            values.append(row.get(name))
+        if len(next(iter(columns.values()))) >= self.row_group_size:
+            self._flush(table)
+
+    def _flush(self, table):
+        columns = self.buffers[table]
+        if columns and next(iter(columns.values())):
+            schema = self.schemas[table]
+            arrays = [self.pa.array(values, type=field.type) for values, field in zip(columns.values(), schema)]
+            batch = self.pa.record_batch(arrays, schema=schema)
+            self.writers[table].write_batch(batch)
+            for values in columns.values():
+                values.clear()
+
+    def write_host(self, host):
+        super().write_host(host)
+        self._append('hosts', host)
+        for port in host.get('ports', ()):
+            self._append('ports', {'ip': host['ip'], 'port': port['port'],
+                                   'protocol': port['protocol'], 'service': port['service']})
+
+    def write_edge(self, source, target, edge_data):
+        self._append('edges', {'source': source, 'target': target,
+                               'connection': edge_data.get('connection'), 'weight': edge_data.get('weight')})
+
+    def close(self):
+        for table, writer in self.writers.items():
+            self._flush(table)
+            writer.close()
+
+
+EXPORTERS = {
+    'jsonl': JSONLinesExporter,
+    'graphml': GraphMLExporter,
+    'parquet': ParquetExporter,
+}
+
+
+def open_exporters(formats, output_file):
+    """Crea y abre un exporter por formato junto al SVG (network_map.svg -> network_map.jsonl)
+
+    Si alguno no se puede abrir (p. ej. parquet sin pyarrow), los ya abiertos
+    se cierran y sus archivos, todavía vacíos, se eliminan antes de relanzar el error.
+    """
+    exporters = []
+    try:
+        for name in formats:
+            exporter_class = EXPORTERS[name]
+            exporter = exporter_class(output_file.replace('.svg', exporter_class.extension))
+            exporter.open()
+            logger.info(f"📤 Exportando {name}: {exporter.output_file}")
+            exporters.append(exporter)
+    except Exception:
+        for exporter in exporters:
+            exporter.close()
+            if os.path.exists(exporter.output_file):
+                os.remove(exporter.output_file)
+        raise
+    return exporters
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+import sys
+from collections.abc import Mapping, MutableMapping
+
+import networkx as nx
+
+# Puertos idénticos (mismo número, servicio y protocolo) se comparten entre hosts
+_PORT_CACHE = {}
+
+
+class PortRecord(Mapping):
+    """Puerto abierto inmutable con acceso tipo dict: p['port'], p['service'], p['protocol']"""
+
+    __slots__ = ('port', 'service', 'protocol')
+    _fields = ('port', 'service', 'protocol')
+
+    def __init__(self, port, service, protocol):
+        object.__setattr__(self, 'port', port)
+        object.__setattr__(self, 'service', sys.intern(service))
+        object.__setattr__(self, 'protocol', sys.intern(protocol))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PortRecord es inmutable")
+
+    def __getitem__(self, key):
+        if key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __hash__(self):
+        return hash((self.port, self.service, self.protocol))
+
+    def __reduce__(self):
+        return (port_record, (self.port, self.service, self.protocol))
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+def port_record(port, service, protocol):
+    """PortRecord compartido para (port, service, protocol)"""
+    key = (port, service, protocol)
+    record = _PORT_CACHE.get(key)
+    if record is None:
+        record = _PORT_CACHE[key] = PortRecord(port, service, protocol)
+    return record
+
+
+def intern_ports(ports):
+    """Convierte una lista de dicts de scan_ports en una tupla de PortRecord compartidos"""
+    if isinstance(ports, tuple) and all(type(p) is PortRecord for p in ports):
+        return ports
+    return tuple(port_record(p['port'], p['service'], p['protocol']) for p in ports)
+
+
+class HostRecord(MutableMapping):
+    """Host con __slots__ y acceso tipo dict, usado directamente como atributos del nodo
+
+    Sustituye al dict por host y a su copia en network_graph: los hosts de
+    SVGGenerator.hosts y los nodos del grafo son el mismo objeto. 'services'
+    es un alias de 'ports' (antes se guardaba la lista dos veces). Los campos
+    que no tienen slot van a un dict auxiliar que solo se crea si hace falta.
+    """
+
+    __slots__ = ('ip', 'mac', 'vendor', 'hostname', 'os', 'ports',
+                 'device_type', 'traceroute_only', '_extra')
+    _fields = ('ip', 'mac', 'vendor', 'hostname', 'os', 'ports', 'device_type', 'traceroute_only')
+    _interned = frozenset(('vendor', 'os', 'device_type'))
+
+    def __init__(self, *args, **fields):
+        self._extra = None
+        self.update(*args, **fields)
+
+    def __getitem__(self, key):
+        if key == 'services':
+            key = 'ports'
+        if key in self._fields:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key == 'services':
+            key = 'ports'
+        if key == 'ports':
+            value = intern_ports(value)
+        elif key in self._interned and isinstance(value, str):
+            value = sys.intern(value)
+
+        if key in self._fields:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self._fields:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        # 'services' no se enumera: es el mismo valor que 'ports'
+        for key in self._fields:
+            if hasattr(self, key):
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def copy(self):
+        return HostRecord(self)
+
+    def __reduce__(self):
+        return (HostRecord, (), dict(self.items()))
+
+    def __setstate__(self, state):
+        self.update(state)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class HostGraph(nx.Graph):
+    """Grafo cuyos atributos de nodo son HostRecord en vez de dicts"""
+
+    node_attr_dict_factory = HostRecord
+
+
+def to_plain(value):
+    """Convierte HostRecord/PortRecord a tipos JSON (default= de json.dump)"""
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Logger común y métricas por etapa (nmap, parseo de XML, escaneo por host, layout, render...)"""
+import json
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger('network_mapper')
+
+# Atributos propios de LogRecord: el resto son campos pasados con extra={...}
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JSONFormatter(logging.Formatter):
+    """Una línea JSON por mensaje, con los campos de extra={...} (stage, host, seconds...)"""
+
+    def format(self, record):
+        entry = {'time': round(record.created, 3), 'level': record.levelname.lower(),
+                 'msg': record.getMessage().strip()}
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRS)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(quiet=False, json_format=False, stream=None):
+    """Salida por consola: igual que los print de siempre, en JSON, o solo avisos y errores
+
+    Los mensajes por host y por bloque usan formato diferido (logger.info("%s", x)),
+    así con quiet no cuestan ni el formateo del texto.
+    """
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(JSONFormatter() if json_format else logging.Formatter('%(message)s'))
+    logger.handlers[:] = [handler]
+    logger.setLevel(logging.WARNING if quiet else logging.INFO)
+    logger.propagate = False
+
+
+configure_logging()
+
+
+class Histogram:
+    """Histograma acumulativo estilo Prometheus (segundos)"""
+
+    BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)  # El último es +Inf
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        for i, bound in enumerate(self.BUCKETS):
+            if value <= bound:
+                break
+        else:
+            i = len(self.BUCKETS)
+        self.counts[i] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """Límite superior del bucket que contiene el cuantil q"""
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.BUCKETS, self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'total': round(self.total, 6),
+            'mean': round(self.total / self.count, 6) if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+        }
+
+
+class Metrics:
+    """Tiempos por etapa, seguros entre hilos; se exportan como JSON o en formato Prometheus"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def increment(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def summary(self):
+        with self.lock:
+            return {
+                'stages': {stage: histogram.summary() for stage, histogram in sorted(self.histograms.items())},
+                'counters': dict(sorted(self.counters.items())),
+            }
+
+    def write_json(self, output_file):
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
+        logger.info(f"⏱️  Perfil guardado como: {output_file}")
+        return output_file
+
+    def write_prometheus(self, output_file):
+        """Formato de texto de Prometheus (p. ej. para el textfile collector de node_exporter)"""
+        lines = ['# HELP network_mapper_stage_seconds Duración de cada etapa de network mapper',
+                 '# TYPE network_mapper_stage_seconds histogram']
+        with self.lock:
+            for stage, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.BUCKETS + ('+Inf',), histogram.counts):
+                    cumulative += count
+                    lines.append(f'network_mapper_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'network_mapper_stage_seconds_sum{{stage="{stage}"}} {histogram.total:.6f}')
+                lines.append(f'network_mapper_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+            for name, value in sorted(self.counters.items()):
+                lines.append(f'# TYPE network_mapper_{name}_total counter')
+                lines.append(f'network_mapper_{name}_total {value}')
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        logger.info(f"⏱️  Métricas Prometheus guardadas como: {output_file}")
+        return output_file
+
+
+metrics = Metrics()
+
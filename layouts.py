@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+import ipaddress
+import json
+import math
+from collections import deque
+
+import networkx as nx
+import numpy as np
+
+from instrumentation import logger
+
+
+def node_sort_key(node):
+    """Ordena IPs numéricamente (10.0.0.2 antes que 10.0.0.10) para layouts deterministas"""
+    try:
+        return (0, int(ipaddress.ip_address(node)), '')
+    except ValueError:
+        return (1, 0, str(node))
+
+
+def _rescale(coords):
+    """Centra y escala las coordenadas a [-1, 1], como nx.rescale_layout"""
+    coords = coords - coords.mean(axis=0)
+    extent = np.abs(coords).max()
+    if extent > 0:
+        coords = coords / extent
+    return coords
+
+
+def _spanning_forest(graph):
+    """Árbol BFS desde el nodo de mayor grado de cada componente (el gateway en una estrella)
+
+    Devuelve (raíces, hijos, profundidad). Con varias componentes, las raíces
+    cuelgan de una raíz virtual None a profundidad 0.
+    """
+    nodes = sorted(graph.nodes(), key=node_sort_key)
+    children = {None: []}
+    depth = {None: 0}
+    seen = set()
+
+    components = sorted(nx.connected_components(graph), key=lambda c: (-len(c), min(map(node_sort_key, c))))
+    for component in components:
+        root = max(sorted(component, key=node_sort_key), key=graph.degree)
+        children[None].append(root)
+        depth[root] = 1
+        seen.add(root)
+        queue = deque([root])
+        while queue:
+            parent = queue.popleft()
+            children[parent] = []
+            for neighbor in sorted(graph.neighbors(parent), key=node_sort_key):
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    depth[neighbor] = depth[parent] + 1
+                    children[parent].append(neighbor)
+                    queue.append(neighbor)
+
+    assert len(seen) == len(nodes)
+    return children, depth
+
+
+def _leaf_counts(children):
+    """Número de hojas bajo cada nodo, en post-orden iterativo (sin límite de recursión)"""
+    counts = {}
+    stack = [(None, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            counts[node] = sum(counts[child] for child in children[node]) or 1
+        else:
+            stack.append((node, True))
+            stack.extend((child, False) for child in children[node])
+    return counts
+
+
+def _seed_order(children, initial_pos, key):
+    """Ordena los hermanos conocidos como en la ejecución anterior (según key(posición))
+
+    Los nuevos conservan su sitio en el orden por IP, entre los conocidos:
+    los conocidos ocupan los mismos huecos que antes, reordenados.
+    """
+    if not initial_pos:
+        return
+    for node, kids in children.items():
+        known = sorted((kid for kid in kids if kid in initial_pos), key=lambda kid: key(initial_pos[kid]))
+        if len(known) > 1:
+            seeded = iter(known)
+            children[node] = [next(seeded) if kid in initial_pos else kid for kid in kids]
+
+
+def radial_layout(graph, initial_pos=None, ring_capacity=60):
+    """Anillos concéntricos por número de saltos desde el gateway
+
+    Cada subárbol recibe un sector proporcional a sus hojas. Los padres con
+    muchos hijos hoja los reparten en varias bandas para que no se solapen.
+    Con initial_pos los hermanos conocidos conservan el orden angular de la
+    ejecución anterior, los nuevos ocupan su hueco del orden por IP y el
+    conjunto se gira hacia los ángulos anteriores.
+    """
+    children, depth = _spanning_forest(graph)
+    leaves = _leaf_counts(children)
+    single_root = len(children[None]) == 1
+
+    def previous_angle(xy):
+        return math.atan2(xy[1] - cy, xy[0] - cx) % (2 * math.pi)
+
+    if initial_pos:
+        # Ángulo alrededor del gateway anterior (el centro del layout si solo hay una raíz)
+        root = children[None][0]
+        cx, cy = initial_pos.get(root, (0.0, 0.0)) if single_root else (0.0, 0.0)
+        _seed_order(children, initial_pos, previous_angle)
+
+    pos = {}
+    stack = [(None, 0.0, 2 * math.pi, 0.0)]
+    while stack:
+        node, start, span, radius = stack.pop()
+        if node is not None:
+            angle = start + span / 2
+            pos[node] = (radius * math.cos(angle), radius * math.sin(angle))
+
+        kids = children[node]
+        bands = max(1, math.ceil(sum(1 for kid in kids if not children[kid]) / ring_capacity))
+        offset = start
+        leaf_index = 0
+        for kid in kids:
+            kid_span = span * leaves[kid] / leaves[node]
+            kid_depth = depth[kid] - (1 if single_root else 0)
+            kid_radius = float(kid_depth)
+            if not children[kid] and bands > 1:
+                kid_radius += 0.8 * (leaf_index % bands) / bands
+                leaf_index += 1
+            stack.append((kid, offset, kid_span, kid_radius))
+            offset += kid_span
+
+    if initial_pos:
+        # Girar el conjunto hacia los ángulos anteriores: los sectores encogen al
+        # entrar hosts nuevos y sin el giro todo el anillo rotaría hacia un lado
+        turns = [previous_angle(initial_pos[node]) - math.atan2(y, x)
+                 for node, (x, y) in pos.items() if node in initial_pos and (x or y)]
+        if turns:
+            rotation = math.atan2(sum(map(math.sin, turns)), sum(map(math.cos, turns)))
+            cos_r, sin_r = math.cos(rotation), math.sin(rotation)
+            pos = {node: (x * cos_r - y * sin_r, x * sin_r + y * cos_r) for node, (x, y) in pos.items()}
+
+    nodes = list(pos)
+    coords = _rescale(np.array([pos[node] for node in nodes], dtype=float))
+    return dict(zip(nodes, map(tuple, coords)))
+
+
+def tree_layout(graph, initial_pos=None):
+    """Layout jerárquico por niveles: el gateway arriba y cada padre centrado sobre sus hijos
+
+    Con initial_pos los hermanos conocidos conservan su orden de izquierda a
+    derecha y los nuevos ocupan su hueco del orden por IP.
+    """
+    children, depth = _spanning_forest(graph)
+    _seed_order(children, initial_pos, lambda xy: xy[0])
+
+    x = {}
+    next_leaf = 0
+    stack = [(None, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            kids = children[node]
+            if kids:
+                x[node] = (x[kids[0]] + x[kids[-1]]) / 2
+            else:
+                x[node] = float(next_leaf)
+                next_leaf += 1
+        else:
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(children[node]))
+
+    nodes = [node for node in x if node is not None]
+    if not nodes:
+        return {}
+    coords = np.array([(x[node], -depth[node]) for node in nodes], dtype=float)
+    # Escalar cada eje por separado: los árboles suelen ser muy anchos y poco profundos
+    coords -= coords.min(axis=0)
+    extent = coords.max(axis=0)
+    extent[extent == 0] = 1
+    coords = coords / extent * 2 - 1
+    return dict(zip(nodes, map(tuple, coords)))
+
+
+def force_layout(graph, initial_pos=None, iterations=50, grid_size=None, seed=42):
+    """Fruchterman-Reingold vectorizado con NumPy y repulsión aproximada por rejilla
+
+    Los nodos se agrupan en una rejilla G x G. Cada nodo se repele del centro
+    de masa de su celda y de las 8 vecinas, y las celdas lejanas se repelen
+    entre sí como un todo: O(n + G⁴) por iteración en vez de O(n²).
+    Con initial_pos (posiciones de la ejecución anterior) los nodos conocidos
+    conservan su sitio y el layout arranca "frío", con menos movimiento.
+    """
+    nodes = list(graph.nodes())
+    n = len(nodes)
+    if n == 0:
+        return {}
+    if n == 1:
+        return {nodes[0]: (0.0, 0.0)}
+
+    index = {node: i for i, node in enumerate(nodes)}
+    rng = np.random.default_rng(seed)
+    coords = rng.uniform(-1, 1, size=(n, 2))
+
+    temperature = 0.1
+    if initial_pos:
+        known = [i for i, node in enumerate(nodes) if node in initial_pos]
+        for i in known:
+            coords[i] = initial_pos[nodes[i]]
+        # Los nodos nuevos aparecen junto a un vecino ya colocado
+        for i, node in enumerate(nodes):
+            if node in initial_pos:
+                continue
+            placed = [index[nb] for nb in graph.neighbors(node) if nb in initial_pos]
+            if placed:
+                coords[i] = coords[placed[0]] + rng.normal(scale=0.02, size=2)
+        if len(known) > n / 2:
+            temperature = 0.02
+            iterations = max(10, iterations // 3)
+
+    edges = np.array([(index[u], index[v]) for u, v in graph.edges() if u != v], dtype=np.int64).reshape(-1, 2)
+    k2 = 4.0 / n  # Distancia ideal al cuadrado en el cuadrado [-1, 1]²
+    k = math.sqrt(k2)
+    grid = grid_size or max(2, min(32, int(math.sqrt(n) / 2)))
+    cooling = temperature / (iterations + 1)
+
+    # Pares de celdas vecinas (3x3): esas interacciones se calculan por nodo
+    cell_xy = np.stack(np.divmod(np.arange(grid * grid), grid), axis=1)
+    near = (np.abs(cell_xy[:, None, :] - cell_xy[None, :, :]) <= 1).all(axis=2)
+    offsets = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+
+    for _ in range(iterations):
+        displacement = np.zeros_like(coords)
+
+        # Masa y centro de masa por celda de la rejilla
+        low = coords.min(axis=0)
+        cell_size = (coords.max(axis=0) - low) / grid + 1e-9
+        cells = np.minimum(((coords - low) / cell_size).astype(np.int64), grid - 1)
+        cell_id = cells[:, 0] * grid + cells[:, 1]
+        mass = np.bincount(cell_id, minlength=grid * grid).astype(float)
+        sums = np.stack([np.bincount(cell_id, weights=coords[:, d], minlength=grid * grid) for d in (0, 1)], axis=1)
+        centroids = sums / np.maximum(mass, 1)[:, None]
+
+        # Campo lejano: celda contra celda, aplicado a todos los nodos de la celda
+        delta = centroids[:, None, :] - centroids[None, :, :]
+        weights = np.where(near, 0.0, mass[None, :] * k2 / np.maximum((delta ** 2).sum(axis=2), 1e-6))
+        displacement += (delta * weights[:, :, None]).sum(axis=1)[cell_id]
+
+        # Campo cercano: cada nodo contra el centro de masa de su celda (sin él) y las 8 vecinas
+        for dx, dy in offsets:
+            nx_, ny_ = cells[:, 0] + dx, cells[:, 1] + dy
+            valid = (nx_ >= 0) & (nx_ < grid) & (ny_ >= 0) & (ny_ < grid)
+            neighbor = np.where(valid, nx_ * grid + ny_, 0)
+            neighbor_mass = mass[neighbor] * valid
+            neighbor_sum = sums[neighbor]
+            if dx == 0 and dy == 0:
+                neighbor_mass = neighbor_mass - 1
+                neighbor_sum = neighbor_sum - coords
+            delta = coords - neighbor_sum / np.maximum(neighbor_mass, 1)[:, None]
+            dist2 = np.maximum((delta ** 2).sum(axis=1), 1e-6)
+            displacement += delta * (neighbor_mass * k2 / dist2)[:, None]
+
+        # Atracción a lo largo de las conexiones
+        if len(edges):
+            delta = coords[edges[:, 0]] - coords[edges[:, 1]]
+            dist = np.sqrt((delta ** 2).sum(axis=1))
+            pull = delta * (dist / k)[:, None]
+            np.subtract.at(displacement, edges[:, 0], pull)
+            np.add.at(displacement, edges[:, 1], pull)
+
+        # Limitar el desplazamiento a la temperatura actual
+        length = np.maximum(np.sqrt((displacement ** 2).sum(axis=1)), 1e-9)
+        coords += displacement * (np.minimum(length, temperature) / length)[:, None]
+        temperature -= cooling
+
+    coords = _rescale(coords)
+    return dict(zip(nodes, map(tuple, coords)))
+
+
+def spring_layout(graph, initial_pos=None):
+    """El layout original de networkx (O(n²) por iteración)"""
+    return nx.spring_layout(graph, k=2, iterations=100, pos=initial_pos or None)
+
+
+def auto_layout(graph, initial_pos=None):
+    """Radial para estrellas y árboles, fuerzas con rejilla para el resto"""
+    if graph.number_of_nodes() and nx.is_forest(graph):
+        return radial_layout(graph, initial_pos)
+    return force_layout(graph, initial_pos)
+
+
+LAYOUTS = {
+    'auto': auto_layout,
+    'radial': radial_layout,
+    'tree': tree_layout,
+    'force': force_layout,
+    'spring': spring_layout,
+}
+
+
+def load_positions(layout_file):
+    """Posiciones de la ejecución anterior, o {} si no hay"""
+    try:
+        with open(layout_file, encoding='utf-8') as f:
+            return {node: tuple(xy) for node, xy in json.load(f).items()}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_positions(pos, layout_file):
+    try:
+        with open(layout_file, 'w', encoding='utf-8') as f:
+            json.dump({node: [round(float(x), 5), round(float(y), 5)] for node, (x, y) in pos.items()}, f)
+    except OSError as e:
+        logger.warning(f"⚠️  No se pudo guardar el layout: {e}")
+
+
+def compute_layout(graph, layout='auto', layout_file=None):
+    """Calcula posiciones con el layout elegido, partiendo de las guardadas si existen"""
+    if layout not in LAYOUTS:
+        raise ValueError(f"Layout desconocido: {layout} (opciones: {', '.join(LAYOUTS)})")
+
+    initial_pos = load_positions(layout_file) if layout_file else {}
+    initial_pos = {node: xy for node, xy in initial_pos.items() if node in graph}
+    pos = LAYOUTS[layout](graph, initial_pos)
+
+    if layout_file:
+        save_positions(pos, layout_file)
+    return pos
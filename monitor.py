@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""Modo daemon: barridos -sn periódicos con el grafo en memoria y eventos de cambios en JSON Lines"""
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+import networkx as nx
+
+from instrumentation import logger, metrics
+from scan_diff import NetworkDiff, load_snapshot, ports_scanned
+from scan_pipeline import ScanPipeline
+
+EVENT_ICONS = {'host-up': '🟢', 'host-down': '🔴', 'mac-change': '🔀', 'new-port': '🚪'}
+
+
+class EventLog:
+    """Eventos en JSON Lines, uno por línea y volcados al momento ('-' = salida estándar)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.f = sys.stdout if path == '-' else open(path, 'a', encoding='utf-8')
+        self.counts = {}
+
+    def emit(self, event, **fields):
+        record = {'time': datetime.now().isoformat(timespec='seconds'), 'event': event}
+        record.update(fields)
+        self.f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.f.flush()
+        self.counts[event] = self.counts.get(event, 0) + 1
+        metrics.increment(f"events_{event.replace('-', '_')}")
+        logger.info("%s %s %s", EVENT_ICONS[event], event, fields.get('ip', ''), extra={'stage': 'monitor'})
+
+    def close(self):
+        if self.f is not sys.stdout:
+            self.f.close()
+
+
+class NetworkMonitor:
+    """Reescanea la red cada `interval` segundos sin salir del proceso
+
+    - Cada ciclo es un barrido -sn; el grafo del NetworkMapper se conserva
+      entre ciclos y NetworkDiff separa los hosts nuevos, los que cambian
+      de MAC y los que no cambian (que heredan puertos y OS).
+    - Solo los nuevos y los de MAC cambiada pasan por el escaneo de puertos
+      y OS (con rescan_every=N, todos cada N ciclos, para ver puertos nuevos;
+      ese reescaneo ignora la caché de escaneos y la actualiza).
+    - Un host se da por caído tras down_after barridos seguidos sin respuesta.
+    - Eventos host-up, host-down, mac-change y new-port en JSON Lines.
+    - Las conexiones se recalculan solo si cambia el conjunto de hosts, y el
+      SVG, el reporte y el snapshot solo se regeneran si cambian los hosts,
+      las conexiones, alguna MAC o algún puerto.
+    Si existe el snapshot *_graph.json de una ejecución anterior se parte de
+    él, así reiniciar el daemon no repite host-up de toda la red.
+    scanner_factory permite sustituir nmap, como en run_worker.
+    """
+
+    def __init__(self, generator, network_range, output_file, events, interval=300, scan_ports=False,
+                 down_after=2, rescan_every=0, topology='gateway', workers=8, rate=None, batch_size=1,
+                 block_prefix=24, discovery_workers=4, cache=None, output_options=None, scanner_factory=None):
+        self.generator = generator
+        self.mapper = generator.mapper
+        self.network_range = network_range
+        self.output_file = output_file
+        self.events = events
+        self.interval = interval
+        self.scan_ports = scan_ports
+        self.down_after = max(1, down_after)
+        self.rescan_every = rescan_every
+        self.topology = topology
+        self.pipeline_options = {'workers': workers, 'rate': rate, 'batch_size': batch_size, 'cache': cache}
+        self.discovery_options = {'block_prefix': block_prefix, 'workers': discovery_workers}
+        if scanner_factory is not None:
+            self.pipeline_options['scanner_factory'] = scanner_factory
+            self.discovery_options['scanner_factory'] = scanner_factory
+        self.output_options = output_options or {}
+        self.missed = {}
+        self.cycles = 0
+        self.stopped = threading.Event()
+        self._load_baseline()
+
+    def _load_baseline(self):
+        snapshot_file = self.output_file.replace('.svg', '_graph.json')
+        if not os.path.exists(snapshot_file):
+            return
+        graph = load_snapshot(snapshot_file)
+        for node, host_data in graph.nodes(data=True):
+            self.mapper.network_graph.add_node(node, **host_data)
+        self.mapper.network_graph.add_edges_from(graph.edges(data=True))
+        self.mapper.network_graph.graph['ports_scanned'] = ports_scanned(graph)
+        logger.info(f"🗂️  Estado inicial desde {snapshot_file}: {graph.number_of_nodes()} hosts")
+
+    def live_hosts(self):
+        return [host_data for host_data in self.mapper.network_graph.nodes.values()
+                if not host_data.get('traceroute_only')]
+
+    def stop(self):
+        self.stopped.set()
+
+    def run(self, max_cycles=None):
+        """Ciclos hasta stop() (p. ej. desde un manejador de SIGTERM) o max_cycles"""
+        logger.info(f"👁️  Monitorizando {self.network_range} cada {self.interval:.0f}s "
+                    f"(eventos en {self.events.path})")
+        while not self.stopped.is_set():
+            start = time.monotonic()
+            self.cycle()
+            if max_cycles is not None and self.cycles >= max_cycles:
+                break
+            self.stopped.wait(max(0.0, self.interval - (time.monotonic() - start)))
+        summary = ', '.join(f"{count} {event}" for event, count in sorted(self.events.counts.items()))
+        logger.info(f"👁️  Monitorización terminada tras {self.cycles} ciclos ({summary or 'sin eventos'})")
+
+    def cycle(self):
+        """Un barrido con sus escaneos y eventos; devuelve si se regeneraron las salidas"""
+        self.cycles += 1
+        graph = self.mapper.network_graph
+        with metrics.timer('monitor_cycle'):
+            # Copia del estado anterior: el barrido sobrescribe puertos y OS de los nodos
+            previous = nx.Graph()
+            previous.add_nodes_from((node, dict(host_data)) for node, host_data in graph.nodes(data=True))
+            previous.graph['ports_scanned'] = graph.graph.get('ports_scanned', False)
+            nodes_before = set(graph.nodes())
+            edges_before = set(graph.edges())
+
+            diff = NetworkDiff(previous)
+            full_rescan = self.scan_ports and self.rescan_every and self.cycles % self.rescan_every == 0
+            unchanged = []
+            discovered = self.mapper.iter_discover_network(self.network_range, **self.discovery_options)
+            # En un reescaneo completo los hosts sin cambios van detrás de los nuevos
+            to_scan = itertools.chain(diff.changed_hosts(discovered, self.mapper,
+                                                         on_unchanged=unchanged.append if full_rescan else None),
+                                      unchanged)
+            # Un reescaneo completo no puede salir de la caché (24h por defecto): nmap de verdad,
+            # y sus resultados renuevan las entradas
+            pipeline = ScanPipeline(self.mapper, refresh=bool(full_rescan), **self.pipeline_options)
+            scanned = pipeline.run(to_scan, scan=self.scan_ports)
+            if self.scan_ports:
+                # Los hosts sin cambios de un estado sin puertos también han pasado por el escaneo
+                graph.graph['ports_scanned'] = True
+            if self.pipeline_options['cache'] is not None:
+                self.pipeline_options['cache'].commit()
+
+            seen = {host['ip'] for host in scanned} | {host['ip'] for host in diff.unchanged}
+            for ip in seen:
+                self.missed.pop(ip, None)
+            for host in diff.removed:
+                ip = host['ip']
+                self.missed[ip] = self.missed.get(ip, 0) + 1
+                if self.missed[ip] >= self.down_after:
+                    del self.missed[ip]
+                    graph.remove_node(ip)
+                    self.events.emit('host-down', ip=ip, mac=host.get('mac', 'Unknown'),
+                                     hostname=host.get('hostname', ip))
+
+            # Sin puertos en el estado anterior no hay con qué comparar: nada de new-port
+            rescanned = [host for host, _ in diff.mac_changed]
+            if full_rescan and diff.ports_scanned:
+                rescanned += diff.unchanged
+            changes = self._emit_changes(diff, previous, rescanned)
+
+            # Conexiones: solo si entran o salen hosts
+            if set(graph.nodes()) != nodes_before or self.cycles == 1:
+                self._rebuild_connections()
+            topology_changed = set(graph.nodes()) != nodes_before or set(graph.edges()) != edges_before
+
+            # MAC o puertos nuevos también cambian las etiquetas del diagrama
+            changed = topology_changed or changes > 0
+            if changed and graph.number_of_nodes():
+                self.generator.hosts = self.live_hosts()
+                self.generator.write_outputs(self.network_range, self.output_file, self.scan_ports,
+                                             **self.output_options)
+        logger.info(f"👁️  Ciclo {self.cycles}: {len(seen)} hosts activos, {len(diff.added)} nuevos, "
+                    f"{len(diff.mac_changed)} con MAC cambiada, "
+                    f"{'salidas regeneradas' if changed else 'sin cambios'}")
+        return changed
+
+    def _emit_changes(self, diff, previous, rescanned):
+        """Eventos de hosts nuevos, MAC cambiada y puertos nuevos; devuelve cuántos se emitieron"""
+        emitted = 0
+        for host in diff.added:
+            self.events.emit('host-up', ip=host['ip'], mac=host['mac'], vendor=host['vendor'],
+                             hostname=host['hostname'], os=host.get('os', 'Unknown'),
+                             ports=[port['port'] for port in host.get('ports', [])])
+            emitted += 1
+        for host, previous_mac in diff.mac_changed:
+            self.events.emit('mac-change', ip=host['ip'], previous_mac=previous_mac, mac=host['mac'],
+                             vendor=host['vendor'])
+            emitted += 1
+
+        # Puertos nuevos en hosts ya conocidos que se han vuelto a escanear
+        for host in rescanned:
+            known = {(port['port'], port['protocol']) for port in previous.nodes[host['ip']].get('ports', [])}
+            for port in host.get('ports', []):
+                if (port['port'], port['protocol']) not in known:
+                    self.events.emit('new-port', ip=host['ip'], port=port['port'], protocol=port['protocol'],
+                                     service=port['service'])
+                    emitted += 1
+        return emitted
+
+    def _rebuild_connections(self):
+        graph = self.mapper.network_graph
+        graph.remove_nodes_from([node for node, host_data in graph.nodes(data=True)
+                                 if host_data.get('traceroute_only')])
+        graph.remove_edges_from(list(graph.edges()))
+        hosts = self.live_hosts()
+        with metrics.timer('topology'):
+            if self.topology == 'traceroute':
+                self.mapper.discover_topology(hosts, workers=self.pipeline_options['workers'])
+            else:
+                self.mapper.discover_connections(hosts)
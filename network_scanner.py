@@ -1,121 +1,315 @@
 #!/usr/bin/env python3
+import ipaddress
+import threading
+import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 import nmap
-import networkx as nx
+
+from dependencies import port_scanner
+from host_store import HostGraph
+from instrumentation import logger, metrics
+from nmap_xml import iter_xml_file
+from topology import NmapTraceroute, TopologyDiscovery
+
+PORT_BACKENDS = ('nmap', 'tcp')
+
+
+def port_scan_arguments(host_timeout=120, rtt_timeout=None, resolve_names=True):
+    """Argumentos de nmap para el escaneo de puertos y OS, con timeouts opcionales"""
+    arguments = f'-sT -T4 -F -O --host-timeout {int(host_timeout)}s'
+    if rtt_timeout:
+        arguments += f' --max-rtt-timeout {int(rtt_timeout * 1000)}ms'
+    if not resolve_names:
+        arguments += ' -n'
+    return arguments
+
+
+def host_info(record):
+    """Host descubierto a partir de un registro de nmap_xml, todavía sin puertos ni OS"""
+    return {
+        'ip': record['ip'],
+        'mac': record['mac'],
+        'vendor': record['vendor'],
+        'hostname': record['hostname'] or record['ip'],
+        'os': 'Unknown',  # Se detectará después
+        'ports': [],      # Se llenará con escaneo de puertos
+        'services': []    # Servicios detectados
+    }
+
 
 class NetworkMapper:
-    def __init__(self):
-        self.nm = nmap.PortScanner()
-        self.network_graph = nx.Graph()
+    # Con nmap_dns=False nmap escanea con -n; el enricher completa nombres y fabricantes
+    nmap_dns = True
+    enricher = None
+    
+    def __init__(self, port_backend='nmap', tcp_scanner=None):
+        # El escáner de nmap compartido se crea al primer escaneo: construir el
+        # mapper no ejecuta nmap (--help, modo coordinador, backend tcp)
+        self._nm = None
+        # Los atributos de cada nodo son un HostRecord: el host no se duplica en el grafo
+        self.network_graph = HostGraph()
+        # RTT de cada host medido en el barrido -sn, para los timeouts adaptativos
+        self.host_rtts = {}
+        self.set_port_backend(port_backend, tcp_scanner)
+    
+    @property
+    def nm(self):
+        if getattr(self, '_nm', None) is None:
+            self._nm = port_scanner()
+        return self._nm
+    
+    @nm.setter
+    def nm(self, scanner):
+        self._nm = scanner
+    
+    def set_enricher(self, enricher, nmap_dns=True):
+        """Etapa de enriquecimiento (enrichment.HostEnricher) para cada bloque barrido
+
+        nmap_dns=False añade -n a los barridos y escaneos de nmap: sin las
+        consultas DNS de nmap, que ya hace el enricher en bloque.
+        """
+        self.enricher = enricher
+        self.nmap_dns = nmap_dns
+    
+    def set_port_backend(self, port_backend, tcp_scanner=None):
+        """Elige cómo se escanean los puertos: 'nmap' (-sT -F -O) o 'tcp' (connect asyncio, sin OS)"""
+        if port_backend not in PORT_BACKENDS:
+            raise ValueError(f"Backend de puertos desconocido: {port_backend}")
+        if port_backend == 'tcp' and tcp_scanner is None:
+            # asyncio solo se carga si se usa el backend tcp
+            from tcp_scanner import AsyncTCPScanner
+            tcp_scanner = AsyncTCPScanner()
+        self.port_backend = port_backend
+        self.tcp_scanner = tcp_scanner
         
     def discover_network(self, network_range="192.168.1.0/24"):
-        print(f"🔍 Escaneando red: {network_range}")
+        hosts_list = list(self.iter_discover_network(network_range))
+        logger.info(f"✅ Encontrados {len(hosts_list)} hosts activos")
+        return hosts_list
+    
+    def iter_discover_network(self, network_range="192.168.1.0/24", block_prefix=24, workers=4,
+                              scanner_factory=port_scanner):
+        """Descubre hosts por bloques y los va entregando a medida que termina cada bloque"""
+        blocks = self.split_network(network_range, block_prefix)
+        workers = max(1, workers)
+        if len(blocks) > 1:
+            logger.info(f"🔍 Escaneando red: {network_range} ({len(blocks)} bloques /{block_prefix})")
         
-        try:
-            self.nm.scan(hosts=network_range, arguments='-sn -T4')
+        # Un escáner por hilo; no retiene nada entre bloques
+        local = threading.local()
+        
+        def sweep(block):
+            if not hasattr(local, 'nm'):
+                local.nm = scanner_factory()
+            return self.sweep_block(local.nm, block)
+        
+        # Como mucho `workers` bloques en vuelo: los resultados no se acumulan
+        # si el consumidor (escaneo de puertos, grafo) va más lento que el barrido
+        pending = deque()
+        block_iter = iter(blocks)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for block in block_iter:
+                pending.append(pool.submit(sweep, block))
+                if len(pending) >= workers:
+                    break
             
+            while pending:
+                for host in pending.popleft().result():
+                    self.network_graph.add_node(host['ip'], **host)
+                    yield self.network_graph.nodes[host['ip']]
+                
+                next_block = next(block_iter, None)
+                if next_block is not None:
+                    pending.append(pool.submit(sweep, next_block))
+    
+    def split_network(self, network_range, block_prefix=24):
+        """Divide un CIDR en sub-bloques; rangos que no son CIDR se escanean enteros"""
+        try:
+            network = ipaddress.ip_network(network_range, strict=False)
+        except ValueError:
+            return [network_range]
+        
+        if not block_prefix or network.prefixlen >= block_prefix:
+            return [str(network)]
+        return [str(subnet) for subnet in network.subnets(new_prefix=block_prefix)]
+    
+    def import_nmap_xml(self, xml_files):
+        """Hosts de XML guardados de nmap (nmap -oX archivo) para mapear sin escanear
+
+        Un barrido -sn y un escaneo -sT -F -O de los mismos hosts se combinan:
+        la MAC, el fabricante y el nombre salen del archivo que los traiga, y
+        los puertos y el OS del último con escaneo de puertos u OS. Un XML
+        cortado (nmap interrumpido) aporta los hosts que llegó a cerrar.
+        """
+        hosts = {}
+        for xml_file in xml_files:
+            logger.info(f"📂 Importando XML de nmap: {xml_file}")
+            try:
+                for record in iter_xml_file(xml_file):
+                    if record['state'] != 'up' or record['ip'] is None:
+                        continue
+                    host = hosts.get(record['ip'])
+                    if host is None:
+                        host = hosts[record['ip']] = host_info(record)
+                    else:
+                        for field in ('mac', 'vendor'):
+                            if record[field] != 'Unknown':
+                                host[field] = record[field]
+                        if record['hostname']:
+                            host['hostname'] = record['hostname']
+                    if record['srtt']:
+                        self.host_rtts[record['ip']] = record['srtt']
+                    if record['scanned']:
+                        host['ports'] = host['services'] = record['ports'][:10]
+                        host['os'] = record['os']
+            except ET.ParseError as e:
+                logger.warning(f"⚠️  {xml_file} está incompleto ({e}): se usan los hosts leídos hasta ahí")
+
+        if self.enricher is not None:
+            self.enricher.enrich(list(hosts.values()))
+        for ip, host in hosts.items():
+            self.network_graph.add_node(ip, **host)
+        logger.info(f"📂 {len(hosts)} hosts importados de {len(xml_files)} archivos XML")
+        return [self.network_graph.nodes[ip] for ip in hosts]
+
+    def sweep_block(self, nm, block):
+        """Barrido -sn de un bloque; devuelve los hosts activos"""
+        # Mensajes por bloque y por host con formato diferido: con --quiet no se formatean
+        logger.info("🔍 Escaneando red: %s", block, extra={'stage': 'sweep', 'block': block})
+        
+        try:
+            # Cada host llega en cuanto nmap lo cierra en el XML (-oX -) y no se guarda nada más
             hosts_list = []
-            for host in self.nm.all_hosts():
-                if self.nm[host].state() == 'up':
-                    # Obtener dirección MAC
-                    mac_address = 'Unknown'
-                    vendor_info = 'Unknown'
-                    
-                    addresses = self.nm[host].get('addresses', {})
-                    if 'mac' in addresses:
-                        mac_address = addresses['mac']
-                        vendor_info = self.nm[host].get('vendor', {}).get(mac_address, 'Unknown')
-                    
-                    # Obtener hostname
-                    hostname = self.nm[host].hostname()
-                    if not hostname:
-                        hostname = host
-                    
-                    host_info = {
-                        'ip': host,
-                        'mac': mac_address,
-                        'vendor': vendor_info,
-                        'hostname': hostname,
-                        'os': 'Unknown',  # Se detectará después
-                        'ports': [],      # Se llenará con escaneo de puertos
-                        'services': []    # Servicios detectados
-                    }
-                    hosts_list.append(host_info)
-                    self.network_graph.add_node(host, **host_info)
-                    
-            print(f"✅ Encontrados {len(hosts_list)} hosts activos")
+            for record in nm.scan(block, '-sn -T4' if self.nmap_dns else '-sn -T4 -n', stage='sweep'):
+                if record['state'] != 'up' or record['ip'] is None:
+                    continue
+                # RTT para los timeouts adaptativos del escaneo de puertos
+                if record['srtt']:
+                    self.host_rtts[record['ip']] = record['srtt']
+                hosts_list.append(host_info(record))
+            
+            # Fabricantes y nombres que nmap no dio, en bloque y antes de entregar los hosts
+            if self.enricher is not None:
+                self.enricher.enrich(hosts_list)
             return hosts_list
             
         except nmap.PortScannerError as e:
-            print(f"❌ Error de nmap: {e}")
+            logger.error(f"❌ Error de nmap en {block}: {e}")
             return []
         except Exception as e:
-            print(f"❌ Error inesperado: {e}")
+            logger.error(f"❌ Error inesperado en {block}: {e}")
             return []
     
-    def scan_ports(self, host):
-        """Escaneo de puertos y detección de OS"""
-        print(f"🔦 Escaneando puertos y OS en {host}")
+    def scan_ports(self, host, scanner=None, host_timeout=120, rtt_timeout=None):
+        """Escaneo de puertos y detección de OS
+
+        Si el escaneo falla el resultado lleva 'error', para poder reintentarlo.
+        """
+        logger.info("🔦 Escaneando puertos y OS en %s", host, extra={'stage': 'port_scan', 'host': host})
         
         try:
-            # Escaneo más completo con detección de OS y servicios
-            self.nm.scan(hosts=host, arguments='-sT -T4 -F -O --host-timeout 120s')
-            
-            host_info = {}
-            open_ports = []
-            os_info = 'Unknown'
-            
-            if host in self.nm.all_hosts():
-                # Detección de Sistema Operativo
-                if 'osmatch' in self.nm[host] and self.nm[host]['osmatch']:
-                    best_os = self.nm[host]['osmatch'][0]
-                    os_info = f"{best_os['name']} ({best_os['accuracy']}%)"
-                
-                # Escaneo de puertos
-                for proto in self.nm[host].all_protocols():
-                    ports = self.nm[host][proto].keys()
-                    for port in ports:
-                        service_info = self.nm[host][proto][port]
-                        service_name = service_info.get('name', 'unknown')
-                        product = service_info.get('product', '')
-                        version = service_info.get('version', '')
-                        
-                        service_desc = service_name
-                        if product:
-                            service_desc += f" ({product}"
-                            if version:
-                                service_desc += f" {version}"
-                            service_desc += ")"
-                        
-                        open_ports.append({
-                            'port': port, 
-                            'service': service_desc,
-                            'protocol': proto
-                        })
-            
-            print(f"   📡 {len(open_ports)} puertos abiertos, OS: {os_info}")
+            if self.port_backend == 'tcp':
+                # Connect TCP en proceso a los mismos puertos que -F, sin detección de OS.
+                # rtt_timeout es solo para --max-rtt-timeout: el connect usa --connect-timeout
+                with metrics.timer('tcp_scan'):
+                    result = self.tcp_scanner.scan(host)
+            else:
+                # Cada worker concurrente pasa su propio escáner: uno por hilo
+                nm = scanner if scanner is not None else self.nm
+                # Escaneo más completo con detección de OS y servicios
+                records = {record['ip']: record
+                           for record in nm.scan(host, port_scan_arguments(host_timeout, rtt_timeout, self.nmap_dns),
+                                                 stage='port_scan')}
+                result = self.parse_host_scan(records.get(host))
             
-            return {
-                'ports': open_ports[:10],  # Limitar a 10 puertos
-                'os': os_info
-            }
+            logger.info("   📡 %d puertos abiertos, OS: %s", len(result['ports']), result['os'],
+                        extra={'stage': 'port_scan', 'host': host})
+            return result
             
         except Exception as e:
-            print(f"   ❌ Error escaneando {host}: {e}")
-            return {'ports': [], 'os': 'Unknown'}
+            logger.error(f"   ❌ Error escaneando {host}: {e}", extra={'stage': 'port_scan', 'host': host})
+            return {'ports': [], 'os': 'Unknown', 'error': str(e)}
     
-    def discover_connections(self, hosts):
-        """Descubre conexiones entre hosts (simulado)"""
-        print("🔗 Analizando conexiones...")
+    def scan_ports_batch(self, hosts, scanner=None, host_timeout=120, rtt_timeout=None):
+        """Escanea puertos y OS de varios hosts en una sola invocación de nmap
+        
+        Con el backend tcp el lote se resuelve en un único bucle de eventos.
+        """
+        logger.info("🔦 Escaneando puertos y OS en lote de %d hosts", len(hosts), extra={'stage': 'port_scan'})
+        
+        if self.port_backend == 'tcp':
+            # Todos los hosts del lote comparten un bucle de eventos y sus límites
+            try:
+                with metrics.timer('tcp_scan'):
+                    results = self.tcp_scanner.scan_many(hosts)
+            except Exception as e:
+                logger.error(f"   ❌ Error escaneando lote {hosts[0]}...{hosts[-1]}: {e}")
+                return {host: {'ports': [], 'os': 'Unknown', 'error': str(e)} for host in hosts}
+            for host, result in results.items():
+                logger.info("   📡 %s: %d puertos abiertos", host, len(result['ports']),
+                            extra={'stage': 'port_scan', 'host': host})
+            return results
         
-        # Por simplicidad, conectamos hosts basado en subredes comunes
-        # En una implementación real usarías traceroute o técnicas similares
-        gateway = None
+        nm = scanner if scanner is not None else self.nm
+        results = {}
+        
+        try:
+            # Solo se guardan los registros ya reducidos, no el XML ni el árbol de python-nmap
+            records = {record['ip']: record
+                       for record in nm.scan(' '.join(hosts),
+                                             port_scan_arguments(host_timeout, rtt_timeout, self.nmap_dns),
+                                             stage='port_scan')}
+        except Exception as e:
+            logger.error(f"   ❌ Error escaneando lote {hosts[0]}...{hosts[-1]}: {e}")
+            return {host: {'ports': [], 'os': 'Unknown', 'error': str(e)} for host in hosts}
         
-        # Identificar gateway (usualmente .1 o .254)
+        # Separar el resultado combinado en la estructura por host de scan_ports
+        for host in hosts:
+            try:
+                results[host] = self.parse_host_scan(records.get(host))
+            except Exception as e:
+                logger.error(f"   ❌ Error procesando {host}: {e}")
+                results[host] = {'ports': [], 'os': 'Unknown', 'error': str(e)}
+        
+        return results
+    
+    def parse_host_scan(self, record):
+        """Puertos y OS de un registro de nmap_xml; None si nmap no devolvió el host"""
+        if record is None:
+            # nmap omite los hosts que agotan --host-timeout
+            return {'ports': [], 'os': 'Unknown', 'error': 'sin respuesta'}
+        return {
+            'ports': record['ports'][:10],  # Limitar a 10 puertos
+            'os': record['os']
+        }
+    
+    def update_host(self, host, scan_result):
+        """Aplica el resultado de scan_ports al dict del host y al nodo del grafo"""
+        host['ports'] = scan_result['ports']
+        host['os'] = scan_result['os']
+        host['services'] = host['ports']  # Para compatibilidad
+        
+        # Los hosts de discover_network ya son el nodo del grafo
+        node = self.network_graph.nodes[host['ip']] if host['ip'] in self.network_graph else None
+        if node is not None and node is not host:
+            node.update(ports=host['ports'], os=host['os'], services=host['services'])
+    
+    def find_gateway(self, hosts):
+        """Identificar gateway (usualmente .1 o .254)"""
         for host in hosts:
             if host['ip'].endswith('.1') or host['ip'].endswith('.254'):
-                gateway = host['ip']
-                break
+                return host['ip']
+        return None
+    
+    def discover_connections(self, hosts):
+        """Descubre conexiones entre hosts (simulado)"""
+        logger.info("🔗 Analizando conexiones...")
+        
+        # Por simplicidad, conectamos hosts basado en subredes comunes;
+        # discover_topology usa traceroute para redes con varios routers
+        gateway = self.find_gateway(hosts)
         
         # Conectar todos los hosts al gateway
         if gateway and gateway in self.network_graph:
@@ -126,3 +320,12 @@ class NetworkMapper:
                                               weight=1)
         
         return len(self.network_graph.edges())
+    
+    def discover_topology(self, hosts, probe=None, workers=4):
+        """Descubre conexiones multi-salto con traceroute concurrente"""
+        logger.info("🔗 Analizando conexiones con traceroute...")
+        
+        discovery = TopologyDiscovery(self.network_graph, probe or NmapTraceroute(),
+                                      workers=workers, gateway_hint=self.find_gateway(hosts))
+        discovery.discover(hosts)
+        return len(self.network_graph.edges())
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Parseo en streaming del XML de nmap: un registro por <host> en cuanto se cierra
+
+python-nmap (PortScanner.scan) espera a que nmap termine, guarda su salida
+completa, la convierte en un árbol de dicts que el PortScanner conserva
+hasta el siguiente escaneo y el mapper la vuelve a copiar en sus hosts.
+Aquí nmap escribe el XML por la salida estándar (-oX -) y un XMLPullParser
+(el parser incremental sobre el que está hecho ET.iterparse) lo va leyendo
+por bloques: cada <host> se convierte en un registro y se libera al
+cerrarse, así la memoria depende del host más grande y no del escaneo.
+Los mismos registros salen de un XML guardado (nmap -oX archivo) para
+generar el mapa sin volver a escanear.
+"""
+import shlex
+import subprocess
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+
+import nmap
+
+from instrumentation import metrics
+
+CHUNK_SIZE = 64 * 1024
+
+
+def host_record(host):
+    """Registro de un elemento <host>: dirección, estado, MAC, nombre, RTT, puertos, OS y saltos
+
+    scanned indica si el XML trae escaneo de puertos u OS (no lo trae un -sn).
+    """
+    record = {'ip': None, 'state': 'unknown', 'mac': 'Unknown', 'vendor': 'Unknown', 'hostname': '',
+              'srtt': None, 'ports': [], 'os': 'Unknown', 'scanned': False}
+
+    status = host.find('status')
+    if status is not None:
+        record['state'] = status.get('state', 'unknown')
+    for address in host.findall('address'):
+        addrtype = address.get('addrtype')
+        if addrtype in ('ipv4', 'ipv6') and record['ip'] is None:
+            record['ip'] = address.get('addr')
+        elif addrtype == 'mac':
+            record['mac'] = address.get('addr')
+            record['vendor'] = address.get('vendor') or 'Unknown'
+
+    # Como PortScannerHostDict.hostname(): el nombre de tipo 'user' o el primero
+    names = host.findall('hostnames/hostname')
+    user = next((name for name in names if name.get('type') == 'user'), None)
+    if user is not None or names:
+        record['hostname'] = (user if user is not None else names[0]).get('name', '')
+
+    times = host.find('times')
+    if times is not None and int(times.get('srtt', -1)) > 0:
+        record['srtt'] = int(times.get('srtt')) / 1e6
+
+    ports = host.find('ports')
+    if ports is not None:
+        record['scanned'] = True
+        for port in ports.iter('port'):
+            service = port.find('service')
+            service = service.attrib if service is not None else {}
+            service_desc = service.get('name', 'unknown')
+            if service.get('product'):
+                service_desc += f" ({service['product']}"
+                if service.get('version'):
+                    service_desc += f" {service['version']}"
+                service_desc += ")"
+            record['ports'].append({
+                'port': int(port.get('portid')),
+                'service': service_desc,
+                'protocol': port.get('protocol')
+            })
+
+    osmatch = host.find('os/osmatch')
+    if host.find('os') is not None:
+        record['scanned'] = True
+    if osmatch is not None:
+        record['os'] = f"{osmatch.get('name')} ({osmatch.get('accuracy')}%)"
+
+    trace = host.find('trace')
+    if trace is not None:
+        record['trace'] = [(int(hop.get('ttl')), hop.get('ipaddr'), hop.get('host'))
+                           for hop in trace.iter('hop')]
+    return record
+
+
+class HostStream:
+    """Registros de los <host> de un XML de nmap leído por bloques de un archivo binario
+
+    Cada elemento de primer nivel se descarta al cerrarse (el <host>, después
+    de convertirlo en registro): el árbol nunca pasa de un bloque de lectura.
+    parse_seconds acumula el tiempo de parseo sin la espera a que nmap escriba;
+    un XML incompleto (nmap interrumpido) lanza ET.ParseError tras sus hosts.
+    """
+
+    def __init__(self, source, chunk_size=CHUNK_SIZE):
+        self.source = source
+        self.chunk_size = chunk_size
+        self.parse_seconds = 0.0
+        self.finished = False
+
+    def __iter__(self):
+        parser = ET.XMLPullParser(events=('start', 'end'))
+        root = None
+        depth = 0
+        while not self.finished:
+            chunk = self.source.read(self.chunk_size)
+            start = time.perf_counter()
+            records = []
+            error = None
+            try:
+                if chunk:
+                    parser.feed(chunk)
+                else:
+                    self.finished = True
+                    parser.close()
+            except ET.ParseError as e:
+                # Los hosts ya cerrados antes del error se entregan igualmente
+                self.finished = True
+                error = e
+            for event, element in parser.read_events():
+                if event == 'start':
+                    if root is None:
+                        root = element
+                    depth += 1
+                    continue
+                depth -= 1
+                if depth == 1:
+                    if element.tag == 'host':
+                        records.append(host_record(element))
+                    root.clear()
+            self.parse_seconds += time.perf_counter() - start
+            yield from records
+            if error is not None:
+                raise error
+
+
+def iter_xml_file(path):
+    """Registros de un XML guardado con nmap -oX archivo"""
+    with open(path, 'rb') as f:
+        records = HostStream(f)
+        try:
+            yield from records
+        finally:
+            metrics.observe('xml_parse', records.parse_seconds)
+
+
+class NmapStreamScanner:
+    """Ejecuta nmap con -oX - y entrega cada host en cuanto nmap lo termina
+
+    Sustituye a nmap.PortScanner: no guarda la salida ni el resultado entre
+    escaneos. Se crea con dependencies.port_scanner(), que localiza nmap una
+    sola vez por proceso; los escáneres simulados sobrescriben _open y _close.
+    """
+
+    def __init__(self, nmap_path='nmap'):
+        self.nmap_path = nmap_path
+        self._process = None
+        self._stderr = None
+
+    def _open(self, hosts, arguments):
+        """Lanza nmap y devuelve su salida estándar (el XML)"""
+        # stderr a un archivo: una tubería llena bloquearía a nmap mientras se lee stdout
+        self._stderr = tempfile.TemporaryFile()
+        self._process = subprocess.Popen([self.nmap_path, '-oX', '-'] + shlex.split(hosts) + shlex.split(arguments),
+                                         stdout=subprocess.PIPE, stderr=self._stderr)
+        return self._process.stdout
+
+    def _close(self, finished):
+        """Espera a nmap (o lo termina si se dejó de leer antes del final) y devuelve su stderr"""
+        process, stderr = self._process, self._stderr
+        self._process = self._stderr = None
+        if not finished and process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        process.wait()
+        stderr.seek(0)
+        errors = stderr.read().decode(errors='replace')
+        stderr.close()
+        return errors
+
+    def scan(self, hosts, arguments, stage='scan'):
+        """Registros (host_record) de los hosts escaneados, en el orden en que nmap los termina
+
+        El tiempo de nmap va a nmap_<stage> y el de parseo a xml_parse, como
+        hasta ahora; si la salida no es XML válido se lanza PortScannerError
+        con los errores de nmap, igual que python-nmap.
+        """
+        start = time.perf_counter()
+        records = HostStream(self._open(hosts, arguments))
+        errors = ''
+        try:
+            try:
+                yield from records
+            finally:
+                errors = self._close(records.finished)
+        except ET.ParseError as e:
+            raise nmap.PortScannerError(errors.strip() or f"XML de nmap inválido: {e}") from None
+        finally:
+            metrics.observe('xml_parse', records.parse_seconds)
+            metrics.observe(f'nmap_{stage}', time.perf_counter() - start - records.parse_seconds)
+            metrics.increment('nmap_invocations')
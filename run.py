@@ -4,73 +4,302 @@ import sys
 import argparse
 from pathlib import Path
 
-def check_dependencies():
-    """Verifica que todas las dependencias estén instaladas"""
-    try:
-        import nmap
-        import networkx as nx
-        import matplotlib.pyplot as plt
-        print("✅ Todas las dependencias están instaladas")
-        return True
-    except ImportError as e:
-        print(f"❌ Dependencia faltante: {e}")
-        print("💡 Instala las dependencias con:")
-        print("   pip install python-nmap networkx matplotlib")
+from instrumentation import configure_logging, logger, metrics
+
+def check_dependencies(extra=()):
+    """Verifica que todas las dependencias estén instaladas, sin importarlas"""
+    from dependencies import missing_dependencies
+    missing = missing_dependencies(extra)
+    if missing:
+        logger.error(f"❌ Dependencias faltantes: {', '.join(missing)}")
+        logger.info("💡 Instala las dependencias con:")
+        logger.info(f"   pip install {' '.join(missing)}")
         return False
+    logger.info("✅ Todas las dependencias están instaladas")
+    return True
 
 def main():
     # Configurar argumentos
     parser = argparse.ArgumentParser(description='Network Mapper - Generador de diagramas de red SVG')
-    parser.add_argument('network', nargs='?', default='192.168.1.0/24', 
-                       help='Rango de red a escanear (ej: 192.168.1.0/24, 10.0.0.0/16)')
+    parser.add_argument('network', nargs='?', default=None, 
+                       help='Rango de red a escanear (ej: 192.168.1.0/24, 10.0.0.0/16; default: 192.168.1.0/24)')
     parser.add_argument('--output', '-o', default=None,
                        help='Nombre del archivo SVG de salida')
     parser.add_argument('--scan-ports', '-p', action='store_true',
                        help='Escanear puertos (puede requerir sudo)')
+    parser.add_argument('--workers', '-w', type=int, default=8,
+                       help='Hosts escaneados en paralelo con --scan-ports (default: 8)')
+    parser.add_argument('--rate', type=float, default=None,
+                       help='Máximo de escaneos de host iniciados por segundo')
+    parser.add_argument('--batch-size', '-b', type=int, default=1,
+                       help='Hosts por invocación de nmap al escanear puertos (default: 1)')
+    parser.add_argument('--block-prefix', type=int, default=24,
+                       help='Divide redes grandes en bloques de este prefijo para el descubrimiento (default: 24)')
+    parser.add_argument('--discovery-workers', type=int, default=4,
+                       help='Bloques barridos en paralelo durante el descubrimiento (default: 4)')
+    parser.add_argument('--cache', default='network_cache.db',
+                       help='Archivo SQLite de caché de escaneos (default: network_cache.db)')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='No leer ni escribir la caché de escaneos')
+    parser.add_argument('--cache-size', type=int, default=10000,
+                       help='Máximo de hosts en caché; se descartan los usados hace más tiempo (default: 10000)')
+    parser.add_argument('--max-age', default='24h',
+                       help='Antigüedad máxima de puertos/OS en caché antes de reescanear (ej: 600, 30m, 12h, 7d)')
+    parser.add_argument('--dns', choices=['nmap', 'bulk', 'off'], default='nmap',
+                       help='nmap: nombres del DNS inverso de nmap; bulk: nmap -n y DNS inverso concurrente con caché '
+                            '(barridos más rápidos); off: nmap -n, sin nombres (default: nmap)')
+    parser.add_argument('--dns-workers', type=int, default=32,
+                       help='Consultas DNS inversas en paralelo con --dns bulk (default: 32)')
+    parser.add_argument('--oui-db', nargs='?', const='auto', default=None, metavar='ARCHIVO',
+                       help='Completa los fabricantes desconocidos con una lista de prefijos OUI '
+                            '(nmap-mac-prefixes u oui.txt del IEEE; por defecto la de nmap)')
+    parser.add_argument('--oui-index', default='network_oui.idx',
+                       help='Índice OUI generado a partir de --oui-db (default: network_oui.idx)')
+    parser.add_argument('--diff-against', default=None, metavar='SNAPSHOT',
+                       help='Snapshot *_graph.json de un escaneo anterior: solo se escanean hosts nuevos o con MAC cambiada')
+    parser.add_argument('--renderer', choices=['svg', 'matplotlib'], default='svg',
+                       help='svg: escritor SVG nativo en streaming (rápido); matplotlib: renderizado original')
+    parser.add_argument('--layout', choices=['auto', 'radial', 'tree', 'force', 'spring'], default='auto',
+                       help='auto: radial para estrellas/árboles, fuerzas con rejilla para el resto (default: auto)')
+    parser.add_argument('--no-layout-cache', action='store_true',
+                       help='No reutilizar las posiciones del diagrama de la ejecución anterior')
+    parser.add_argument('--topology', choices=['gateway', 'traceroute'], default='gateway',
+                       help='gateway: todos los hosts al gateway; traceroute: caminos reales multi-salto (requiere sudo)')
+    parser.add_argument('--export', action='append', choices=['jsonl', 'graphml', 'parquet'], default=[],
+                       help='Exportar hosts, puertos y conexiones junto al SVG (repetible; parquet requiere pyarrow)')
+    parser.add_argument('--cluster-by', choices=['subnet', 'vendor', 'role'], default=None,
+                       help='Diagrama agrupado para redes grandes: un nodo por subred, fabricante o tipo de dispositivo')
+    parser.add_argument('--cluster-prefix', type=int, default=24,
+                       help='Prefijo de las subredes con --cluster-by subnet (default: 24)')
+    parser.add_argument('--cluster-detail', action='append', default=[], metavar='CLUSTER',
+                       help="Genera el SVG de detalle de un clúster (o 'all') desde el snapshot de la última ejecución, sin escanear (repetible)")
+    parser.add_argument('--from-xml', action='append', default=[], metavar='ARCHIVO',
+                       help='Genera el mapa desde XML guardados de nmap (nmap -oX archivo), sin escanear (repetible)')
+    parser.add_argument('--daemon', action='store_true',
+                       help='Modo daemon: repite el barrido -sn cada --interval y emite eventos de cambios en JSON Lines')
+    parser.add_argument('--interval', default='5m',
+                       help='Tiempo entre barridos con --daemon (ej: 90, 5m, 1h; default: 5m)')
+    parser.add_argument('--events', default=None, metavar='ARCHIVO',
+                       help="Archivo de eventos con --daemon (default: <salida>_events.jsonl; '-' = salida estándar)")
+    parser.add_argument('--down-after', type=int, default=2,
+                       help='Barridos seguidos sin respuesta para emitir host-down con --daemon (default: 2)')
+    parser.add_argument('--rescan-every', type=int, default=0,
+                       help='Con --daemon y --scan-ports, reescanear todos los hosts cada N ciclos para detectar puertos nuevos (default: 0 = nunca)')
+    parser.add_argument('--port-backend', choices=['nmap', 'tcp'], default='nmap',
+                       help='nmap: -sT -F -O (con OS); tcp: connect asyncio en proceso, sin OS ni sudo (default: nmap)')
+    parser.add_argument('--connect-timeout', type=float, default=1.0,
+                       help='Segundos de espera de cada connect con --port-backend tcp (default: 1.0)')
+    parser.add_argument('--connect-rate', type=float, default=None,
+                       help='Máximo de connects por segundo en total con --port-backend tcp')
+    parser.add_argument('--host-connect-rate', type=float, default=None,
+                       help='Máximo de connects por segundo contra un mismo host con --port-backend tcp')
+    parser.add_argument('--resume', action='store_true',
+                       help='Reanudar una ejecución interrumpida desde su *_checkpoint.jsonl')
+    parser.add_argument('--coordinator', default=None, metavar='[HOST:]PUERTO',
+                       help='Modo distribuido: reparte los bloques de la red (admite varias separadas por comas) entre workers. '
+                            'Sin autenticación: fuera de 127.0.0.1, escuchar solo en una red de confianza')
+    parser.add_argument('--local-workers', type=int, default=0,
+                       help='Lanza N workers en esta máquina (implica --coordinator 127.0.0.1:0 si no se indica)')
+    parser.add_argument('--worker-timeout', default='5m',
+                       help='Con --coordinator, tiempo máximo sin ningún worker conectado antes de abandonar '
+                            'los bloques pendientes (default: 5m)')
+    parser.add_argument('--worker', default=None, metavar='HOST:PUERTO',
+                       help='Modo worker: barre y escanea los bloques que asigna el coordinador')
+    parser.add_argument('--profile', nargs='?', const='auto', default=None, metavar='ARCHIVO',
+                       help='Guardar tiempos por etapa en JSON (default: <salida>_profile.json)')
+    parser.add_argument('--metrics-file', default=None, metavar='ARCHIVO',
+                       help='Guardar las métricas en formato de texto de Prometheus (p. ej. para node_exporter)')
+    parser.add_argument('--quiet', '-q', action='store_true',
+                       help='Solo avisos y errores por consola')
+    parser.add_argument('--log-format', choices=['text', 'json'], default='text',
+                       help='text: mensajes como siempre; json: una línea JSON por mensaje con sus campos')
     
     args = parser.parse_args()
+    configure_logging(quiet=args.quiet, json_format=args.log_format == 'json')
     
-    print("🚀 Ejecutando Network Mapper...")
+    logger.info("🚀 Ejecutando Network Mapper...")
+    cache = None
+    checkpoint_file = None
+    coordinator = None
+    enricher = None
+    output_file = None
     
-    # Verificar dependencias primero
-    if not check_dependencies():
+    # Verificar dependencias primero (matplotlib solo con --renderer matplotlib)
+    if not check_dependencies(['matplotlib'] if args.renderer == 'matplotlib' else []):
         return
     
     try:
-        # Importar módulos
-        from network_scanner import NetworkMapper
+        # Importar módulos (numpy, matplotlib y asyncio se cargan en la etapa que los usa)
         from svg_generator import SVGGenerator
+        from scan_cache import ScanCache, parse_duration
+        from scan_pipeline import checkpoint_path
+        from distributed import Coordinator, parse_address, run_worker, spawn_local_workers
+        
+        tcp_options = {'timeout': args.connect_timeout, 'rate': args.connect_rate,
+                       'per_host_rate': args.host_connect_rate}
         
-        # Usar la red proporcionada como parámetro
-        network_range = args.network
+        # Modo worker: no genera diagrama, solo envía hosts al coordinador
+        if args.worker:
+            run_worker(args.worker, scan_ports=args.scan_ports, workers=args.workers, rate=args.rate,
+                       batch_size=args.batch_size, block_prefix=args.block_prefix,
+                       discovery_workers=args.discovery_workers, port_backend=args.port_backend,
+                       tcp_options=tcp_options)
+            return
+        
+        # Usar la red proporcionada como parámetro (con --from-xml, los archivos importados)
+        if args.from_xml:
+            if args.daemon or args.diff_against or args.coordinator or args.local_workers:
+                logger.error("❌ --from-xml no se combina con --daemon, --diff-against ni el modo distribuido")
+                return
+            network_range = args.network or ', '.join(Path(xml_file).name for xml_file in args.from_xml)
+        else:
+            network_range = args.network or '192.168.1.0/24'
+        # Los workers escanean sin caché ni snapshot anterior
+        distributed_mode = args.coordinator or args.local_workers
+        if distributed_mode and args.diff_against:
+            logger.error("❌ --diff-against no se combina con el modo distribuido")
+            return
         
         # Generar nombre de archivo si no se proporciona
         if not args.output:
-            output_file = f"network_map_{network_range.replace('/', '_').replace('.', '_')}.svg"
+            output_file = f"network_map_{network_range.replace('/', '_').replace('.', '_').replace(',', '-').replace(' ', '')}.svg"
         else:
             output_file = args.output
+        # Importar XML no escanea: no hay nada que reanudar
+        checkpoint_file = checkpoint_path(output_file) if not args.from_xml else None
+        
+        # Detalle de clústeres bajo demanda: sale del snapshot, no se vuelve a escanear
+        if args.cluster_detail:
+            from clusters import ClusteredDiagram
+            from scan_diff import load_snapshot, ports_scanned
+            snapshot_file = output_file.replace('.svg', '_graph.json')
+            if not Path(snapshot_file).exists():
+                logger.error(f"❌ No existe {snapshot_file}: ejecuta antes el escaneo con la misma salida")
+                return
+            graph = load_snapshot(snapshot_file)
+            scan_ports = ports_scanned(graph)
+            diagram = ClusteredDiagram(graph, args.cluster_by or 'subnet', output_file,
+                                       args.cluster_prefix, scan_ports)
+            diagram.details(args.cluster_detail, layout=args.layout)
+            return
         
-        print(f"🌐 Escaneando: {network_range}")
-        print(f"💾 Salida: {output_file}")
-        print(f"🔦 Escaneo de puertos: {'Activado' if args.scan_ports else 'Desactivado'}")
+        logger.info(f"🌐 {'Importando' if args.from_xml else 'Escaneando'}: {network_range}")
+        logger.info(f"💾 Salida: {output_file}")
+        if not args.from_xml:
+            logger.info(f"🔦 Escaneo de puertos: {'Activado' if args.scan_ports else 'Desactivado'}")
+        
+        # Caché de escaneos: los hosts con resultado vigente se saltan el -O
+        if distributed_mode and args.scan_ports and not args.no_cache:
+            logger.warning("⚠️  Modo distribuido: los workers escanean sin caché; "
+                           f"{args.cache} solo completa nombres y fabricantes")
+        if not args.no_cache:
+            cache = ScanCache(args.cache, ttl={'scan': parse_duration(args.max_age)},
+                              max_entries=args.cache_size)
+            logger.info(f"💾 Caché: {args.cache} (max-age {args.max_age})")
         
         # Generar diagrama
         generator = SVGGenerator()
-        output_path = generator.generate_network_svg(network_range, output_file, args.scan_ports)
+        if args.port_backend == 'tcp':
+            from tcp_scanner import AsyncTCPScanner
+            generator.mapper.set_port_backend('tcp', AsyncTCPScanner(**tcp_options))
+            logger.info(f"🔌 Backend de puertos: tcp connect (timeout {args.connect_timeout}s, sin detección de OS)")
+        
+        # Enriquecimiento de cada bloque barrido: fabricantes por OUI y DNS inverso en bloque
+        if args.dns == 'bulk' or args.oui_db:
+            from enrichment import HostEnricher, ReverseResolver, load_oui_index
+            oui_index = None
+            if args.oui_db:
+                oui_index = load_oui_index(None if args.oui_db == 'auto' else args.oui_db, args.oui_index)
+            resolver = ReverseResolver(workers=args.dns_workers) if args.dns == 'bulk' else None
+            enricher = HostEnricher(oui_index, resolver)
+        generator.mapper.set_enricher(enricher, nmap_dns=args.dns == 'nmap')
+        if args.dns != 'nmap':
+            logger.info(f"🏷️  DNS inverso: {'concurrente con caché' if args.dns == 'bulk' else 'desactivado'} (nmap -n)")
+        
+        # Modo daemon: el grafo sigue en memoria entre barridos
+        if args.daemon:
+            import signal
+            from monitor import EventLog, NetworkMonitor
+            events = EventLog(args.events or output_file.replace('.svg', '_events.jsonl'))
+            monitor = NetworkMonitor(generator, network_range, output_file, events,
+                                     interval=parse_duration(args.interval), scan_ports=args.scan_ports,
+                                     down_after=args.down_after, rescan_every=args.rescan_every,
+                                     topology=args.topology, workers=args.workers, rate=args.rate,
+                                     batch_size=args.batch_size, block_prefix=args.block_prefix,
+                                     discovery_workers=args.discovery_workers, cache=cache,
+                                     output_options={'renderer': args.renderer, 'layout': args.layout,
+                                                     'layout_cache': not args.no_layout_cache,
+                                                     'cluster_by': args.cluster_by,
+                                                     'cluster_prefix': args.cluster_prefix})
+            # systemd y similares paran el daemon con SIGTERM: se termina el ciclo en curso
+            signal.signal(signal.SIGTERM, lambda signum, frame: monitor.stop())
+            try:
+                with metrics.timer('total'):
+                    monitor.run()
+            finally:
+                events.close()
+            return
+        
+        # Modo coordinador: los bloques se reparten entre workers locales o remotos
+        if distributed_mode:
+            coordinator = Coordinator(generator.mapper, network_range.split(','), block_prefix=args.block_prefix,
+                                      address=parse_address(args.coordinator or '0'),
+                                      worker_timeout=parse_duration(args.worker_timeout))
+            if args.local_workers:
+                spawn_local_workers(coordinator, args.local_workers, scan_ports=args.scan_ports,
+                                    workers=args.workers, rate=args.rate, batch_size=args.batch_size,
+                                    discovery_workers=args.discovery_workers,
+                                    port_backend=args.port_backend, tcp_options=tcp_options, quiet=True)
+            coordinator.start()
+        
+        with metrics.timer('total'):
+            output_path = generator.generate_network_svg(network_range, output_file, args.scan_ports,
+                                                       workers=args.workers, rate=args.rate,
+                                                       batch_size=args.batch_size,
+                                                       block_prefix=args.block_prefix,
+                                                       discovery_workers=args.discovery_workers,
+                                                       cache=cache,
+                                                       diff_against=args.diff_against,
+                                                       renderer=args.renderer,
+                                                       layout=args.layout,
+                                                       layout_cache=not args.no_layout_cache,
+                                                       topology=args.topology,
+                                                       export_formats=args.export,
+                                                       checkpoint_file=checkpoint_file,
+                                                       resume=args.resume,
+                                                       coordinator=coordinator,
+                                                       cluster_by=args.cluster_by,
+                                                       cluster_prefix=args.cluster_prefix,
+                                                       xml_files=args.from_xml)
         
         if output_path and Path(output_path).exists():
-            print(f"✅ Diagrama generado: {output_path}")
+            logger.info(f"✅ Diagrama generado: {output_path}")
             # Abrir en macOS
             subprocess.run(['open', output_path])
         else:
-            print("❌ No se pudo generar el diagrama")
+            logger.error("❌ No se pudo generar el diagrama")
             
     except KeyboardInterrupt:
-        print("\n⏹️  Escaneo cancelado por el usuario")
+        logger.info("\n⏹️  Escaneo cancelado por el usuario")
+        if checkpoint_file and Path(checkpoint_file).exists():
+            logger.info(f"💾 Progreso guardado en {checkpoint_file}: repite el comando con --resume para continuar")
     except Exception as e:
-        print(f"❌ Error: {e}")
+        logger.error(f"❌ Error: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        if cache is not None:
+            cache.close()
+        if coordinator is not None:
+            coordinator.close()
+        if enricher is not None:
+            enricher.close()
+        # También tras una interrupción: muestra hasta dónde llegó la ejecución
+        if args.profile and output_file:
+            profile_file = output_file.replace('.svg', '_profile.json') if args.profile == 'auto' else args.profile
+            metrics.write_json(profile_file)
+        if args.metrics_file:
+            metrics.write_prometheus(args.metrics_file)
 
 if __name__ == "__main__":
     main()
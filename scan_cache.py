@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+import json
+import re
+import sqlite3
+import time
+
+# TTL por campo en segundos: los puertos/OS cambian más que el nombre o el fabricante
+DEFAULT_TTL = {
+    'scan': 24 * 3600,
+    'discovery': 7 * 24 * 3600,
+}
+
+_DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_duration(value):
+    """Convierte '90', '30m', '12h' o '7d' a segundos"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*', str(value))
+    if not match:
+        raise ValueError(f"Duración no válida: {value!r} (usa p.ej. 600, 30m, 12h, 7d)")
+    amount, unit = match.groups()
+    return float(amount) * _DURATION_UNITS[unit or 's']
+
+
+class ScanCache:
+    """Caché en disco (SQLite) de resultados de descubrimiento y de scan_ports por IP y MAC"""
+
+    def __init__(self, path='network_cache.db', ttl=None, max_entries=10000):
+        self.path = path
+        self.ttl = dict(DEFAULT_TTL, **(ttl or {}))
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self.db = sqlite3.connect(path)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS hosts (
+                ip TEXT NOT NULL,
+                mac TEXT NOT NULL,
+                discovery TEXT,
+                discovery_at REAL,
+                scan TEXT,
+                scan_at REAL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (ip, mac)
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS hosts_last_access ON hosts (last_access)")
+        self.db.commit()
+
+    def _get(self, field, ip, mac):
+        row = self.db.execute(
+            f"SELECT {field}, {field}_at FROM hosts WHERE ip = ? AND mac = ?",
+            (ip, mac or 'Unknown')).fetchone()
+
+        now = time.time()
+        if not row or row[0] is None or now - row[1] > self.ttl[field]:
+            return None
+
+        self.db.execute("UPDATE hosts SET last_access = ? WHERE ip = ? AND mac = ?",
+                        (now, ip, mac or 'Unknown'))
+        return json.loads(row[0])
+
+    def _put(self, field, ip, mac, value):
+        now = time.time()
+        self.db.execute(f"""
+            INSERT INTO hosts (ip, mac, {field}, {field}_at, last_access)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (ip, mac) DO UPDATE SET
+                {field} = excluded.{field},
+                {field}_at = excluded.{field}_at,
+                last_access = excluded.last_access
+        """, (ip, mac or 'Unknown', json.dumps(value), now, now))
+
+    def get_scan(self, ip, mac):
+        """Resultado de scan_ports si sigue vigente, si no None"""
+        result = self._get('scan', ip, mac)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def put_scan(self, ip, mac, scan_result):
+        self._put('scan', ip, mac, scan_result)
+
+    def get_discovery(self, ip, mac):
+        return self._get('discovery', ip, mac)
+
+    def put_discovery(self, host):
+        discovery = {key: host[key] for key in ('ip', 'mac', 'vendor', 'hostname')}
+        self._put('discovery', host['ip'], host['mac'], discovery)
+
+    def merge_discovery(self, host):
+        """Completa hostname/fabricante que nmap no devolvió en este barrido
+
+        Devuelve los campos actualizados en el host. Solo se guarda el
+        descubrimiento cuando viene completo de nmap, para no renovar datos
+        de la caché indefinidamente.
+        """
+        cached = self.get_discovery(host['ip'], host['mac'])
+        updates = {}
+        if cached:
+            if host['hostname'] == host['ip'] and cached['hostname'] != host['ip']:
+                updates['hostname'] = cached['hostname']
+            if host['vendor'] == 'Unknown' and cached['vendor'] != 'Unknown':
+                updates['vendor'] = cached['vendor']
+
+        if updates:
+            host.update(updates)
+        else:
+            self.put_discovery(host)
+        return updates
+
+    def evict(self):
+        """Elimina las entradas menos usadas recientemente por encima de max_entries"""
+        count = self.db.execute("SELECT COUNT(*) FROM hosts").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self.db.execute("""
+                DELETE FROM hosts WHERE rowid IN (
+                    SELECT rowid FROM hosts ORDER BY last_access ASC LIMIT ?
+                )
+            """, (excess,))
+        return max(excess, 0)
+
+    def commit(self):
+        self.evict()
+        self.db.commit()
+
+    def close(self):
+        self.commit()
+        self.db.close()
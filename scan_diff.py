@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+import json
+from datetime import datetime
+
+import networkx as nx
+
+from host_store import to_plain
+from instrumentation import logger
+
+
+def save_snapshot(graph, output_file, ports_scanned=False):
+    """Guarda network_graph en JSON para poder compararlo en la próxima ejecución
+
+    ports_scanned distingue "sin puertos abiertos" de "puertos sin escanear".
+    """
+    try:
+        data = nx.node_link_data(graph)
+        data['graph'] = dict(data['graph'], ports_scanned=bool(ports_scanned))
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, default=to_plain)
+        logger.info(f"🗂️  Snapshot del grafo guardado como: {output_file}")
+        return output_file
+    except Exception as e:
+        logger.error(f"❌ Error guardando snapshot: {e}")
+        return None
+
+
+def load_snapshot(snapshot_file):
+    with open(snapshot_file, encoding='utf-8') as f:
+        return nx.node_link_graph(json.load(f))
+
+
+def ports_scanned(graph):
+    """Si el grafo (p. ej. un snapshot) tiene los puertos escaneados
+
+    Los snapshots anteriores a la marca se deducen de si algún host tiene puertos.
+    """
+    if 'ports_scanned' in graph.graph:
+        return graph.graph['ports_scanned']
+    return any(data.get('ports') for _, data in graph.nodes(data=True))
+
+
+class NetworkDiff:
+    """Compara un barrido -sn con el network_graph de un escaneo anterior"""
+
+    def __init__(self, previous_graph, source=''):
+        self.previous = previous_graph
+        self.source = source
+        self.added = []
+        self.removed = []
+        self.mac_changed = []
+        self.unchanged = []
+        self.ports_scanned = ports_scanned(previous_graph)
+
+    def changed_hosts(self, hosts, mapper, on_unchanged=None):
+        """Clasifica los hosts descubiertos y entrega solo los nuevos o con MAC distinta
+
+        Los hosts sin cambios heredan puertos y OS del escaneo anterior; si
+        aquel no escaneó puertos se entregan también, para escanearlos ahora.
+        """
+        seen = set()
+        for host in hosts:
+            ip = host['ip']
+            seen.add(ip)
+            previous = self.previous.nodes.get(ip) if ip in self.previous else None
+            if previous is not None and previous.get('traceroute_only'):
+                previous = None
+
+            if previous is None:
+                self.added.append(host)
+                yield host
+            elif previous.get('mac', 'Unknown') != host['mac']:
+                self.mac_changed.append((host, previous.get('mac', 'Unknown')))
+                yield host
+            elif not self.ports_scanned:
+                self.unchanged.append(host)
+                yield host
+            else:
+                self.unchanged.append(host)
+                mapper.update_host(host, {'ports': previous.get('ports', []),
+                                          'os': previous.get('os', 'Unknown')})
+                if on_unchanged is not None:
+                    on_unchanged(host)
+
+        # Los routers intermedios de traceroute no salen en el barrido -sn
+        self.removed = [dict(data, ip=ip) for ip, data in self.previous.nodes(data=True)
+                        if ip not in seen and not data.get('traceroute_only')]
+
+    def has_changes(self):
+        return bool(self.added or self.removed or self.mac_changed)
+
+    def generate_change_report(self, network_range, output_file="network_changes.txt"):
+        """Genera un TXT con los hosts añadidos, eliminados y con MAC cambiada"""
+        report_content = []
+        report_content.append("=" * 60)
+        report_content.append("         INFORME DE CAMBIOS - NETWORK MAPPER")
+        report_content.append("=" * 60)
+        report_content.append(f"Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        report_content.append(f"Red escaneada: {network_range}")
+        report_content.append(f"Comparado con: {self.source}")
+        report_content.append(f"Nuevos: {len(self.added)} | Eliminados: {len(self.removed)} | "
+                              f"MAC cambiada: {len(self.mac_changed)} | Sin cambios: {len(self.unchanged)}")
+        report_content.append("=" * 60)
+
+        report_content.append("\nHOSTS NUEVOS:")
+        report_content.append("-" * 60)
+        for host in self.added:
+            report_content.append(f"+ {host['ip']} - {host['hostname']} (MAC: {host['mac']}, {host['vendor']})")
+
+        report_content.append("\nHOSTS ELIMINADOS:")
+        report_content.append("-" * 60)
+        for host in self.removed:
+            report_content.append(f"- {host['ip']} - {host.get('hostname', host['ip'])} "
+                                  f"(MAC: {host.get('mac', 'Unknown')})")
+
+        report_content.append("\nMAC CAMBIADA:")
+        report_content.append("-" * 60)
+        for host, previous_mac in self.mac_changed:
+            report_content.append(f"~ {host['ip']} - {host['hostname']}: {previous_mac} -> {host['mac']}")
+
+        try:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(report_content))
+            logger.info(f"📄 Reporte de cambios guardado como: {output_file}")
+            return output_file
+        except Exception as e:
+            logger.error(f"❌ Error guardando reporte de cambios: {e}")
+            return None
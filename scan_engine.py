@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from dependencies import port_scanner
+from instrumentation import logger, metrics
+
+
+class RateLimiter:
+    """Limita cuántos escaneos se inician por segundo entre todos los workers"""
+
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0
+        self.lock = threading.Lock()
+        self.next_slot = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+
+        # Reservar el siguiente hueco libre y dormir fuera del lock
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class ConcurrentScanner:
+    """Escanea puertos y OS de varios hosts en paralelo"""
+
+    def __init__(self, mapper, workers=8, rate=None, batch_size=1, cache=None,
+                 scanner_factory=port_scanner, refresh=False):
+        self.mapper = mapper
+        self.cache = cache
+        # refresh: escanear aunque haya entrada vigente y guardar el resultado nuevo en la caché
+        self.refresh = refresh
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.rate_limiter = RateLimiter(rate)
+        self.scanner_factory = scanner_factory
+        self._local = threading.local()
+
+    def _get_scanner(self):
+        """Un PortScanner por hilo: self.mapper.nm no es seguro entre hilos"""
+        if getattr(self.mapper, 'port_backend', 'nmap') != 'nmap':
+            return None  # El backend tcp abre su propio bucle de eventos por llamada
+        if not hasattr(self._local, 'nm'):
+            self._local.nm = self.scanner_factory()
+        return self._local.nm
+
+    def _scan_one(self, ip, **timeouts):
+        self.rate_limiter.wait()
+        # Latencia por host sin contar la espera del limitador de ritmo
+        start = time.perf_counter()
+        try:
+            return self.mapper.scan_ports(ip, scanner=self._get_scanner(), **timeouts)
+        except Exception as e:
+            logger.warning(f"   ⚠️  Error en {ip}: {e}")
+            return {'ports': [], 'os': 'Unknown', 'error': str(e)}
+        finally:
+            metrics.observe('host_scan', time.perf_counter() - start)
+
+    def _scan_batch(self, ips, **timeouts):
+        """Un único proceso nmap para todo el lote (-sT -F -O)"""
+        self.rate_limiter.wait()
+        start = time.perf_counter()
+        try:
+            results = self.mapper.scan_ports_batch(ips, scanner=self._get_scanner(), **timeouts)
+        except Exception as e:
+            logger.warning(f"   ⚠️  Error en lote {ips[0]}...{ips[-1]}: {e}")
+            results = {}
+        # Cada host del lote ha esperado lo que tardó el lote entero
+        elapsed = time.perf_counter() - start
+        for _ in ips:
+            metrics.observe('host_scan', elapsed)
+        return [results.get(ip, {'ports': [], 'os': 'Unknown', 'error': 'sin resultado'}) for ip in ips]
+
+    def _submit(self, pool, ips):
+        if self.batch_size > 1:
+            return pool.submit(self._scan_batch, ips)
+        return pool.submit(lambda: [self._scan_one(ips[0])])
+
+    def _cached_result(self, host):
+        """Future ya resuelto con el resultado de la caché, o None si hay que escanear"""
+        if self.cache is None or self.refresh:
+            return None
+        cached = self.cache.get_scan(host['ip'], host.get('mac'))
+        if cached is None:
+            return None
+        future = Future()
+        future.set_result([cached])
+        return future
+
+    def scan_hosts(self, hosts, on_host=None):
+        """Escanea los hosts (lista o generador) y fusiona los resultados en orden de llegada
+
+        Con un generador como iter_discover_network, los primeros hosts se
+        escanean mientras los bloques siguientes todavía se están barriendo.
+        Los hosts con una entrada vigente en la caché no se vuelven a escanear.
+        on_host(host) se llama con cada host ya fusionado, en el orden de
+        entrada, en cuanto él y todos los anteriores han terminado.
+        """
+        logger.info(f"⚡ Escaneo concurrente: {self.workers} workers, lotes de {self.batch_size}")
+
+        scanned = []
+        slots = []    # (futuro, posición del host en el resultado del futuro, viene de caché)
+        pending = []  # índices en slots de los hosts que esperan a completar un lote
+        merged = 0    # hosts ya fusionados (siempre un prefijo de scanned)
+
+        def flush(pool):
+            future = self._submit(pool, [scanned[i]['ip'] for i in pending])
+            for position, index in enumerate(pending):
+                slots[index] = (future, position, False)
+            pending.clear()
+
+        def drain(wait):
+            # Fusionar desde el hilo principal y en orden para que sea determinista
+            nonlocal merged
+            while merged < len(slots) and slots[merged] is not None:
+                future, position, from_cache = slots[merged]
+                if not wait and not future.done():
+                    break
+                self._merge(scanned[merged], future.result()[position], from_cache)
+                slots[merged] = None
+                if on_host is not None:
+                    on_host(scanned[merged])
+                merged += 1
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for host in hosts:
+                scanned.append(host)
+                cached = self._cached_result(host)
+                if cached is not None:
+                    slots.append((cached, 0, True))
+                else:
+                    slots.append(None)
+                    pending.append(len(scanned) - 1)
+                    if len(pending) >= self.batch_size:
+                        flush(pool)
+                drain(wait=False)
+            if pending:
+                flush(pool)
+            drain(wait=True)
+
+        if self.cache is not None:
+            self.cache.commit()
+            logger.info(f"💾 Caché: {self.cache.hits} hosts reutilizados, {self.cache.misses} escaneados")
+
+        return scanned
+
+    def _merge(self, host, scan_result, from_cache):
+        self.mapper.update_host(host, scan_result)
+        # Un resultado vacío puede ser un timeout o un error: mejor reintentarlo
+        has_data = (scan_result['ports'] or scan_result['os'] != 'Unknown') and 'error' not in scan_result
+        if self.cache is not None and not from_cache and has_data:
+            self.cache.put_scan(host['ip'], host.get('mac'), scan_result)
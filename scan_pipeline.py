@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+
+from host_store import to_plain
+from instrumentation import logger, metrics
+from scan_engine import ConcurrentScanner
+
+# Prioridades de la cola de escaneo (menor = antes)
+GATEWAY, SERVER, OTHER, RETRY = range(4)
+_STOP = 99
+
+
+def host_priority(host):
+    """Gateways y routers primero, después servidores, después el resto"""
+    ip = host['ip']
+    hostname_lower = host.get('hostname', '').lower()
+    if ip.endswith('.1') or ip.endswith('.254') or 'router' in hostname_lower or 'gateway' in hostname_lower:
+        return GATEWAY
+    if 'server' in hostname_lower:
+        return SERVER
+    return OTHER
+
+
+def checkpoint_path(output_file):
+    return output_file.replace('.svg', '_checkpoint.jsonl')
+
+
+class AdaptiveTimeout:
+    """Estimador de timeout a partir de muestras de RTT (srtt + 4·rttvar, como TCP)"""
+
+    def __init__(self, initial, minimum, maximum):
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.srtt = None
+        self.rttvar = None
+        self.samples = 0
+        self.lock = threading.Lock()
+
+    def observe(self, sample):
+        with self.lock:
+            if self.srtt is None:
+                self.srtt = sample
+                self.rttvar = sample / 2
+            else:
+                self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - sample)
+                self.srtt = 0.875 * self.srtt + 0.125 * sample
+            self.samples += 1
+
+    def timeout(self, attempt=0):
+        """Timeout actual; cada reintento lo duplica (hasta el máximo)"""
+        with self.lock:
+            value = self.initial if self.srtt is None else self.srtt + 4 * self.rttvar
+        return min(self.maximum, max(self.minimum, value) * 2 ** attempt)
+
+
+class ScanCheckpoint:
+    """Progreso de una ejecución en JSON Lines para reanudarla tras una interrupción
+
+    Cada línea se escribe y se vuelca al disco en cuanto ocurre: hosts
+    descubiertos, fin del descubrimiento y resultados de puertos/OS.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.hosts = {}
+        self.scans = {}
+        self.discovery_done = False
+        self.f = None
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return self
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # Última línea a medio escribir
+                kind = record.pop('type')
+                if kind == 'host':
+                    self.hosts[record['ip']] = record
+                elif kind == 'scan':
+                    self.scans[record.pop('ip')] = record
+                elif kind == 'discovery_done':
+                    self.discovery_done = True
+        return self
+
+    def open(self, resume=False):
+        self.f = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+
+    def _write(self, record):
+        self.f.write(json.dumps(record, default=to_plain) + '\n')
+        self.f.flush()
+
+    def record_host(self, host):
+        if host['ip'] not in self.hosts:
+            self.hosts[host['ip']] = host
+            record = {'type': 'host'}
+            record.update(host.items())
+            self._write(record)
+
+    def record_scan(self, ip, scan_result):
+        self.scans[ip] = scan_result
+        self._write({'type': 'scan', 'ip': ip, 'ports': scan_result['ports'], 'os': scan_result['os']})
+
+    def record_discovery_done(self):
+        self.discovery_done = True
+        self._write({'type': 'discovery_done'})
+
+    def close(self):
+        if self.f is not None:
+            self.f.close()
+            self.f = None
+
+    def remove(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class ScanPipeline(ConcurrentScanner):
+    """Planificador por etapas con colas separadas: descubrimiento, puertos/OS y topología
+
+    - Descubrimiento: el generador de bloques se consume en el hilo principal
+      y cada host entra en la cola de escaneo en cuanto aparece.
+    - Puertos/OS: cola con prioridad (gateways, después servidores, después
+      el resto); los workers sacan lotes de ella, así un host lento no retrasa
+      a los que vienen detrás.
+    - Topología: su propio hilo, en cuanto termina el descubrimiento y en
+      paralelo con los escaneos que queden.
+    Los timeouts de nmap se adaptan a los RTT del barrido -sn
+    (--max-rtt-timeout) y a la duración de los escaneos ya terminados
+    (--host-timeout); el backend tcp conserva su --connect-timeout. Los
+    fallos vuelven a la cola con prioridad baja y el timeout duplicado
+    mientras el resto sigue avanzando.
+    """
+
+    def __init__(self, mapper, workers=8, rate=None, batch_size=1, cache=None,
+                 checkpoint=None, max_retries=2, host_timeout=120, **kwargs):
+        super().__init__(mapper, workers=workers, rate=rate, batch_size=batch_size, cache=cache, **kwargs)
+        self.checkpoint = checkpoint
+        self.max_retries = max_retries
+        self.rtt_timeout = AdaptiveTimeout(initial=None, minimum=0.25, maximum=10)
+        # El --host-timeout inicial es también el mínimo: un -O lento no se corta antes de reintentarlo
+        self.host_timeout = AdaptiveTimeout(initial=host_timeout, minimum=host_timeout,
+                                            maximum=max(600, host_timeout))
+        self.scan_queue = queue.PriorityQueue()
+        self.results = queue.Queue()
+        self.topology_queue = queue.Queue()
+        self.topology_result = None
+        # La topología y las fusiones escriben en el mismo network_graph
+        self.graph_lock = threading.Lock()
+        self.retried = 0
+        self._seq = itertools.count()
+        self._slots = []   # (resultado, viene de caché) de cada host, en orden de entrada
+        self._merged = 0   # hosts ya fusionados (siempre un prefijo de los descubiertos)
+
+    def _timeouts(self, attempt):
+        timeouts = {'host_timeout': self.host_timeout.timeout(attempt)}
+        if self.rtt_timeout.samples:
+            timeouts['rtt_timeout'] = self.rtt_timeout.timeout(attempt)
+        return timeouts
+
+    def _scan_worker(self):
+        while True:
+            item = self.scan_queue.get()
+            if item[0] == _STOP:
+                return
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self.scan_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item[0] == _STOP:
+                    self.scan_queue.put(item)
+                    break
+                batch.append(item)
+
+            timeouts = self._timeouts(max(attempt for _, _, attempt, _, _ in batch))
+            ips = [host['ip'] for _, _, _, _, host in batch]
+            start = time.monotonic()
+            try:
+                if len(batch) > 1:
+                    results = self._scan_batch(ips, **timeouts)
+                else:
+                    results = [self._scan_one(ips[0], **timeouts)]
+            except Exception as e:
+                # Sin resultado run() esperaría para siempre a estos hosts
+                logger.warning(f"   ⚠️  Error en el worker de escaneo ({ips[0]}...): {e}")
+                results = [{'ports': [], 'os': 'Unknown', 'error': str(e)} for _ in ips]
+            self.results.put((batch, results, time.monotonic() - start))
+
+    def _topology_worker(self):
+        job = self.topology_queue.get()
+        if job is not None:
+            try:
+                # Mientras tanto los escaneos siguen, pero sus resultados esperan para fusionarse
+                with self.graph_lock, metrics.timer('topology'):
+                    self.topology_result = job()
+            except Exception as e:
+                logger.error(f"❌ Error descubriendo topología: {e}")
+
+    def _enqueue(self, host, priority, attempt=0, index=None):
+        self.scan_queue.put((priority, next(self._seq), attempt, index, host))
+
+    def _finish(self, host, scan_result, on_host, from_cache=False):
+        if scan_result is not None:
+            self._merge(host, scan_result, from_cache)
+            if (self.checkpoint is not None and not from_cache and 'error' not in scan_result
+                    and host['ip'] not in self.checkpoint.scans):
+                self.checkpoint.record_scan(host['ip'], scan_result)
+        if on_host is not None:
+            on_host(host)
+
+    def _flush(self, scanned, on_host):
+        """Fusiona en orden de entrada los hosts cuyo resultado y el de todos los anteriores ya está
+
+        Como ConcurrentScanner.scan_hosts: exportadores, checkpoint y snapshot
+        no dependen de qué escaneo termine antes.
+        """
+        if self._merged >= len(self._slots) or self._slots[self._merged] is None:
+            return
+        with self.graph_lock:
+            while self._merged < len(self._slots) and self._slots[self._merged] is not None:
+                scan_result, from_cache = self._slots[self._merged]
+                self._slots[self._merged] = None, None
+                self._finish(scanned[self._merged], scan_result, on_host, from_cache)
+                self._merged += 1
+
+    def _drain(self, block):
+        """Recoge los resultados disponibles; devuelve cuántos hosts han terminado"""
+        finished = 0
+        while True:
+            try:
+                batch, results, elapsed = self.results.get(block=block)
+            except queue.Empty:
+                return finished
+            block = False
+            for (priority, _, attempt, index, host), scan_result in zip(batch, results):
+                if 'error' in scan_result and attempt < self.max_retries:
+                    self.retried += 1
+                    logger.info("   🔁 Reintentando %s (%s)", host['ip'], scan_result['error'],
+                                extra={'stage': 'port_scan', 'host': host['ip']})
+                    metrics.increment('scan_retries')
+                    self._enqueue(host, RETRY, attempt + 1, index)
+                    continue
+                if 'error' not in scan_result:
+                    # Tiempo por host: el lote entero comparte un proceso nmap
+                    self.host_timeout.observe(elapsed / len(batch))
+                self._slots[index] = (scan_result, False)
+                finished += 1
+
+    def run(self, hosts, on_host=None, topology=None, scan=True):
+        """Ejecuta las tres etapas; topology() se llama una vez con todos los hosts descubiertos
+
+        on_host(host) se llama con cada host ya fusionado, en el orden de entrada.
+        """
+        if scan:
+            logger.info(f"⚡ Pipeline: {self.workers} workers, lotes de {self.batch_size}, "
+                        f"hasta {self.max_retries} reintentos")
+        resumed = self.checkpoint.scans if self.checkpoint is not None else {}
+        host_rtts = getattr(self.mapper, 'host_rtts', {})
+
+        threads = [threading.Thread(target=self._scan_worker, daemon=True) for _ in range(self.workers if scan else 0)]
+        threads.append(threading.Thread(target=self._topology_worker, daemon=True))
+        for thread in threads:
+            thread.start()
+
+        scanned = []
+        self._slots = []
+        self._merged = 0
+        outstanding = 0
+        try:
+            for host in hosts:
+                index = len(scanned)
+                scanned.append(host)
+                self._slots.append(None)
+                if self.checkpoint is not None:
+                    self.checkpoint.record_host(host)
+                if host['ip'] in host_rtts:
+                    self.rtt_timeout.observe(host_rtts[host['ip']])
+
+                if not scan:
+                    self._slots[index] = (None, False)
+                elif host['ip'] in resumed:
+                    self._slots[index] = (resumed[host['ip']], False)
+                else:
+                    cached = self._cached_result(host)
+                    if cached is not None:
+                        self._slots[index] = (cached.result()[0], True)
+                    else:
+                        self._enqueue(host, host_priority(host), index=index)
+                        outstanding += 1
+                outstanding -= self._drain(block=False)
+                self._flush(scanned, on_host)
+
+            # Descubrimiento terminado: la topología arranca mientras siguen los escaneos
+            if self.checkpoint is not None:
+                self.checkpoint.record_discovery_done()
+            self.topology_queue.put(topology)
+
+            while outstanding:
+                outstanding -= self._drain(block=True)
+                self._flush(scanned, on_host)
+            self._flush(scanned, on_host)
+        finally:
+            # Tras una interrupción los workers no deben seguir con lo que quede en cola
+            while True:
+                try:
+                    self.scan_queue.get_nowait()
+                except queue.Empty:
+                    break
+            self.topology_queue.put(None)
+            for _ in threads:
+                self._enqueue(None, _STOP)
+
+        threads[-1].join()
+
+        if scan:
+            if self.retried:
+                logger.info(f"🔁 {self.retried} reintentos; --host-timeout final {self.host_timeout.timeout():.0f}s")
+            if self.cache is not None:
+                self.cache.commit()
+                logger.info(f"💾 Caché: {self.cache.hits} hosts reutilizados, {self.cache.misses} escaneados")
+
+        return scanned
@@ -6,7 +6,7 @@ python3 -m venv venv
 source venv/bin/activate
 
 # Instalar dependencias
-pip install python-nmap networkx matplotlib
+pip install python-nmap networkx matplotlib numpy
 
 echo "✅ Instalación completada"
 echo "🎯 Para usar: source venv/bin/activate && python3 auto_network_mapper.py"
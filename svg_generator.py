@@ -1,237 +1,347 @@
 #!/usr/bin/env python3
-import networkx as nx
-import matplotlib.pyplot as plt
+import logging
 from network_scanner import NetworkMapper
+from instrumentation import logger, metrics
+from scan_pipeline import ScanCheckpoint, ScanPipeline
+from scan_diff import NetworkDiff, load_snapshot, save_snapshot
+from diagram_style import diagram_title, edge_label, node_label, node_style
+from svg_writer import write_network_svg
+from clusters import ClusteredDiagram
+from exporters import ServiceSummary, open_exporters
 from datetime import datetime
 
+def render_matplotlib(graph, pos, output_file, title, scan_ports):
+    """Renderiza el grafo con matplotlib (más lento, pero con el aspecto original)"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import networkx as nx
+    
+    # Crear gráfico más grande para acomodar más información
+    plt.figure(figsize=(16, 12))
+    
+    # Colores y formas por tipo de dispositivo
+    node_colors = []
+    node_sizes = []
+    for node in graph.nodes():
+        color, size = node_style(graph.nodes[node])
+        node_colors.append(color)
+        node_sizes.append(size)
+    
+    # Dibujar nodos
+    nx.draw_networkx_nodes(graph, pos, 
+                          node_color=node_colors, 
+                          node_size=node_sizes,
+                          alpha=0.9,
+                          edgecolors='black',
+                          linewidths=2)
+    
+    # Dibujar conexiones con etiquetas
+    edge_labels = {}
+    for edge in graph.edges(data=True):
+        edge_labels[(edge[0], edge[1])] = edge_label(edge[2])
+    
+    nx.draw_networkx_edges(graph, pos, 
+                          alpha=0.6, 
+                          width=2,
+                          style='solid',
+                          edge_color='gray')
+    
+    nx.draw_networkx_edge_labels(graph, pos, 
+                               edge_labels=edge_labels,
+                               font_size=6)
+    
+    # Etiquetas MEJORADAS con toda la información
+    labels = {node: node_label(node, graph.nodes[node], scan_ports) for node in graph.nodes()}
+    
+    nx.draw_networkx_labels(graph, pos, labels, 
+                           font_size=6, 
+                           font_weight='bold',
+                           verticalalignment='top')
+    
+    plt.title(title, fontsize=14, pad=20)
+    plt.axis('off')
+    plt.tight_layout()
+    
+    plt.savefig(output_file, format='svg', bbox_inches='tight', dpi=150)
+    plt.close()
+    return output_file
+
+
 class SVGGenerator:
     def __init__(self):
         self.mapper = NetworkMapper()
         self.hosts = []  # Guardar hosts como atributo de clase
     
     def generate_text_report(self, network_range, scan_ports=False, output_file="network_report.txt"):
-        """Genera un archivo TXT con el resumen completo de la red"""
-        
-        report_content = []
-        report_content.append("=" * 60)
-        report_content.append("           INFORME DE RED - NETWORK MAPPER")
-        report_content.append("=" * 60)
-        report_content.append(f"Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        report_content.append(f"Red escaneada: {network_range}")
-        report_content.append(f"Hosts encontrados: {len(self.hosts)}")
-        report_content.append(f"Escaneo de puertos: {'SI' if scan_ports else 'NO'}")
-        report_content.append("=" * 60)
-        report_content.append("")
-        
-        # Resumen por host
-        report_content.append("DETALLE DE HOSTS:")
-        report_content.append("-" * 60)
-        
-        for i, host in enumerate(self.hosts, 1):
-            report_content.append(f"\n{i}. {host['hostname']}")
-            report_content.append(f"   IP: {host['ip']}")
-            report_content.append(f"   MAC: {host['mac']}")
-            report_content.append(f"   Fabricante: {host['vendor']}")
-            
-            if scan_ports:
-                report_content.append(f"   Sistema Operativo: {host.get('os', 'Unknown')}")
-                
-                if host['ports']:
-                    report_content.append(f"   PUERTOS ABIERTOS ({len(host['ports'])}):")
-                    for port_info in host['ports']:
-                        report_content.append(f"      {port_info['port']}/{port_info['protocol']} - {port_info['service']}")
-                else:
-                    report_content.append("   No se encontraron puertos abiertos")
+        """Genera un archivo TXT con el resumen completo de la red
         
-        # Resumen de servicios encontrados
-        if scan_ports:
-            report_content.append("\n" + "=" * 60)
-            report_content.append("RESUMEN DE SERVICIOS ENCONTRADOS:")
-            report_content.append("-" * 60)
-            
-            services_summary = {}
-            for host in self.hosts:
-                for port in host['ports']:
-                    service_key = f"{port['port']}/{port['service']}"
-                    if service_key not in services_summary:
-                        services_summary[service_key] = []
-                    services_summary[service_key].append(host['ip'])
-            
-            for service, hosts_with_service in services_summary.items():
-                report_content.append(f"{service}: {len(hosts_with_service)} hosts")
-                for host_ip in hosts_with_service[:3]:  # Mostrar primeros 3 hosts
-                    report_content.append(f"  - {host_ip}")
-                if len(hosts_with_service) > 3:
-                    report_content.append(f"  ... y {len(hosts_with_service) - 3} más")
-        
-        # Estadísticas generales
-        report_content.append("\n" + "=" * 60)
-        report_content.append("ESTADÍSTICAS:")
-        report_content.append("-" * 60)
-        
-        total_ports = sum(len(host['ports']) for host in self.hosts)
-        report_content.append(f"Total de hosts: {len(self.hosts)}")
-        report_content.append(f"Total de puertos abiertos: {total_ports}")
-        
-        if self.hosts:
-            # Hosts con más puertos abiertos
-            hosts_sorted = sorted(self.hosts, key=lambda x: len(x['ports']), reverse=True)
-            report_content.append(f"Host con más puertos: {hosts_sorted[0]['ip']} ({len(hosts_sorted[0]['ports'])} puertos)")
-        
-        # Conexiones de red
-        report_content.append(f"Conexiones detectadas: {len(self.mapper.network_graph.edges())}")
-        
-        # Guardar archivo
+        Se escribe en streaming: el detalle de cada host, el resumen de
+        servicios y las estadísticas salen de una sola pasada por self.hosts.
+        """
         try:
             with open(output_file, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(report_content))
-            print(f"📄 Reporte TXT guardado como: {output_file}")
+                def write(line):
+                    f.write(line + '\n')
+                
+                write("=" * 60)
+                write("           INFORME DE RED - NETWORK MAPPER")
+                write("=" * 60)
+                write(f"Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                write(f"Red escaneada: {network_range}")
+                write(f"Hosts encontrados: {len(self.hosts)}")
+                write(f"Escaneo de puertos: {'SI' if scan_ports else 'NO'}")
+                write("=" * 60)
+                write("")
+                
+                # Resumen por host
+                write("DETALLE DE HOSTS:")
+                write("-" * 60)
+                
+                services_summary = ServiceSummary()
+                total_ports = 0
+                top_host = None
+                
+                for i, host in enumerate(self.hosts, 1):
+                    write(f"\n{i}. {host['hostname']}")
+                    write(f"   IP: {host['ip']}")
+                    write(f"   MAC: {host['mac']}")
+                    write(f"   Fabricante: {host['vendor']}")
+                    
+                    if scan_ports:
+                        write(f"   Sistema Operativo: {host.get('os', 'Unknown')}")
+                        
+                        if host['ports']:
+                            write(f"   PUERTOS ABIERTOS ({len(host['ports'])}):")
+                            for port_info in host['ports']:
+                                write(f"      {port_info['port']}/{port_info['protocol']} - {port_info['service']}")
+                        else:
+                            write("   No se encontraron puertos abiertos")
+                    
+                    services_summary.add_host(host)
+                    total_ports += len(host['ports'])
+                    if top_host is None or len(host['ports']) > len(top_host['ports']):
+                        top_host = host
+                
+                # Resumen de servicios encontrados
+                if scan_ports:
+                    write("\n" + "=" * 60)
+                    write("RESUMEN DE SERVICIOS ENCONTRADOS:")
+                    write("-" * 60)
+                    
+                    for service, host_count, sample in services_summary.items():
+                        write(f"{service}: {host_count} hosts")
+                        for host_ip in sample:  # Mostrar primeros 3 hosts
+                            write(f"  - {host_ip}")
+                        if host_count > len(sample):
+                            write(f"  ... y {host_count - len(sample)} más")
+                
+                # Estadísticas generales
+                write("\n" + "=" * 60)
+                write("ESTADÍSTICAS:")
+                write("-" * 60)
+                
+                write(f"Total de hosts: {len(self.hosts)}")
+                write(f"Total de puertos abiertos: {total_ports}")
+                
+                if top_host is not None:
+                    # Hosts con más puertos abiertos
+                    write(f"Host con más puertos: {top_host['ip']} ({len(top_host['ports'])} puertos)")
+                
+                # Conexiones de red
+                f.write(f"Conexiones detectadas: {len(self.mapper.network_graph.edges())}")
+            
+            logger.info(f"📄 Reporte TXT guardado como: {output_file}")
             return output_file
         except Exception as e:
-            print(f"❌ Error guardando reporte TXT: {e}")
+            logger.error(f"❌ Error guardando reporte TXT: {e}")
             return None
 
-    def generate_network_svg(self, network_range="192.168.1.0/24", output_file="network_diagram.svg", scan_ports=False):
-        # Descubrir hosts y guardarlos como atributo
-        self.hosts = self.mapper.discover_network(network_range)
+    def write_outputs(self, network_range, output_file, scan_ports=False, renderer='svg', layout='auto',
+                      layout_cache=True, cluster_by=None, cluster_prefix=24):
+        """Diagrama (o vista agrupada), reporte TXT y snapshot a partir del grafo actual
         
-        if not self.hosts:
-            print("❌ No se encontraron hosts activos")
-            return None
-            
-        # Escanear puertos y OS si está activado
-        if scan_ports:
-            print("🔦 Escaneo de puertos y OS activado")
-            for host in self.hosts:
-                try:
-                    scan_result = self.mapper.scan_ports(host['ip'])
-                    host['ports'] = scan_result['ports']
-                    host['os'] = scan_result['os']
-                    host['services'] = scan_result['ports']  # Para compatibilidad
-                except Exception as e:
-                    print(f"   ⚠️  Error en {host['ip']}: {e}")
-                    host['ports'] = []
-                    host['os'] = 'Unknown'
-                    host['services'] = []
+        generate_network_svg la llama al final del escaneo; el modo daemon, solo
+        cuando la red ha cambiado.
+        """
+        # Diseño del gráfico: parte de las posiciones de la ejecución anterior
+        # para que el diagrama sea estable entre escaneos
+        layout_file = output_file.replace('.svg', '_layout.json') if layout_cache else None
+        
+        if cluster_by:
+            # Vista general agrupada: un nodo por clúster; los detalles se generan
+            # bajo demanda con --cluster-detail a partir del snapshot
+            diagram = ClusteredDiagram(self.mapper.network_graph, cluster_by, output_file,
+                                       cluster_prefix, scan_ports)
+            clusters = diagram.cluster_graph()
+            cluster_layout_file = output_file.replace('.svg', '_cluster_layout.json') if layout_cache else None
+            with metrics.timer('layout'):
+                from layouts import compute_layout
+                pos = compute_layout(clusters, layout, cluster_layout_file)
+            with metrics.timer('render'):
+                diagram.write_overview(clusters, pos, network_range)
+            logger.info(f"✅ Vista general con {clusters.number_of_nodes()} clústeres guardada como: {output_file}")
         else:
-            print("🔦 Escaneo de puertos desactivado")
-            for host in self.hosts:
-                host['ports'] = []
-                host['os'] = 'Unknown'
-                host['services'] = []
+            with metrics.timer('layout'):
+                # numpy solo se carga al llegar al layout
+                from layouts import compute_layout
+                pos = compute_layout(self.mapper.network_graph, layout, layout_file)
+            
+            # Título informativo
+            connection_count = len(self.mapper.network_graph.edges())
+            title = diagram_title(network_range, len(self.hosts), connection_count, scan_ports)
+            
+            # Guardar como SVG
+            with metrics.timer('render'):
+                if renderer == 'matplotlib':
+                    render_matplotlib(self.mapper.network_graph, pos, output_file, title, scan_ports)
+                else:
+                    write_network_svg(self.mapper.network_graph, pos, output_file, title, scan_ports)
+            logger.info(f"✅ Diagrama SVG guardado como: {output_file}")
         
-        # Descubrir conexiones
-        connection_count = self.mapper.discover_connections(self.hosts)
-        print(f"🔗 {connection_count} conexiones descubiertas")
+        # GENERAR ARCHIVO TXT (NUEVO)
+        txt_output = output_file.replace('.svg', '_report.txt')
+        with metrics.timer('report'):
+            self.generate_text_report(network_range, scan_ports, txt_output)
         
-        # Crear gráfico más grande para acomodar más información
-        plt.figure(figsize=(16, 12))
+        # Snapshot del grafo para --diff-against en la próxima ejecución
+        with metrics.timer('snapshot'):
+            save_snapshot(self.mapper.network_graph, output_file.replace('.svg', '_graph.json'), scan_ports)
         
-        # Diseño del gráfico mejorado
-        pos = nx.spring_layout(self.mapper.network_graph, k=2, iterations=100)
+        return output_file
+
+    def generate_network_svg(self, network_range="192.168.1.0/24", output_file="network_diagram.svg", scan_ports=False,
+                             workers=8, rate=None, batch_size=1, block_prefix=24, discovery_workers=4,
+                             cache=None, diff_against=None, renderer='svg', layout='auto',
+                             layout_cache=True, topology='gateway', export_formats=(),
+                             checkpoint_file=None, resume=False, coordinator=None,
+                             cluster_by=None, cluster_prefix=24, xml_files=()):
+        # Descubrir hosts por bloques; con --scan-ports el escaneo de puertos
+        # arranca con los primeros hosts sin esperar al barrido completo
+        self.hosts = []
         
-        # Colores y formas por tipo de dispositivo
-        node_colors = []
-        node_sizes = []
+        # Checkpoint de la ejecución: con resume se reutiliza lo ya hecho
+        checkpoint = None
+        if checkpoint_file:
+            checkpoint = ScanCheckpoint(checkpoint_file)
+            if resume:
+                checkpoint.load()
+                logger.info(f"♻️  Reanudando desde {checkpoint_file}: {len(checkpoint.hosts)} hosts, "
+                            f"{len(checkpoint.scans)} ya escaneados")
         
-        for node in self.mapper.network_graph.nodes():
-            host_data = self.mapper.network_graph.nodes[node]
-            hostname_lower = host_data.get('hostname', '').lower()
-            
-            if 'router' in hostname_lower or 'gateway' in hostname_lower:
-                node_colors.append('red')
-                node_sizes.append(1500)
-            elif 'server' in hostname_lower:
-                node_colors.append('orange')
-                node_sizes.append(1300)
-            elif 'switch' in hostname_lower or 'ap' in hostname_lower:
-                node_colors.append('green')
-                node_sizes.append(1200)
-            else:
-                node_colors.append('lightblue')
-                node_sizes.append(1000)
-        
-        # Dibujar nodos
-        nx.draw_networkx_nodes(self.mapper.network_graph, pos, 
-                              node_color=node_colors, 
-                              node_size=node_sizes,
-                              alpha=0.9,
-                              edgecolors='black',
-                              linewidths=2)
-        
-        # Dibujar conexiones con etiquetas
-        edge_labels = {}
-        for edge in self.mapper.network_graph.edges(data=True):
-            edge_labels[(edge[0], edge[1])] = edge[2].get('connection', 'direct')
-        
-        nx.draw_networkx_edges(self.mapper.network_graph, pos, 
-                              alpha=0.6, 
-                              width=2,
-                              style='solid',
-                              edge_color='gray')
-        
-        nx.draw_networkx_edge_labels(self.mapper.network_graph, pos, 
-                                   edge_labels=edge_labels,
-                                   font_size=6)
-        
-        # Etiquetas MEJORADAS con toda la información
-        labels = {}
-        for node in self.mapper.network_graph.nodes():
-            host_data = self.mapper.network_graph.nodes[node]
+        def restore(hosts):
+            # Descubrimiento ya completo en el checkpoint: no se repite el barrido
+            for host in hosts:
+                self.mapper.network_graph.add_node(host['ip'], **host)
+                yield self.mapper.network_graph.nodes[host['ip']]
+        
+        def collect(hosts):
+            for host in hosts:
+                # Completar nombres y fabricantes con la caché de ejecuciones anteriores
+                if cache is not None:
+                    cache.merge_discovery(host)
+                self.hosts.append(host)
+                yield host
+        
+        def export_host(host):
+            for exporter in exporters:
+                exporter.write_host(host)
+        
+        if xml_files:
+            # Mapa desde XML guardados de nmap: ni barrido ni escaneo de puertos
+            imported = self.mapper.import_nmap_xml(xml_files)
+            scan_ports = scan_ports or any(host['ports'] or host['os'] != 'Unknown' for host in imported)
+            discovered = collect(iter(imported))
+        elif checkpoint is not None and checkpoint.discovery_done:
+            discovered = collect(restore(list(checkpoint.hosts.values())))
+        elif coordinator is not None:
+            # Modo distribuido: los workers barren y escanean, aquí solo se fusiona
+            discovered = collect(coordinator.iter_hosts())
+        else:
+            discovered = collect(self.mapper.iter_discover_network(network_range, block_prefix=block_prefix,
+                                                                   workers=discovery_workers))
+        
+        def discover_connections():
+            if topology == 'traceroute':
+                return self.mapper.discover_topology(self.hosts, workers=workers)
+            return self.mapper.discover_connections(self.hosts)
+        
+        # Modo diferencial: solo se escanean los hosts nuevos o con MAC distinta,
+        # el resto hereda puertos y OS del escaneo anterior
+        diff = None
+        if diff_against:
+            logger.info(f"🔁 Comparando con escaneo anterior: {diff_against}")
+            diff = NetworkDiff(load_snapshot(diff_against), diff_against)
+            discovered = diff.changed_hosts(discovered, self.mapper, on_unchanged=export_host)
+            scan_ports = True
+        
+        # Los exportadores reciben cada host en cuanto está completo
+        exporters = open_exporters(export_formats, output_file)
+        if checkpoint is not None:
+            checkpoint.open(resume)
+        try:
+            # Descubrimiento, puertos/OS y topología en etapas con colas propias;
+            # las conexiones se buscan en cuanto termina el descubrimiento
+            logger.info(f"🔦 Escaneo de puertos y OS {'activado' if scan_ports else 'desactivado'}")
+            pipeline = ScanPipeline(self.mapper, workers=workers, rate=rate,
+                                    batch_size=batch_size, cache=cache, checkpoint=checkpoint)
+            with metrics.timer('scan_pipeline'):
+                pipeline.run(discovered, on_host=export_host, topology=discover_connections,
+                             scan=scan_ports and coordinator is None and not xml_files)
             
-            # Construir etiqueta con toda la información
-            label = f"{host_data.get('hostname', node)}\n"
-            label += f"IP: {node}\n"
+            if cache is not None:
+                cache.commit()
             
-            if host_data.get('mac', 'Unknown') != 'Unknown':
-                label += f"MAC: {host_data['mac'][:8]}...\n"
+            if diff is not None:
+                logger.info(f"🔁 Cambios: {len(diff.added)} nuevos, {len(diff.removed)} eliminados, "
+                            f"{len(diff.mac_changed)} con MAC cambiada, {len(diff.unchanged)} sin cambios")
+                diff.generate_change_report(network_range, output_file.replace('.svg', '_changes.txt'))
             
-            if scan_ports and host_data.get('os', 'Unknown') != 'Unknown':
-                label += f"OS: {host_data['os']}\n"
+            logger.info(f"✅ Encontrados {len(self.hosts)} hosts activos")
+            if not self.hosts:
+                logger.error("❌ No se encontraron hosts activos")
+                return None
             
-            if scan_ports and host_data.get('ports'):
-                ports_text = ", ".join([str(p['port']) for p in host_data['ports'][:5]])
-                if len(host_data['ports']) > 5:
-                    ports_text += f"... (+{len(host_data['ports'])-5})"
-                label += f"Puertos: {ports_text}"
+            connection_count = len(self.mapper.network_graph.edges())
+            logger.info(f"🔗 {connection_count} conexiones descubiertas")
             
-            labels[node] = label
-        
-        nx.draw_networkx_labels(self.mapper.network_graph, pos, labels, 
-                               font_size=6, 
-                               font_weight='bold',
-                               verticalalignment='top')
+            # Routers que solo aparecieron en traceroute, y después las conexiones
+            if exporters:
+                with metrics.timer('export'):
+                    for node, host_data in self.mapper.network_graph.nodes(data=True):
+                        if host_data.get('traceroute_only'):
+                            export_host(host_data)
+                    for source, target, edge_data in self.mapper.network_graph.edges(data=True):
+                        for exporter in exporters:
+                            exporter.write_edge(source, target, edge_data)
+        finally:
+            with metrics.timer('export'):
+                for exporter in exporters:
+                    exporter.close()
+            if checkpoint is not None:
+                checkpoint.close()
         
-        # Título informativo
-        title = f"Mapa de Red - {network_range}\n"
-        title += f"{len(self.hosts)} dispositivos | {connection_count} conexiones"
-        if scan_ports:
-            title += " | Con escaneo de puertos y OS"
+        self.write_outputs(network_range, output_file, scan_ports, renderer=renderer, layout=layout,
+                           layout_cache=layout_cache, cluster_by=cluster_by, cluster_prefix=cluster_prefix)
         
-        plt.title(title, fontsize=14, pad=20)
-        plt.axis('off')
-        plt.tight_layout()
+        # Ejecución completa: el checkpoint ya no hace falta
+        if checkpoint is not None:
+            checkpoint.remove()
         
-        # Guardar como SVG
-        plt.savefig(output_file, format='svg', bbox_inches='tight', dpi=150)
-        print(f"✅ Diagrama SVG guardado como: {output_file}")
-        
-        # GENERAR ARCHIVO TXT (NUEVO)
-        txt_output = output_file.replace('.svg', '_report.txt')
-        self.generate_text_report(network_range, scan_ports, txt_output)
-        
-        # Mostrar información detallada en consola
-        print(f"\n📊 RESUMEN DETALLADO:")
+        # Mostrar información detallada en consola (con --quiet ni se recorre)
+        if not logger.isEnabledFor(logging.INFO):
+            return output_file
+        logger.info(f"\n📊 RESUMEN DETALLADO:")
         for i, host in enumerate(self.hosts, 1):
-            print(f"\n   {i}. {host['ip']} - {host['hostname']}")
-            print(f"      MAC: {host['mac']}")
+            logger.info(f"\n   {i}. {host['ip']} - {host['hostname']}")
+            logger.info(f"      MAC: {host['mac']}")
             if scan_ports:
-                print(f"      OS: {host['os']}")
+                logger.info(f"      OS: {host['os']}")
                 if host['ports']:
-                    print(f"      Puertos abiertos:")
+                    logger.info(f"      Puertos abiertos:")
                     for port in host['ports'][:8]:
-                        print(f"        {port['port']}/{port['protocol']}: {port['service']}")
+                        logger.info(f"        {port['port']}/{port['protocol']}: {port['service']}")
                 else:
-                    print(f"      No se encontraron puertos abiertos")
+                    logger.info(f"      No se encontraron puertos abiertos")
         
         return output_file
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+import math
+from xml.sax.saxutils import escape, quoteattr
+
+from diagram_style import ROLE_STYLES, device_role, edge_label, node_label, node_style
+
+# Colores con nombre que usa diagram_style, en hexadecimal para el SVG
+COLORS = {
+    'red': '#ff0000',
+    'orange': '#ffa500',
+    'green': '#008000',
+    'lightblue': '#add8e6',
+    'gray': '#808080',
+    'black': '#000000',
+}
+
+
+class SVGWriter:
+    """Escribe primitivas SVG directamente al archivo, sin construir el documento en memoria"""
+
+    def __init__(self, output_file, width, height):
+        self.output_file = output_file
+        self.width = width
+        self.height = height
+        self.f = None
+
+    def __enter__(self):
+        self.f = open(self.output_file, 'w', encoding='utf-8', buffering=1 << 16)
+        self.f.write('<?xml version="1.0" encoding="utf-8"?>\n')
+        self.f.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{self.width}" height="{self.height}" '
+                     f'viewBox="0 0 {self.width} {self.height}" font-family="DejaVu Sans, sans-serif">\n')
+        self.f.write(f'<rect width="{self.width}" height="{self.height}" fill="#ffffff"/>\n')
+        return self
+
+    def __exit__(self, *exc):
+        self.f.write('</svg>\n')
+        self.f.close()
+
+    def open_group(self, **attrs):
+        attr_text = ''.join(f' {key.replace("_", "-")}={quoteattr(str(value))}' for key, value in attrs.items())
+        self.f.write(f'<g{attr_text}>\n')
+
+    def close_group(self):
+        self.f.write('</g>\n')
+
+    def open_link(self, href, tooltip=None):
+        """Enlace a otro archivo; lo que se escriba hasta close_link() es clicable"""
+        self.f.write(f'<a href={quoteattr(href)}>\n')
+        if tooltip:
+            self.f.write(f'<title>{escape(tooltip)}</title>\n')
+
+    def close_link(self):
+        self.f.write('</a>\n')
+
+    def line(self, x1, y1, x2, y2, stroke_width=None):
+        width_attr = f' stroke-width="{stroke_width:.1f}"' if stroke_width is not None else ''
+        self.f.write(f'<line x1="{x1:.1f}" y1="{y1:.1f}" x2="{x2:.1f}" y2="{y2:.1f}"{width_attr}/>\n')
+
+    def circle(self, x, y, r, fill):
+        self.f.write(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="{r:.1f}" fill="{fill}"/>\n')
+
+    def text(self, x, y, text, line_height=None):
+        """Texto de una o varias líneas (una <tspan> por línea)"""
+        lines = text.rstrip('\n').split('\n')
+        if len(lines) == 1 or line_height is None:
+            self.f.write(f'<text x="{x:.1f}" y="{y:.1f}">{escape(text)}</text>\n')
+            return
+        self.f.write(f'<text x="{x:.1f}" y="{y:.1f}">')
+        for i, line in enumerate(lines):
+            dy = 0 if i == 0 else line_height
+            self.f.write(f'<tspan x="{x:.1f}" dy="{dy}">{escape(line)}</tspan>')
+        self.f.write('</text>\n')
+
+
+def canvas_transform(pos, width, height, margin=80, top=80):
+    """Función nodo -> (x, y) que escala las posiciones del layout al lienzo (top: espacio del título)"""
+    xs = [p[0] for p in pos.values()]
+    ys = [p[1] for p in pos.values()]
+    min_x, max_x = min(xs), max(xs)
+    min_y, max_y = min(ys), max(ys)
+    scale_x = (width - 2 * margin) / ((max_x - min_x) or 1)
+    scale_y = (height - top - 2 * margin) / ((max_y - min_y) or 1)
+
+    def to_canvas(node):
+        x, y = pos[node]
+        # En el layout y crece hacia arriba, en SVG hacia abajo
+        return margin + (x - min_x) * scale_x, top + margin + (max_y - y) * scale_y
+    return to_canvas
+
+
+def write_network_svg(graph, pos, output_file, title, scan_ports, width=1600, height=1200, max_labels=None):
+    """Renderiza el grafo a SVG en streaming con las mismas reglas que el modo matplotlib
+
+    Con más de max_labels hosts (nivel de detalle) solo se etiquetan routers,
+    servidores y switches, y las conexiones van sin etiqueta.
+    """
+    to_canvas = canvas_transform(pos, width, height)
+    all_labels = max_labels is None or graph.number_of_nodes() <= max_labels
+
+    with SVGWriter(output_file, width, height) as svg:
+        # Título
+        svg.open_group(font_size=14, text_anchor='middle')
+        svg.text(width / 2, 30, title, line_height=18)
+        svg.close_group()
+
+        # Conexiones
+        svg.open_group(stroke=COLORS['gray'], stroke_width=2, stroke_opacity=0.6)
+        for u, v in graph.edges():
+            x1, y1 = to_canvas(u)
+            x2, y2 = to_canvas(v)
+            svg.line(x1, y1, x2, y2)
+        svg.close_group()
+
+        # Nodos (el tamaño es un área en puntos², igual que node_size de matplotlib)
+        svg.open_group(stroke=COLORS['black'], stroke_width=2, fill_opacity=0.9)
+        for node, host_data in graph.nodes(data=True):
+            color, size = node_style(host_data)
+            x, y = to_canvas(node)
+            svg.circle(x, y, math.sqrt(size) / 2, COLORS[color])
+        svg.close_group()
+
+        # Etiquetas de conexiones
+        if all_labels:
+            svg.open_group(font_size=6, text_anchor='middle', fill=COLORS['black'])
+            for u, v, edge_data in graph.edges(data=True):
+                x1, y1 = to_canvas(u)
+                x2, y2 = to_canvas(v)
+                svg.text((x1 + x2) / 2, (y1 + y2) / 2, edge_label(edge_data))
+            svg.close_group()
+
+        # Etiquetas de hosts, debajo del centro del nodo
+        svg.open_group(font_size=6, font_weight='bold', text_anchor='middle', fill=COLORS['black'])
+        for node, host_data in graph.nodes(data=True):
+            if all_labels or device_role(host_data) != 'host':
+                x, y = to_canvas(node)
+                svg.text(x, y + 6, node_label(node, host_data, scan_ports), line_height=7)
+        svg.close_group()
+
+    return output_file
+
+
+def write_cluster_svg(cluster_graph, pos, output_file, title, width=1600, height=1200):
+    """Vista general de un ClusteredDiagram: un nodo por clúster, con enlace a su detalle
+
+    El tamaño del nodo crece con la raíz del número de hosts (acotado) y el
+    color es el del dispositivo más importante que contiene.
+    """
+    to_canvas = canvas_transform(pos, width, height)
+
+    with SVGWriter(output_file, width, height) as svg:
+        svg.open_group(font_size=14, text_anchor='middle')
+        svg.text(width / 2, 30, title, line_height=18)
+        svg.close_group()
+
+        # Conexiones entre clústeres, más gruesas cuantas más conexiones agrupan
+        svg.open_group(stroke=COLORS['gray'], stroke_opacity=0.6)
+        for u, v, edge_data in cluster_graph.edges(data=True):
+            x1, y1 = to_canvas(u)
+            x2, y2 = to_canvas(v)
+            svg.line(x1, y1, x2, y2, stroke_width=min(2 + math.log2(edge_data['links']), 10))
+        svg.close_group()
+
+        svg.open_group(font_size=8, text_anchor='middle', fill=COLORS['black'])
+        for u, v, edge_data in cluster_graph.edges(data=True):
+            x1, y1 = to_canvas(u)
+            x2, y2 = to_canvas(v)
+            links = edge_data['links']
+            svg.text((x1 + x2) / 2, (y1 + y2) / 2, f"{links} conexión" if links == 1 else f"{links} conexiones")
+        svg.close_group()
+
+        # Clústeres: círculo y etiqueta dentro de un enlace al SVG de detalle
+        for cluster, data in cluster_graph.nodes(data=True):
+            x, y = to_canvas(cluster)
+            color = next(ROLE_STYLES[role][0] for role in ROLE_STYLES if data['roles'].get(role))
+            svg.open_link(data['detail'], f"{cluster}: {data['count']} hosts (clic para ver el detalle)")
+            svg.open_group(stroke=COLORS['black'], stroke_width=2, fill_opacity=0.9)
+            svg.circle(x, y, min(12 + 4 * math.sqrt(data['count']), 60), COLORS[color])
+            svg.close_group()
+            svg.open_group(font_size=9, font_weight='bold', text_anchor='middle', fill=COLORS['black'])
+            svg.text(x, y - 4, data['label'], line_height=11)
+            svg.close_group()
+            svg.close_link()
+
+    return output_file
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+import asyncio
+import threading
+import time
+from collections import deque
+
+# Los 100 puertos TCP de nmap -F, con el nombre de servicio de nmap-services
+TOP_PORTS = {
+    7: 'echo', 9: 'discard', 13: 'daytime', 21: 'ftp', 22: 'ssh', 23: 'telnet', 25: 'smtp',
+    26: 'rsftp', 37: 'time', 53: 'domain', 79: 'finger', 80: 'http', 81: 'hosts2-ns',
+    88: 'kerberos-sec', 106: 'pop3pw', 110: 'pop3', 111: 'rpcbind', 113: 'ident', 119: 'nntp',
+    135: 'msrpc', 139: 'netbios-ssn', 143: 'imap', 144: 'news', 179: 'bgp', 199: 'smux',
+    389: 'ldap', 427: 'svrloc', 443: 'https', 444: 'snpp', 445: 'microsoft-ds', 465: 'smtps',
+    513: 'login', 514: 'shell', 515: 'printer', 543: 'klogin', 544: 'kshell', 548: 'afp',
+    554: 'rtsp', 587: 'submission', 631: 'ipp', 646: 'ldp', 873: 'rsync', 990: 'ftps',
+    993: 'imaps', 995: 'pop3s', 1025: 'NFS-or-IIS', 1026: 'LSA-or-nterm', 1027: 'IIS',
+    1028: 'unknown', 1029: 'ms-lsa', 1110: 'nfsd-status', 1433: 'ms-sql-s', 1720: 'h323q931',
+    1723: 'pptp', 1755: 'wms', 1900: 'upnp', 2000: 'cisco-sccp', 2001: 'dc', 2049: 'nfs',
+    2121: 'ccproxy-ftp', 2717: 'pn-requester', 3000: 'ppp', 3128: 'squid-http', 3306: 'mysql',
+    3389: 'ms-wbt-server', 3986: 'mapper-ws_ethd', 4899: 'radmin', 5000: 'upnp',
+    5009: 'airport-admin', 5051: 'ida-agent', 5060: 'sip', 5101: 'admdog', 5190: 'aol',
+    5357: 'wsdapi', 5432: 'postgresql', 5631: 'pcanywheredata', 5666: 'nrpe', 5800: 'vnc-http',
+    5900: 'vnc', 6000: 'X11', 6001: 'X11:1', 6646: 'unknown', 7070: 'realserver',
+    8000: 'http-alt', 8008: 'http', 8009: 'ajp13', 8080: 'http-proxy', 8081: 'blackice-icecap',
+    8443: 'https-alt', 8888: 'sun-answerbook', 9100: 'jetdirect', 9999: 'abyss',
+    10000: 'snet-sensor-mgmt', 32768: 'filenet-tms', 49152: 'unknown', 49153: 'unknown',
+    49154: 'unknown', 49155: 'unknown', 49156: 'unknown', 49157: 'unknown',
+}
+
+
+class AsyncRateLimiter:
+    """Como scan_engine.RateLimiter pero esperando con asyncio.sleep
+
+    El hueco se reserva bajo un threading.Lock, así que un mismo limitador
+    vale para varios bucles de eventos (uno por worker de ConcurrentScanner).
+    """
+
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0
+        self.lock = threading.Lock()
+        self.next_slot = time.monotonic()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class SharedConnectionLimit:
+    """Límite de conexiones abiertas a la vez entre todos los bucles de eventos del proceso
+
+    asyncio.Semaphore solo vale dentro de un bucle, y ConcurrentScanner abre
+    uno por worker: con un semáforo por llamada habría workers × límite
+    sockets abiertos. Aquí el contador está bajo un threading.Lock y quien
+    libera un hueco se lo pasa al primero que espera, en el bucle de este.
+    """
+
+    def __init__(self, limit):
+        self.available = max(1, limit)
+        self.lock = threading.Lock()
+        self.waiters = deque()
+
+    async def __aenter__(self):
+        with self.lock:
+            if self.available:
+                self.available -= 1
+                return
+            future = asyncio.get_running_loop().create_future()
+            self.waiters.append(future)
+        await future
+
+    async def __aexit__(self, *exc):
+        self.release()
+
+    def release(self):
+        with self.lock:
+            if not self.waiters:
+                self.available += 1
+                return
+            future = self.waiters.popleft()
+        future.get_loop().call_soon_threadsafe(self._hand_over, future)
+
+    def _hand_over(self, future):
+        # Un sondeo cancelado mientras esperaba pasa el hueco al siguiente
+        if future.done():
+            self.release()
+        else:
+            future.set_result(None)
+
+
+class AsyncTCPScanner:
+    """Escaneo TCP connect en proceso con asyncio, alternativa a nmap -sT -F
+
+    - concurrency: conexiones abiertas a la vez en total, entre todas las
+      llamadas concurrentes (los workers de ConcurrentScanner/ScanPipeline)
+    - per_host_concurrency: conexiones abiertas a la vez contra un mismo host
+    - rate / per_host_rate: conexiones iniciadas por segundo, en total y por host
+    - timeout: segundos de espera del connect antes de dar el puerto por filtrado
+    - retries: reintentos de un connect que agota el timeout (un bucle muy
+      cargado también puede agotarlo), como las retransmisiones de nmap
+    No detecta el sistema operativo: 'os' siempre es 'Unknown'.
+    """
+
+    def __init__(self, ports=None, concurrency=500, per_host_concurrency=100,
+                 rate=None, per_host_rate=None, timeout=1.0, retries=1):
+        self.ports = sorted(ports) if ports else sorted(TOP_PORTS)
+        self.concurrency = concurrency
+        self.connection_limit = SharedConnectionLimit(concurrency)
+        self.per_host_concurrency = per_host_concurrency
+        self.rate_limiter = AsyncRateLimiter(rate)
+        self.per_host_rate = per_host_rate
+        self.timeout = timeout
+        self.retries = retries
+
+    async def _probe(self, ip, port, host_sem, host_limiter, timeout):
+        # Primero el límite del host: esperar por él no debe ocupar un hueco global
+        async with host_sem, self.connection_limit:
+            for _ in range(self.retries + 1):
+                await self.rate_limiter.wait()
+                await host_limiter.wait()
+                try:
+                    _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+                    break
+                except asyncio.TimeoutError:
+                    continue
+                except OSError:
+                    return False  # Conexión rechazada o host inalcanzable
+            else:
+                return False
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+            return True
+
+    async def _scan_host(self, ip, timeout):
+        host_sem = asyncio.Semaphore(self.per_host_concurrency)
+        host_limiter = AsyncRateLimiter(self.per_host_rate)
+        states = await asyncio.gather(*(self._probe(ip, port, host_sem, host_limiter, timeout)
+                                        for port in self.ports))
+        open_ports = [{'port': port, 'service': TOP_PORTS.get(port, 'unknown'), 'protocol': 'tcp'}
+                      for port, is_open in zip(self.ports, states) if is_open]
+        return {
+            'ports': open_ports[:10],  # Limitar a 10 puertos, como scan_ports
+            'os': 'Unknown'
+        }
+
+    async def scan_many_async(self, hosts, timeout=None):
+        timeout = timeout or self.timeout
+        results = await asyncio.gather(*(self._scan_host(ip, timeout) for ip in hosts))
+        return dict(zip(hosts, results))
+
+    def scan_many(self, hosts, timeout=None):
+        """{ip: {'ports', 'os'}} para varios hosts en un único bucle de eventos
+
+        timeout sustituye al timeout de connect configurado solo para esta llamada.
+        """
+        return asyncio.run(self.scan_many_async(list(hosts), timeout))
+
+    def scan(self, host, timeout=None):
+        return self.scan_many([host], timeout)[host]
@@ -0,0 +1,96 @@
+import functools
+import os
+import time
+
+from distributed import Coordinator, spawn_local_workers
+from host_store import HostGraph
+from network_scanner import NetworkMapper
+
+HOSTS_PER_BLOCK = 5
+
+
+class StubNmap:
+    """Imita NmapStreamScanner: -sn devuelve HOSTS_PER_BLOCK hosts por /24 y el escaneo de puertos, ssh
+
+    Si die_on y marker existen, el primer worker que escanea die_on muere a mitad de su
+    bloque (os._exit, como un kill -9) tras dejar el marcador para que el siguiente no muera.
+    """
+
+    def __init__(self, die_on=None, marker=None):
+        self.die_on = die_on
+        self.marker = marker
+
+    def scan(self, hosts, arguments='', stage='scan'):
+        if '-sn' in arguments:
+            prefix = hosts.rsplit('.', 1)[0]
+            for octet in range(1, HOSTS_PER_BLOCK + 1):
+                yield {'ip': f"{prefix}.{octet}", 'state': 'up', 'mac': f"00:11:22:00:00:{octet:02x}",
+                       'vendor': 'Acme', 'hostname': f"host-{octet}", 'srtt': None, 'ports': [],
+                       'os': 'Unknown', 'scanned': False}
+            return
+        for ip in hosts.split():
+            if ip == self.die_on and not os.path.exists(self.marker):
+                open(self.marker, 'w').close()
+                os._exit(1)
+            time.sleep(0.01)
+            yield {'ip': ip, 'state': 'up', 'os': 'Linux', 'scanned': True,
+                   'ports': [{'port': 22, 'service': 'ssh', 'protocol': 'tcp'}]}
+
+
+def stub_mapper():
+    # Sin llamar a __init__: no hace falta el binario de nmap
+    mapper = NetworkMapper.__new__(NetworkMapper)
+    mapper.network_graph = HostGraph()
+    mapper.host_rtts = {}
+    mapper.port_backend = 'nmap'
+    return mapper
+
+
+class RecordingCoordinator(Coordinator):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.done = []
+        self.failed = []
+
+    def block_done(self, block, worker):
+        self.done.append(block)
+        super().block_done(block, worker)
+
+    def block_failed(self, block, worker):
+        self.failed.append(block)
+        super().block_failed(block, worker)
+
+
+def run(targets, workers, scanner_factory):
+    coordinator = RecordingCoordinator(stub_mapper(), targets, block_prefix=24, worker_timeout=30)
+    spawn_local_workers(coordinator, workers, scan_ports=True, quiet=True, batch_size=1, workers=1,
+                        mapper_factory=stub_mapper, scanner_factory=scanner_factory)
+    coordinator.start()
+    try:
+        hosts = list(coordinator.iter_hosts())
+    finally:
+        coordinator.close()
+        for process in coordinator.local_processes:
+            process.join(10)
+    return coordinator, hosts
+
+
+def test_every_block_is_scanned_exactly_once():
+    coordinator, hosts = run(['10.0.0.0/22'], 3, StubNmap)
+    blocks = [f'10.0.{i}.0/24' for i in range(4)]
+    assert sorted(coordinator.done) == blocks
+    assert coordinator.failed == []
+    ips = [host['ip'] for host in hosts]
+    assert len(ips) == len(set(ips)) == 4 * HOSTS_PER_BLOCK
+    assert all(host['ports'] and host['os'] == 'Linux' for host in hosts)
+
+
+def test_block_of_dead_worker_is_reassigned(tmp_path):
+    factory = functools.partial(StubNmap, die_on='10.0.1.3', marker=str(tmp_path / 'died'))
+    coordinator, hosts = run(['10.0.0.0/23'], 2, factory)
+    assert (tmp_path / 'died').exists()
+    assert coordinator.failed == ['10.0.1.0/24']
+    assert sorted(coordinator.done) == ['10.0.0.0/24', '10.0.1.0/24']
+    # Los hosts que el worker muerto ya había enviado no se duplican
+    ips = [host['ip'] for host in hosts]
+    assert len(ips) == len(set(ips)) == 2 * HOSTS_PER_BLOCK
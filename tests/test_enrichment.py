@@ -0,0 +1,171 @@
+import socket
+import threading
+
+import pytest
+
+import enrichment
+from enrichment import HostEnricher, OUIIndex, ReverseResolver, build_oui_index
+
+# Formato de nmap-mac-prefixes: MA-L (6 dígitos), MA-M (7) y MA-S (9)
+NMAP_PREFIXES = """\
+# comentario
+001122 Acme
+0055DA Big Block Vendor
+0055DA1 Medium Block Vendor
+70B3D5 IEEE Registration Authority
+70B3D5123 Small Block Vendor
+"""
+
+# Formato oui.txt del IEEE
+IEEE_OUI = """\
+OUI/MA-L                                                    Organization
+company_id                                                  Organization
+                                                            Address
+
+28-6F-B9   (hex)\t\tNokia Shanghai Bell Co., Ltd.
+286FB9     (base 16)\t\tNokia Shanghai Bell Co., Ltd.
+\t\t\t\tNo.388 Ning Qiao Road
+\t\t\t\tShanghai  201206
+\t\t\t\tCN
+
+F4-F5-D8   (hex)\t\tGoogle, Inc.
+F4F5D8     (base 16)\t\tGoogle, Inc.
+"""
+
+
+def make_index(tmp_path, text):
+    source = tmp_path / 'prefixes.txt'
+    source.write_text(text, encoding='utf-8')
+    index_path = str(tmp_path / 'oui.idx')
+    count = build_oui_index(str(source), index_path)
+    return count, OUIIndex(index_path)
+
+
+def test_oui_lookup_ma_l(tmp_path):
+    count, index = make_index(tmp_path, NMAP_PREFIXES)
+    assert count == 5
+    assert index.lookup('00:11:22:33:44:55') == 'Acme'
+    assert index.lookup('00-11-22-33-44-55') == 'Acme'
+    assert index.lookup('0011.2233.4455') == 'Acme'
+    assert index.lookup('00:11:23:00:00:00') is None
+    assert index.lookup('Unknown') is None
+    index.close()
+
+
+def test_oui_lookup_prefers_longest_prefix(tmp_path):
+    _, index = make_index(tmp_path, NMAP_PREFIXES)
+    # MA-M dentro de su MA-L
+    assert index.lookup('00:55:DA:1F:00:01') == 'Medium Block Vendor'
+    assert index.lookup('00:55:DA:2F:00:01') == 'Big Block Vendor'
+    # MA-S dentro del bloque de la autoridad de registro
+    assert index.lookup('70:B3:D5:12:3A:BC') == 'Small Block Vendor'
+    assert index.lookup('70:B3:D5:12:4A:BC') == 'IEEE Registration Authority'
+    index.close()
+
+
+def test_oui_ieee_format(tmp_path):
+    count, index = make_index(tmp_path, IEEE_OUI)
+    assert count == 2
+    assert index.lookup('28:6f:b9:01:02:03') == 'Nokia Shanghai Bell Co., Ltd.'
+    assert index.lookup('F4:F5:D8:01:02:03') == 'Google, Inc.'
+    index.close()
+
+
+def test_oui_rejects_other_files(tmp_path):
+    path = tmp_path / 'not_an_index'
+    path.write_bytes(b'\0' * 64)
+    with pytest.raises(ValueError):
+        OUIIndex(str(path))
+
+
+class StubResolver:
+    """resolve(ip) sin red; las IPs sin nombre lanzan socket.herror, como gethostbyaddr"""
+
+    def __init__(self, names, gate=None):
+        self.names = names
+        self.gate = gate
+        self.started = threading.Event()
+        self.queries = []
+
+    def __call__(self, ip):
+        self.queries.append(ip)
+        self.started.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        if ip not in self.names:
+            raise socket.herror(1, 'Unknown host')
+        return self.names[ip]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(enrichment.time, 'monotonic', clock)
+    return clock
+
+
+def test_resolver_caches_names_and_failures(clock):
+    stub = StubResolver({'10.0.0.1': 'router.lan'})
+    resolver = ReverseResolver(stub, workers=4, ttl=3600, negative_ttl=300)
+    try:
+        assert resolver.resolve_many(['10.0.0.1', '10.0.0.2']) == {'10.0.0.1': 'router.lan', '10.0.0.2': None}
+        assert resolver.resolve_many(['10.0.0.1', '10.0.0.2']) == {'10.0.0.1': 'router.lan', '10.0.0.2': None}
+        assert sorted(stub.queries) == ['10.0.0.1', '10.0.0.2']
+        assert (resolver.hits, resolver.misses) == (2, 2)
+
+        # El fallo caduca antes que el nombre
+        clock.now += 301
+        resolver.resolve_many(['10.0.0.1', '10.0.0.2'])
+        assert sorted(stub.queries) == ['10.0.0.1', '10.0.0.2', '10.0.0.2']
+    finally:
+        resolver.close()
+
+
+def test_resolver_shares_in_flight_lookups():
+    gate = threading.Event()
+    stub = StubResolver({'10.0.0.1': 'router.lan'}, gate=gate)
+    resolver = ReverseResolver(stub, workers=4)
+    results = []
+    try:
+        first = threading.Thread(target=lambda: results.append(resolver.resolve_many(['10.0.0.1'])))
+        first.start()
+        assert stub.started.wait(5)
+        # La segunda petición llega con la primera consulta todavía en curso
+        second = threading.Thread(target=lambda: results.append(resolver.resolve_many(['10.0.0.1'])))
+        second.start()
+        gate.set()
+        first.join(5)
+        second.join(5)
+    finally:
+        gate.set()
+        resolver.close()
+    assert results == [{'10.0.0.1': 'router.lan'}] * 2
+    assert stub.queries == ['10.0.0.1']
+
+
+def test_enricher_only_fills_missing_fields(tmp_path):
+    _, index = make_index(tmp_path, NMAP_PREFIXES)
+    stub = StubResolver({'10.0.0.1': 'router.lan', '10.0.0.2': 'nas.lan'})
+    enricher = HostEnricher(index, ReverseResolver(stub, workers=2))
+    hosts = [
+        {'ip': '10.0.0.1', 'mac': '00:11:22:33:44:55', 'vendor': 'Unknown', 'hostname': '10.0.0.1'},
+        {'ip': '10.0.0.2', 'mac': '00:11:22:33:44:56', 'vendor': 'Nmap Vendor', 'hostname': 'nas.home'},
+        {'ip': '10.0.0.3', 'mac': 'Unknown', 'vendor': 'Unknown', 'hostname': '10.0.0.3'},
+    ]
+    try:
+        assert enricher.enrich(hosts) == 2
+    finally:
+        enricher.close()
+        index.close()
+    assert (hosts[0]['vendor'], hosts[0]['hostname']) == ('Acme', 'router.lan')
+    assert (hosts[1]['vendor'], hosts[1]['hostname']) == ('Nmap Vendor', 'nas.home')
+    assert (hosts[2]['vendor'], hosts[2]['hostname']) == ('Unknown', '10.0.0.3')
+    assert sorted(stub.queries) == ['10.0.0.1', '10.0.0.3']
@@ -0,0 +1,34 @@
+import json
+
+import pytest
+
+import exporters
+from exporters import open_exporters
+
+HOST = {'ip': '10.0.0.2', 'mac': 'Unknown', 'vendor': 'Acme', 'hostname': 'nas', 'os': 'Linux',
+        'ports': [{'port': 22, 'service': 'ssh', 'protocol': 'tcp'}]}
+
+
+def test_jsonl_and_graphml(tmp_path):
+    output_file = str(tmp_path / 'map.svg')
+    opened = open_exporters(['jsonl', 'graphml'], output_file)
+    for exporter in opened:
+        exporter.write_host(HOST)
+        exporter.write_edge('10.0.0.1', '10.0.0.2', {'connection': 'network', 'weight': 1})
+        exporter.close()
+
+    records = [json.loads(line) for line in (tmp_path / 'map.jsonl').read_text().splitlines()]
+    assert [record['type'] for record in records] == ['host', 'edge', 'service']
+    assert records[2] == {'type': 'service', 'service': '22/ssh', 'hosts': 1, 'sample': ['10.0.0.2']}
+    graphml = (tmp_path / 'map.graphml').read_text()
+    assert '<node id="10.0.0.2">' in graphml and graphml.rstrip().endswith('</graphml>')
+
+
+def test_failed_open_closes_and_removes_opened_exporters(tmp_path, monkeypatch):
+    def missing_pyarrow(self):
+        raise ImportError("El formato parquet requiere pyarrow: pip install pyarrow")
+
+    monkeypatch.setattr(exporters.ParquetExporter, 'open', missing_pyarrow)
+    with pytest.raises(ImportError):
+        open_exporters(['jsonl', 'graphml', 'parquet'], str(tmp_path / 'map.svg'))
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,95 @@
+import io
+import xml.etree.ElementTree as ET
+
+import nmap
+import pytest
+
+from nmap_xml import HostStream, NmapStreamScanner, host_record, iter_xml_file
+
+HOST = ('<host><status state="up" reason="arp-response"/>'
+        '<address addr="10.0.0.{n}" addrtype="ipv4"/>'
+        '<address addr="AA:BB:CC:00:00:0{n}" addrtype="mac" vendor="Acme"/>'
+        '<hostnames><hostname name="host-{n}.lan" type="PTR"/></hostnames>'
+        '<ports><port protocol="tcp" portid="22"><state state="open"/>'
+        '<service name="ssh" product="OpenSSH" version="9.6"/></port></ports>'
+        '<os><osmatch name="Linux 5.X" accuracy="95"/></os>'
+        '<times srtt="1500" rttvar="500" to="100000"/></host>\n')
+
+
+def nmap_xml(count, closed=True):
+    xml = '<?xml version="1.0"?>\n<nmaprun scanner="nmap" args="nmap -sT -F -O">\n'
+    xml += ''.join(HOST.format(n=n) for n in range(1, count + 1))
+    if closed:
+        xml += '<runstats><finished elapsed="1.0"/></runstats>\n</nmaprun>\n'
+    return xml.encode()
+
+
+class FakeScanner(NmapStreamScanner):
+    """NmapStreamScanner que lee un XML fijo y recuerda cómo se cerró"""
+
+    def __init__(self, xml, stderr=''):
+        super().__init__()
+        self.xml = xml
+        self.stderr = stderr
+        self.closed = []
+
+    def _open(self, hosts, arguments):
+        return io.BytesIO(self.xml)
+
+    def _close(self, finished):
+        self.closed.append(finished)
+        return self.stderr
+
+
+def test_host_record():
+    record = host_record(ET.fromstring(HOST.format(n=1)))
+    assert record['ip'] == '10.0.0.1'
+    assert record['state'] == 'up'
+    assert (record['mac'], record['vendor']) == ('AA:BB:CC:00:00:01', 'Acme')
+    assert record['hostname'] == 'host-1.lan'
+    assert record['srtt'] == pytest.approx(0.0015)
+    assert record['ports'] == [{'port': 22, 'service': 'ssh (OpenSSH 9.6)', 'protocol': 'tcp'}]
+    assert record['os'] == 'Linux 5.X (95%)'
+    assert record['scanned']
+
+
+def test_stream_reads_every_host_across_chunks():
+    stream = HostStream(io.BytesIO(nmap_xml(50)), chunk_size=97)
+    assert [record['ip'] for record in stream] == [f'10.0.0.{n}' for n in range(1, 51)]
+    assert stream.finished
+
+
+def test_truncated_xml_yields_completed_hosts_then_raises():
+    xml = nmap_xml(3, closed=False) + b'<host><status state="up"/><address addr="10.0.0.'
+    received = []
+    with pytest.raises(ET.ParseError):
+        for record in HostStream(io.BytesIO(xml), chunk_size=64):
+            received.append(record['ip'])
+    assert received == ['10.0.0.1', '10.0.0.2', '10.0.0.3']
+
+
+def test_iter_xml_file(tmp_path):
+    path = tmp_path / 'scan.xml'
+    path.write_bytes(nmap_xml(2))
+    assert [record['ip'] for record in iter_xml_file(str(path))] == ['10.0.0.1', '10.0.0.2']
+
+
+def test_scan_closes_nmap_when_reading_stops_early():
+    scanner = FakeScanner(nmap_xml(5))
+    records = scanner.scan('10.0.0.0/24', '-sn', stage='discovery')
+    assert next(records)['ip'] == '10.0.0.1'
+    records.close()
+    # Sin terminar de leer: _close debe matar a nmap
+    assert scanner.closed == [False]
+
+
+def test_scan_reads_to_the_end():
+    scanner = FakeScanner(nmap_xml(2))
+    assert len(list(scanner.scan('10.0.0.0/24', '-sn'))) == 2
+    assert scanner.closed == [True]
+
+
+def test_scan_invalid_xml_raises_port_scanner_error_with_stderr():
+    scanner = FakeScanner(b'not xml', stderr='Failed to resolve "nohost".\n')
+    with pytest.raises(nmap.PortScannerError, match='Failed to resolve'):
+        list(scanner.scan('nohost', '-sn'))
@@ -0,0 +1,76 @@
+import pytest
+
+import scan_cache
+from scan_cache import ScanCache, parse_duration
+
+RESULT = {'ports': [{'port': 22, 'service': 'ssh', 'protocol': 'tcp'}], 'os': 'Linux 5.X (95%)'}
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(scan_cache.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = ScanCache(str(tmp_path / 'cache.db'), ttl={'scan': 60}, max_entries=2)
+    yield cache
+    cache.close()
+
+
+def test_parse_duration():
+    assert parse_duration('90') == 90
+    assert parse_duration('30m') == 1800
+    assert parse_duration('12h') == 12 * 3600
+    assert parse_duration('7d') == 7 * 86400
+    with pytest.raises(ValueError):
+        parse_duration('doce horas')
+
+
+def test_scan_expires_after_ttl(cache, clock):
+    cache.put_scan('10.0.0.1', 'AA:BB:CC:00:00:01', RESULT)
+    clock.now += 59
+    assert cache.get_scan('10.0.0.1', 'AA:BB:CC:00:00:01') == RESULT
+    clock.now += 2
+    assert cache.get_scan('10.0.0.1', 'AA:BB:CC:00:00:01') is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_scan_is_keyed_by_ip_and_mac(cache):
+    cache.put_scan('10.0.0.1', 'AA:BB:CC:00:00:01', RESULT)
+    assert cache.get_scan('10.0.0.1', 'AA:BB:CC:00:00:02') is None
+    assert cache.get_scan('10.0.0.2', 'AA:BB:CC:00:00:01') is None
+    # Sin MAC (hosts remotos) la clave usa 'Unknown'
+    cache.put_scan('10.0.0.3', None, RESULT)
+    assert cache.get_scan('10.0.0.3', 'Unknown') == RESULT
+
+
+def test_evicts_least_recently_used(cache, clock):
+    for i in range(1, 4):
+        cache.put_scan(f'10.0.0.{i}', 'Unknown', RESULT)
+        clock.now += 1
+    # Leer 10.0.0.1 lo convierte en el más reciente: sale 10.0.0.2
+    assert cache.get_scan('10.0.0.1', 'Unknown') == RESULT
+    cache.commit()
+    assert cache.get_scan('10.0.0.2', 'Unknown') is None
+    assert cache.get_scan('10.0.0.1', 'Unknown') == RESULT
+    assert cache.get_scan('10.0.0.3', 'Unknown') == RESULT
+
+
+def test_merge_discovery_fills_missing_names(cache):
+    host = {'ip': '10.0.0.1', 'mac': 'AA:BB:CC:00:00:01', 'vendor': 'Apple', 'hostname': 'mac.local'}
+    assert cache.merge_discovery(dict(host)) == {}
+
+    unnamed = dict(host, vendor='Unknown', hostname='10.0.0.1')
+    assert cache.merge_discovery(unnamed) == {'hostname': 'mac.local', 'vendor': 'Apple'}
+    assert unnamed['hostname'] == 'mac.local'
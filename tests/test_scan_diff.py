@@ -0,0 +1,110 @@
+import networkx as nx
+
+from scan_diff import NetworkDiff, load_snapshot, save_snapshot
+
+
+class RecordingMapper:
+    """Solo lo que NetworkDiff usa de NetworkMapper"""
+
+    def __init__(self):
+        self.updates = {}
+
+    def update_host(self, host, scan_result):
+        host.update(scan_result)
+        self.updates[host['ip']] = scan_result
+
+
+def host(ip, mac):
+    return {'ip': ip, 'mac': mac, 'vendor': 'Unknown', 'hostname': ip}
+
+
+def previous_graph():
+    graph = nx.Graph()
+    graph.add_node('10.0.0.1', ip='10.0.0.1', mac='AA:00:00:00:00:01', os='Linux',
+                   ports=[{'port': 22, 'service': 'ssh', 'protocol': 'tcp'}])
+    graph.add_node('10.0.0.2', ip='10.0.0.2', mac='AA:00:00:00:00:02', os='Unknown', ports=[])
+    graph.add_node('10.0.0.3', ip='10.0.0.3', mac='AA:00:00:00:00:03', os='Unknown', ports=[])
+    graph.add_node('172.16.0.1', traceroute_only=True)
+    return graph
+
+
+def test_changed_hosts_yields_only_new_and_mac_changed():
+    diff = NetworkDiff(previous_graph(), 'anterior.json')
+    mapper = RecordingMapper()
+    unchanged = []
+    discovered = [host('10.0.0.1', 'AA:00:00:00:00:01'),   # sin cambios
+                  host('10.0.0.2', 'BB:00:00:00:00:02'),   # MAC cambiada
+                  host('10.0.0.4', 'AA:00:00:00:00:04'),   # nuevo
+                  host('172.16.0.1', 'Unknown')]           # antes solo visto en traceroute
+
+    to_scan = list(diff.changed_hosts(discovered, mapper, on_unchanged=unchanged.append))
+
+    assert [h['ip'] for h in to_scan] == ['10.0.0.2', '10.0.0.4', '172.16.0.1']
+    assert [h['ip'] for h in diff.added] == ['10.0.0.4', '172.16.0.1']
+    assert [(h['ip'], mac) for h, mac in diff.mac_changed] == [('10.0.0.2', 'AA:00:00:00:00:02')]
+    assert [h['ip'] for h in unchanged] == ['10.0.0.1']
+    assert [h['ip'] for h in diff.removed] == ['10.0.0.3']
+    assert diff.has_changes()
+
+
+def test_unchanged_hosts_inherit_ports_and_os():
+    diff = NetworkDiff(previous_graph())
+    mapper = RecordingMapper()
+    unchanged = host('10.0.0.1', 'AA:00:00:00:00:01')
+    list(diff.changed_hosts([unchanged], mapper))
+    assert unchanged['os'] == 'Linux'
+    assert unchanged['ports'] == [{'port': 22, 'service': 'ssh', 'protocol': 'tcp'}]
+
+
+def test_no_changes():
+    graph = previous_graph()
+    diff = NetworkDiff(graph)
+    list(diff.changed_hosts([host(ip, graph.nodes[ip]['mac']) for ip in ('10.0.0.1', '10.0.0.2', '10.0.0.3')],
+                            RecordingMapper()))
+    assert not diff.has_changes()
+    assert len(diff.unchanged) == 3
+
+
+def test_snapshot_round_trip_and_change_report(tmp_path):
+    snapshot = str(tmp_path / 'map_graph.json')
+    save_snapshot(previous_graph(), snapshot)
+    diff = NetworkDiff(load_snapshot(snapshot), snapshot)
+    list(diff.changed_hosts([host('10.0.0.1', 'AA:00:00:00:00:01'), host('10.0.0.9', 'Unknown')],
+                            RecordingMapper()))
+
+    report = tmp_path / 'map_changes.txt'
+    assert diff.generate_change_report('10.0.0.0/24', str(report)) == str(report)
+    text = report.read_text(encoding='utf-8')
+    assert '+ 10.0.0.9' in text
+    assert '- 10.0.0.2' in text and '- 10.0.0.3' in text
+    assert '172.16.0.1' not in text
+
+
+def test_snapshot_without_port_scan_rescans_unchanged_hosts(tmp_path):
+    graph = previous_graph()
+    for ip in ('10.0.0.1', '10.0.0.2', '10.0.0.3'):
+        graph.nodes[ip].update(ports=[], os='Unknown')
+    snapshot = str(tmp_path / 'map_graph.json')
+    save_snapshot(graph, snapshot, ports_scanned=False)
+
+    diff = NetworkDiff(load_snapshot(snapshot))
+    mapper = RecordingMapper()
+    unchanged = []
+    to_scan = list(diff.changed_hosts([host('10.0.0.1', 'AA:00:00:00:00:01')], mapper,
+                                      on_unchanged=unchanged.append))
+
+    # Sin cambios, pero sus puertos nunca se escanearon
+    assert [h['ip'] for h in to_scan] == ['10.0.0.1']
+    assert [h['ip'] for h in diff.unchanged] == ['10.0.0.1']
+    assert unchanged == [] and mapper.updates == {}
+    assert [h['ip'] for h in diff.removed] == ['10.0.0.2', '10.0.0.3']
+
+
+def test_scanned_snapshot_with_no_open_ports_is_not_rescanned(tmp_path):
+    graph = previous_graph()
+    graph.nodes['10.0.0.1'].update(ports=[], os='Unknown')
+    snapshot = str(tmp_path / 'map_graph.json')
+    save_snapshot(graph, snapshot, ports_scanned=True)
+
+    diff = NetworkDiff(load_snapshot(snapshot))
+    assert list(diff.changed_hosts([host('10.0.0.1', 'AA:00:00:00:00:01')], RecordingMapper())) == []
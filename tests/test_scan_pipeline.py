@@ -0,0 +1,105 @@
+import threading
+import time
+
+import networkx as nx
+
+from scan_pipeline import ScanPipeline
+
+
+class FakeMapper:
+    """scan_ports/scan_ports_batch sin nmap: los primeros hosts son los más lentos"""
+
+    port_backend = 'tcp'  # _get_scanner no crea un escáner de nmap
+
+    def __init__(self, delays, fail=()):
+        self.delays = delays
+        self.fail = set(fail)
+        self.network_graph = nx.Graph()
+        self.host_rtts = {}
+        self.calls = []
+
+    def _result(self, ip):
+        self.calls.append(ip)
+        if ip in self.fail:
+            raise RuntimeError(f"escáner roto en {ip}")
+        time.sleep(self.delays.get(ip, 0))
+        return {'ports': [{'port': 22, 'service': 'ssh', 'protocol': 'tcp'}], 'os': 'Linux'}
+
+    def scan_ports(self, host, scanner=None, **timeouts):
+        return self._result(host)
+
+    def scan_ports_batch(self, hosts, scanner=None, **timeouts):
+        return {host: self._result(host) for host in hosts}
+
+    def update_host(self, host, scan_result):
+        host.update(scan_result)
+
+
+class RaisingPipeline(ScanPipeline):
+    # Un escáner personalizado que lanza fuera de scan_ports (p. ej. desde scanner_factory)
+    def _scan_one(self, ip, **timeouts):
+        raise OSError("sin descriptores de archivo")
+
+
+def hosts(count):
+    return [{'ip': f'10.0.0.{i}', 'hostname': f'10.0.0.{i}'} for i in range(2, count + 2)]
+
+
+def test_hosts_are_merged_in_input_order():
+    discovered = hosts(8)
+    # El primero tarda más: sin el orden de entrada saldría el último
+    mapper = FakeMapper({host['ip']: 0.02 * (8 - i) for i, host in enumerate(discovered)})
+    order = []
+    pipeline = ScanPipeline(mapper, workers=4)
+    scanned = pipeline.run(iter(discovered), on_host=lambda host: order.append(host['ip']))
+    assert order == [host['ip'] for host in discovered]
+    assert all(host['os'] == 'Linux' for host in scanned)
+
+
+def test_worker_exception_does_not_hang_run():
+    pipeline = RaisingPipeline(FakeMapper({}), workers=2, max_retries=1)
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault('scanned', pipeline.run(iter(hosts(3)))),
+                              daemon=True)
+    thread.start()
+    thread.join(10)
+    assert not thread.is_alive()
+    assert len(result['scanned']) == 3
+    assert pipeline.retried == 3
+
+
+def test_failed_scans_are_retried_then_kept_as_errors():
+    mapper = FakeMapper({}, fail={'10.0.0.3'})
+    order = []
+    pipeline = ScanPipeline(mapper, workers=2, max_retries=2)
+    pipeline.run(iter(hosts(3)), on_host=lambda host: order.append(host['ip']))
+    assert order == ['10.0.0.2', '10.0.0.3', '10.0.0.4']
+    assert mapper.calls.count('10.0.0.3') == 3
+
+
+def test_batch_time_is_observed_per_host():
+    mapper = FakeMapper({host['ip']: 0.01 for host in hosts(8)})
+    pipeline = ScanPipeline(mapper, workers=1, batch_size=8, host_timeout=0.01)
+    pipeline.run(iter(hosts(8)))
+    # Un lote de 8 hosts de 10 ms: la muestra es ~10 ms por host, no ~80 ms
+    assert pipeline.host_timeout.samples >= 1
+    assert pipeline.host_timeout.srtt < 0.05
+
+
+def test_topology_and_merges_do_not_overlap():
+    mapper = FakeMapper({host['ip']: 0.01 for host in hosts(6)})
+    pipeline = ScanPipeline(mapper, workers=2)
+    inside = threading.Event()
+    overlaps = []
+
+    def topology():
+        inside.set()
+        time.sleep(0.05)
+        inside.clear()
+
+    def on_host(host):
+        if inside.is_set():
+            overlaps.append(host['ip'])
+
+    pipeline.run(iter(hosts(6)), on_host=on_host, topology=topology)
+    assert overlaps == []
@@ -0,0 +1,32 @@
+import asyncio
+import threading
+
+from tcp_scanner import SharedConnectionLimit
+
+
+def test_shared_limit_spans_event_loops():
+    limit = SharedConnectionLimit(3)
+    lock = threading.Lock()
+    state = {'open': 0, 'peak': 0}
+
+    async def probe():
+        async with limit:
+            with lock:
+                state['open'] += 1
+                state['peak'] = max(state['peak'], state['open'])
+            await asyncio.sleep(0.002)
+            with lock:
+                state['open'] -= 1
+
+    async def worker():
+        await asyncio.gather(*(probe() for _ in range(20)))
+
+    # Un bucle de eventos por hilo, como los workers de ConcurrentScanner
+    threads = [threading.Thread(target=asyncio.run, args=(worker(),)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert state['peak'] == 3
+    assert limit.available == 3
@@ -0,0 +1,88 @@
+import networkx as nx
+
+from topology import SimulatedTraceroute, TopologyDiscovery, traceroute_paths
+
+GATEWAY = '10.0.0.1'
+CORE = '10.0.1.1'
+BRANCH = '10.0.2.1'
+
+
+def network(hosts_per_subnet=4):
+    """scanner -> gateway -> core -> branch -> 10.0.2.0/24; y 10.0.0.0/24 local"""
+    topology = nx.Graph([('scanner', GATEWAY), (GATEWAY, CORE), (CORE, BRANCH)])
+    local = [f'10.0.0.{i}' for i in range(10, 10 + hosts_per_subnet)]
+    remote = [f'10.0.2.{i}' for i in range(10, 10 + hosts_per_subnet)]
+    topology.add_edges_from(('scanner', ip) for ip in local)
+    topology.add_edges_from((BRANCH, ip) for ip in remote)
+    return topology, local, remote
+
+
+def discovered_graph(ips):
+    graph = nx.Graph()
+    for ip in ips:
+        graph.add_node(ip, ip=ip, mac='Unknown', vendor='Unknown', hostname=ip, os='Unknown', ports=[])
+    return graph
+
+
+def discover(topology, ips, silent_hops=()):
+    graph = discovered_graph(ips)
+    probe = SimulatedTraceroute(topology, 'scanner', silent_hops)
+    TopologyDiscovery(graph, probe, gateway_hint=GATEWAY).discover([{'ip': ip} for ip in ips])
+    return graph, probe
+
+
+def test_one_traceroute_per_subnet():
+    topology, local, remote = network()
+    graph, probe = discover(topology, local + remote)
+    # Un representante por /24: el resto hereda su camino
+    assert probe.traced_targets == 2
+    assert graph.has_edge(GATEWAY, CORE) and graph.has_edge(CORE, BRANCH)
+    assert all(graph.has_edge(BRANCH, ip) for ip in remote)
+    assert all(graph.has_edge(GATEWAY, ip) for ip in local)
+    assert graph.nodes[CORE]['traceroute_only']
+    assert graph.nodes[CORE]['device_type'] == 'router'
+
+
+def test_representative_that_does_not_arrive_retraces_the_subnet():
+    topology, _, remote = network()
+    # El representante no está en la topología: su traceroute vuelve vacío
+    representative = '10.0.2.5'
+    graph, probe = discover(topology, [representative] + remote)
+    assert probe.traced_targets == len(remote)
+    assert all(graph.has_edge(BRANCH, ip) for ip in remote)
+
+
+def test_anonymous_hops_become_multi_hop_edges():
+    topology, _, remote = network()
+    graph, _ = discover(topology, remote, silent_hops={CORE})
+    assert CORE not in graph
+    assert graph.edges[GATEWAY, BRANCH]['connection'] == '2 saltos'
+    assert graph.edges[GATEWAY, BRANCH]['weight'] == 2
+
+
+def test_unreached_target_hangs_from_last_responding_hop():
+    graph = discovered_graph(['10.0.2.5'])
+    discovery = TopologyDiscovery(graph, probe=None)
+    discovery._add_edges(['10.0.2.5'], {'10.0.2.5': [GATEWAY, CORE, None]}, {})
+    assert graph.degree('10.0.2.5') == 1
+    assert graph.edges[CORE, '10.0.2.5']['connection'] == '2 saltos'
+
+    # Camino cortado antes del destino, sin saltos anónimos al final
+    graph = discovered_graph(['10.0.2.6'])
+    TopologyDiscovery(graph, probe=None)._add_edges(['10.0.2.6'], {'10.0.2.6': [GATEWAY, CORE]}, {})
+    assert graph.has_edge(CORE, '10.0.2.6')
+
+
+def test_unreached_target_without_responding_hops_uses_the_gateway():
+    graph = discovered_graph(['10.0.2.5'])
+    TopologyDiscovery(graph, probe=None, gateway_hint=GATEWAY)._add_edges(
+        ['10.0.2.5'], {'10.0.2.5': [None, None, None]}, {})
+    assert graph.edges[GATEWAY, '10.0.2.5']['connection'] == '3 saltos'
+
+
+def test_traceroute_paths_from_nmap_records():
+    records = [{'ip': '10.0.2.5', 'trace': [(1, GATEWAY, 'gw.lan'), (3, BRANCH, None), (4, '10.0.2.5', None)]},
+               {'ip': None}]
+    paths, names = traceroute_paths(records)
+    assert paths == {'10.0.2.5': [GATEWAY, None, BRANCH, '10.0.2.5']}
+    assert names == {GATEWAY: 'gw.lan'}
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+import ipaddress
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import networkx as nx
+
+from dependencies import port_scanner
+from instrumentation import logger
+
+
+def traceroute_paths(records):
+    """Saltos de cada host a partir de los registros de nmap --traceroute (nmap_xml)
+
+    Devuelve (caminos, nombres): caminos[ip] es la lista de saltos por TTL,
+    con None donde el salto no respondió; nombres[ip] el DNS inverso de cada salto.
+    """
+    paths = {}
+    names = {}
+    for record in records:
+        if record['ip'] is None:
+            continue
+
+        hops = {}
+        for ttl, ipaddr, name in record.get('trace', ()):
+            hops[ttl] = ipaddr
+            if name:
+                names[ipaddr] = name
+        paths[record['ip']] = [hops.get(ttl) for ttl in range(1, max(hops, default=0) + 1)]
+    return paths, names
+
+
+class NmapTraceroute:
+    """Backend real: nmap -sn --traceroute (requiere root)
+
+    nmap reutiliza los saltos comunes entre los destinos de una misma invocación,
+    así que cada lote prueba una sola vez los routers que comparten.
+    """
+
+    def __init__(self, scanner_factory=port_scanner):
+        self.scanner_factory = scanner_factory
+        self._local = threading.local()
+
+    def trace(self, targets):
+        if not hasattr(self._local, 'nm'):
+            self._local.nm = self.scanner_factory()
+        records = self._local.nm.scan(' '.join(targets), '-sn -T4 --traceroute', stage='traceroute')
+        return traceroute_paths(records)
+
+
+class SimulatedTraceroute:
+    """Backend offline: recorre una topología networkx desde `source`, sin red
+
+    silent_hops son routers que no responden (aparecen como None, igual que '*').
+    """
+
+    def __init__(self, topology, source, silent_hops=()):
+        self.topology = topology
+        self.source = source
+        self.silent_hops = set(silent_hops)
+        self.traced_targets = 0
+        self.probes = 0
+        self.lock = threading.Lock()
+
+    def trace(self, targets):
+        paths = {}
+        for target in targets:
+            if target not in self.topology:
+                paths[target] = []
+                continue
+            path = nx.shortest_path(self.topology, self.source, target)[1:]
+            paths[target] = [None if hop in self.silent_hops else hop for hop in path]
+            with self.lock:
+                self.traced_targets += 1
+                self.probes += len(path)
+        return paths, {}
+
+
+class TopologyDiscovery:
+    """Construye conexiones multi-salto en el grafo a partir de traceroutes concurrentes
+
+    Solo se traza un representante por subred (/group_prefix): el resto de
+    hosts de la subred comparte su camino salvo el último salto. Si el
+    representante no llega a su destino, se trazan todos los de la subred.
+    """
+
+    def __init__(self, graph, probe, workers=4, batch_size=16, group_prefix=24, gateway_hint=None):
+        self.graph = graph
+        self.probe = probe
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.group_prefix = group_prefix
+        self.gateway_hint = gateway_hint
+        self.traced = 0
+
+    def _group(self, ips):
+        groups = {}
+        for ip in ips:
+            try:
+                key = str(ipaddress.ip_network(f"{ip}/{self.group_prefix}", strict=False))
+            except ValueError:
+                key = ip
+            groups.setdefault(key, []).append(ip)
+        return groups
+
+    def _trace_all(self, targets):
+        """Traceroute concurrente por lotes; el resultado no depende del orden de los hilos"""
+        batches = [targets[i:i + self.batch_size] for i in range(0, len(targets), self.batch_size)]
+        paths = {}
+        names = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for batch_paths, batch_names in pool.map(self._trace_batch, batches):
+                paths.update(batch_paths)
+                names.update(batch_names)
+        self.traced += len(targets)
+        return paths, names
+
+    def _trace_batch(self, batch):
+        try:
+            return self.probe.trace(batch)
+        except Exception as e:
+            logger.warning(f"   ⚠️  Error en traceroute de {batch[0]}...{batch[-1]}: {e}")
+            return {}, {}
+
+    def discover(self, hosts):
+        ips = [host['ip'] for host in hosts]
+        groups = self._group(ips)
+
+        # Un traceroute por subred
+        representatives = [members[0] for members in groups.values()]
+        paths, names = self._trace_all(representatives)
+
+        # El resto de la subred hereda el camino del representante
+        retrace = []
+        for members in groups.values():
+            rep_path = paths.get(members[0], [])
+            if rep_path and rep_path[-1] == members[0]:
+                for ip in members[1:]:
+                    paths[ip] = rep_path[:-1] + [ip]
+            else:
+                retrace.extend(members[1:])
+
+        if retrace:
+            extra_paths, extra_names = self._trace_all(retrace)
+            paths.update(extra_paths)
+            names.update(extra_names)
+
+        logger.info(f"   🛰️  {self.traced} traceroutes para {len(ips)} hosts")
+        self._add_edges(ips, paths, names)
+        return paths
+
+    def _add_node(self, ip, names):
+        if ip not in self.graph:
+            # Router intermedio que no respondió al barrido -sn
+            self.graph.add_node(ip, ip=ip, mac='Unknown', vendor='Unknown',
+                                hostname=names.get(ip, ip), os='Unknown',
+                                ports=[], services=[], traceroute_only=True)
+
+    def _add_edges(self, ips, paths, names):
+        # El gateway local es el primer salto más común de los caminos remotos
+        first_hops = Counter(path[0] for path in paths.values() if len(path) > 1 and path[0])
+        local_gateway = first_hops.most_common(1)[0][0] if first_hops else self.gateway_hint
+
+        for ip in ips:
+            path = paths.get(ip, [])
+
+            # Hosts de la red local (un solo salto): cuelgan del gateway local
+            if len(path) <= 1:
+                if local_gateway and local_gateway != ip:
+                    self._add_node(local_gateway, names)
+                    self.graph.add_edge(local_gateway, ip, connection='network', weight=1)
+                continue
+
+            previous = None
+            skipped = 0
+            for hop in path:
+                if hop is None:
+                    skipped += 1
+                    continue
+                self._add_node(hop, names)
+                if previous is not None and previous != hop:
+                    connection = 'traceroute' if not skipped else f'{skipped + 1} saltos'
+                    self.graph.add_edge(previous, hop, connection=connection, weight=skipped + 1)
+                    self.graph.nodes[previous]['device_type'] = 'router'
+                previous = hop
+                skipped = 0
+
+            # Camino que no llega al destino (saltos filtrados al final o traceroute
+            # cortado): el host cuelga del último salto que respondió
+            if previous is None:
+                previous = local_gateway
+                skipped = len(path) - 1
+            if previous is not None and previous != ip:
+                hops = max(skipped, 1) + 1
+                self._add_node(previous, names)
+                self.graph.add_edge(previous, ip, connection=f'{hops} saltos', weight=hops)
+                self.graph.nodes[previous]['device_type'] = 'router'